@@ -0,0 +1,268 @@
+import os
+import sys
+import time
+import random
+import argparse
+import numpy as np
+import pandas as pd
+
+# Run from anywhere, e.g. python "Benchmarks/Dashboard Pre-processing.py" --snapshot "Databases/Custom Fields"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Helpers.custom_fields import pre_process, DERIVED_COLUMNS
+from Helpers.email_domains import get_domains, classify_domains
+
+CATEGORIES = ['Verified Email', 'Verified Phone', 'Verified Location', 'Sync source']
+SOURCES = ['Alumni_Portal', 'Live Alumni', 'Google Form', 'Alumni Association']
+SYNC_TYPES = ['Email', 'Phone', 'LinkedIn', 'Linkedin', 'Organization', 'Address', 'Location', 'Name', 'Gender',
+              'New Record', 'Misc']
+VALUES = ['user@gmail.com', 'user@iitb.ac.in', 'user@company.com', 'https://linkedin.com/in/user@x', '+91 98200 00000',
+          None]
+COMMENTS = ['Live Alumni - Verified', 'verified using RE appeal data', 'RE Email Engagement - Opens', 'New alum',
+            'user@gmail.com', 'https://example.com/@user', 'updated', None]
+
+
+def make_custom_fields(rows, seed):
+    # Custom fields shaped like 'Databases/Custom Fields' before pre-processing
+    random.seed(seed)
+
+    records = []
+    for i in range(rows):
+        category = random.choice(CATEGORIES)
+
+        if category == 'Sync source':
+            value = f'{random.choice(SOURCES)} - {random.choice(["Auto", "Manual", "Manually"])} | ' \
+                    f'{random.choice(SYNC_TYPES)}'
+        else:
+            value = random.choice(VALUES)
+
+        records.append({
+            'id': str(i),
+            'parent_id': str(random.randint(1, rows // 10 + 1)),
+            'category': category,
+            'value': value,
+            'comment': random.choice(COMMENTS),
+            'date_added': '2024-%02d-%02dT10:00:00+05:30' % (random.randint(1, 12), random.randint(1, 28))
+        })
+
+    addresses = pd.DataFrame({
+        'constituent_id': [str(i) for i in range(1, rows // 10 + 2, 2)],
+        'city': 'Mumbai',
+        'county': 'Maharashtra',
+        'country': 'India'
+    })
+
+    return pd.DataFrame(records), addresses
+
+
+# The row by row implementation in Get Data for Dashboard.py, before pre_process()
+
+def get_verified_category(source):
+    if source == 'RE Email Engagement_Appeals' or source == 'RE Email Engagement' or source == 'Netcore Email Engagement': return '2 - Opens'
+    elif source == 'Live Alumni': return '3 - Live Alumni'
+    elif source == 'Alumni Association': return '4 - Alumni Association'
+    elif pd.isnull(source) or source == '': return np.nan
+    else: return '1 - Alum'
+
+def email_type(email):
+
+    if '@' in email and not 'https://' in email:
+
+        iitb_emails = ['iitb.ac.in', 'sjmsom.in', 'iitbombay.org']
+
+        if any(text in email for text in iitb_emails):
+            type = 'IITB Email'
+
+        elif '@' in email:
+            type = 'Non-IITB Email'
+
+        else:
+            type = np.nan
+
+    else:
+        type = np.nan
+
+    return type
+
+def verified_sources(category, comment):
+
+    if 'verified' in str(category).lower():
+
+        if comment == 'verified using RE appeal data':
+            output = 'RE Email Engagement - Open rate'
+
+        try:
+            output = str(comment).split('-')[0].strip()
+        except:
+            output = str(comment).strip()
+
+    else:
+        output = np.nan
+
+    return output
+
+def sync_source(source):
+
+    to_check = ['- manually |', '- manual |', '- auto |', '- automatically |']
+
+    if any(string in str(source).lower() for string in to_check):
+        try:
+            sync_source = str(source).split('-')[0].strip()
+        except:
+            sync_source = str(source).strip()
+
+        try:
+            update_type = str(source).split('|')[1].strip().title()
+        except:
+            update_type = str(source).strip().title()
+
+    else:
+        sync_source = np.nan
+        update_type = np.nan
+
+    if 'email' in str(update_type).lower():
+        update_type = 'Email'
+    elif 'phone' in str(update_type).lower():
+        update_type = 'Phone'
+    elif update_type == 'Linkedin':
+        update_type = 'Online Presence'
+    elif 'employment' in str(update_type).lower() or 'org' in str(update_type).lower():
+        update_type = 'Employment'
+    elif 'address' in str(update_type).lower() or 'location' in str(update_type).lower():
+        update_type = 'Location'
+    elif 'gender' in str(update_type).lower() or 'name' in str(update_type).lower() or 'pan' in str(update_type).lower() or 'bio' in str(update_type).lower():
+        update_type = 'Bio Details'
+
+    return sync_source, update_type
+
+def check_if_email(type, email):
+
+    if email is None: return np.nan
+    else:
+        if type == 'Email':
+
+            if 'https://' in email:
+                type = np.nan
+
+            else:
+                if '@' in email:
+                    type = type
+
+                else:
+                    type = np.nan
+
+        return type
+
+def identify_new_record(update_type, type):
+
+    if update_type == 'New Record':
+
+        if 'alum' in str(type).lower():
+            update_type = 'New Alums'
+
+        else:
+            update_type = update_type
+
+    else:
+        update_type = update_type
+
+    return update_type
+
+
+def pre_process_legacy(data, address_data):
+    data = data.copy()
+
+    data['date'] = data['date_added'].apply(lambda x: str(x).split('-')[2][0:2] + '-' + str(x).split('-')[1] + '-' + str(x).split('-')[0])
+    data['date'] = pd.to_datetime(data['date'], format='%d-%m-%Y', errors='coerce')
+
+    data['verified_source'] = data[['category', 'comment']].apply(lambda x: verified_sources(*x), axis=1)
+
+    data[['sync_source', 'update_type']] = data[['value']].apply(lambda x: pd.Series(sync_source(x.iloc[0])), axis=1)
+
+    data['update_type'] = data[['update_type', 'comment']].apply(lambda x: check_if_email(*x), axis=1)
+
+    data['value'] = data['value'].fillna('')
+    data['email_type'] = data['value'].apply(lambda x: email_type(x))
+
+    data['email_domain'] = get_domains(data['value'])
+
+    data['update_type'] = data[['update_type', 'comment']].apply(lambda x: identify_new_record(*x), axis=1)
+
+    data['parent_id'] = data['parent_id'].astype(int)
+
+    address_data = address_data.copy()
+    address_data['constituent_id'] = address_data['constituent_id'].astype(int)
+
+    data = pd.merge(left=data, right=address_data[['constituent_id', 'city', 'county', 'country']].drop_duplicates(), left_on='parent_id', right_on='constituent_id', how='left')
+    data = data.drop(columns=['constituent_id']).copy()
+
+    data['verified_source_category'] = data['verified_source'].apply(lambda x: get_verified_category(x))
+
+    data['email_domain_category'] = classify_domains(data['email_domain'])
+
+    return data
+
+
+def compare(legacy, vectorised):
+    # Columns which differ, treating None and NaN alike
+    differences = []
+
+    for column in legacy.columns:
+        left = legacy[column].astype(object)
+        right = vectorised[column].astype(object)
+
+        same = (left == right) | (left.isna() & right.isna())
+
+        if not same.all():
+            differences.append(f'{column}: {(~same).sum()} rows, e.g. {left[~same].iloc[0]!r} != {right[~same].iloc[0]!r}')
+
+    if list(legacy.columns) != list(vectorised.columns):
+        differences.append(f'columns: {list(legacy.columns)} != {list(vectorised.columns)}')
+
+    return differences
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description='Check the vectorised pre-processing of the custom fields against '
+                                                 'the row by row implementation')
+    parser.add_argument('--snapshot', help='Saved copy of Databases/Custom Fields, instead of generated data')
+    parser.add_argument('--addresses', default='Databases/Address List', help='Address List to go with --snapshot')
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=42)
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_arguments()
+
+    if args.snapshot:
+        # A snapshot taken after a previous run already has the derived columns
+        data = pd.read_parquet(args.snapshot).drop(columns=DERIVED_COLUMNS + ['date'], errors='ignore')
+        addresses = pd.read_parquet(args.addresses, columns=['constituent_id', 'city', 'county', 'country'])
+    else:
+        data, addresses = make_custom_fields(args.rows, args.seed)
+
+    # Object columns with None for nulls, as the row by row implementation expects
+    data = data.astype(object).where(data.notna(), None)
+
+    print(f'{len(data)} custom fields')
+
+    start = time.perf_counter()
+    legacy = pre_process_legacy(data, addresses)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorised = pre_process(data, addresses)
+    vectorised_time = time.perf_counter() - start
+
+    print(f'  row by row: {legacy_time:8.3f}s')
+    print(f'  vectorised: {vectorised_time:8.3f}s ({legacy_time / vectorised_time:.1f}x)')
+
+    differences = compare(legacy, vectorised)
+    print(f'  same result: {not differences}')
+
+    for difference in differences:
+        print(f'    {difference}')
+
+    sys.exit(1 if differences else 0)
@@ -0,0 +1,180 @@
+import os
+import sys
+import time
+import random
+import string
+import argparse
+
+from fuzzywuzzy import process
+
+# Run from anywhere, e.g. python "Benchmarks/Fuzzy Matching.py"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Helpers.fuzzy_match import get_scores, get_batch_scores, find_missing, find_existing, dedupe
+
+ORGANIZATIONS = ['Tata Consultancy Services', 'Infosys Limited', 'Larsen & Toubro', 'Reliance Industries',
+                 'Indian Institute of Technology Bombay', 'Google India Pvt Ltd', 'Microsoft Corporation',
+                 'Goldman Sachs', 'McKinsey & Company', 'Hindustan Unilever', 'Bharat Petroleum', 'Wipro']
+
+STREETS = ['Hill Road', 'Link Road', 'MG Road', 'Linking Road', 'Station Road', 'Powai Lake Road']
+
+CITIES = [('Mumbai', 'Maharashtra', '400076'), ('Pune', 'Maharashtra', '411007'), ('Bengaluru', 'Karnataka', '560001'),
+          ('Chennai', 'Tamil Nadu', '600036'), ('New Delhi', 'Delhi', '110016')]
+
+
+def make_typo(value):
+    # Drop, swap or change one character, like a hand-typed form entry
+    if len(value) < 4:
+        return value
+
+    i = random.randrange(1, len(value) - 1)
+    change = random.choice(['drop', 'swap', 'replace', 'case'])
+
+    if change == 'drop':
+        return value[:i] + value[i + 1:]
+    elif change == 'swap':
+        return value[:i - 1] + value[i] + value[i - 1] + value[i + 1:]
+    elif change == 'replace':
+        return value[:i] + random.choice(string.ascii_lowercase) + value[i + 1:]
+    else:
+        return value.upper()
+
+
+def make_phone():
+    return ''.join(random.choices(string.digits, k=10))
+
+
+def make_address():
+    city, state, postal_code = random.choice(CITIES)
+    return f'{random.randint(1, 500)}, {random.choice(STREETS)} {city} {state} India {postal_code}'
+
+
+def make_records(n, seed):
+    # New values with RE values that are the same, slightly different, or unrelated
+    random.seed(seed)
+
+    records = []
+    for i in range(n):
+        for make_value in [make_phone, lambda: random.choice(ORGANIZATIONS), make_address]:
+            existing = [make_value() for x in range(random.randint(0, 4))]
+            new = [make_value() for x in range(random.randint(0, 2))]
+
+            if existing and random.random() < 0.6:
+                new.append(make_typo(random.choice(existing)) if random.random() < 0.5 else random.choice(existing))
+
+            records.append((new, existing))
+
+    return records
+
+
+def legacy_find_missing(new_values, existing_values, threshold):
+    # The loop used by the update functions before Helpers.fuzzy_match
+    missing_values = []
+    for each_value in new_values:
+        try:
+            likely_value, score = process.extractOne(each_value, existing_values)
+            if score <= threshold:
+                missing_values.append(each_value)
+        except:
+            missing_values.append(each_value)
+
+    if missing_values != []:
+        missing_values = [str(x) for x in missing_values]
+        missing_values = list(process.dedupe(missing_values, threshold=threshold))
+
+    return missing_values
+
+
+def legacy_find_existing(new_values, existing_values, threshold):
+    for each_value in existing_values:
+        try:
+            likely_value, score = process.extractOne(each_value, new_values)
+            if score >= threshold:
+                return each_value
+        except:
+            pass
+
+    return None
+
+
+def matrix_find_missing(new_values, existing_values, threshold, scores=None):
+    missing_values = find_missing(new_values, existing_values, threshold, scores)
+
+    if missing_values != []:
+        missing_values = dedupe(missing_values, threshold=threshold)
+
+    return missing_values
+
+
+def run_legacy(records, threshold):
+    return [(legacy_find_missing(new, existing, threshold), legacy_find_existing(new, existing, threshold))
+            for new, existing in records]
+
+
+def run_matrix(records, threshold):
+    results = []
+    for new, existing in records:
+        scores = get_scores(new, existing)
+        results.append((matrix_find_missing(new, existing, threshold, scores),
+                        find_existing(new, existing, threshold, scores)))
+
+    return results
+
+
+def run_matrix_batch(records, threshold):
+    results = []
+    for (new, existing), scores in zip(records, get_batch_scores(records)):
+        results.append((matrix_find_missing(new, existing, threshold, scores),
+                        find_existing(new, existing, threshold, scores)))
+
+    return results
+
+
+def time_it(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description='Compare Helpers.fuzzy_match with the fuzzywuzzy loops')
+    parser.add_argument('--records', type=int, default=2000, help='Number of form records to simulate')
+    parser.add_argument('--seed', type=int, default=42)
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    import logging
+
+    # fuzzywuzzy warns on every blank value
+    logging.disable(logging.WARNING)
+
+    args = get_arguments()
+    records = make_records(args.records, args.seed)
+
+    print(f'{len(records)} comparisons ({args.records} records x phones, employment and address)')
+
+    for threshold in [80, 90]:
+        legacy, legacy_time = time_it(run_legacy, records, threshold)
+        matrix, matrix_time = time_it(run_matrix, records, threshold)
+        batch, batch_time = time_it(run_matrix_batch, records, threshold)
+
+        # Compare the decisions, as dedupe can return the values in another container type
+        legacy = [(list(missing), existing) for missing, existing in legacy]
+        matrix = [(list(missing), existing) for missing, existing in matrix]
+        batch = [(list(missing), existing) for missing, existing in batch]
+
+        same = sum(x == y for x, y in zip(legacy, matrix))
+        same_batch = sum(x == y for x, y in zip(matrix, batch))
+
+        print(f'\nThreshold {threshold}')
+        print(f'  fuzzywuzzy loops:      {legacy_time:8.3f}s')
+        print(f'  matrix per record:     {matrix_time:8.3f}s ({legacy_time / matrix_time:.1f}x)')
+        print(f'  matrix per batch:      {batch_time:8.3f}s ({legacy_time / batch_time:.1f}x)')
+        print(f'  same result as fuzzywuzzy: {same}/{len(records)}, per batch same as per record: '
+              f'{same_batch}/{len(records)}')
+
+        for (new, existing), x, y in list(zip(records, legacy, matrix))[:1000]:
+            if x != y:
+                print(f'  differs: new={new} existing={existing} fuzzywuzzy={x} matrix={y}')
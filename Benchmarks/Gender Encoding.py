@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+import pickle
+import random
+import string
+import argparse
+import numpy as np
+
+# Run from anywhere, e.g. python "Benchmarks/Gender Encoding.py" --names 100000
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Helpers.gender import MAX_LENGTH, normalise_name, encode_names, predict_genders
+
+FIRST_NAMES = ['Aarav', 'Aditi', 'Rohan', 'Priya', 'Vikram', 'Sneha', 'Rahul', 'Ananya', 'José', 'Zoë', 'Mary Ann',
+               'Venkatasubramanian Ramakrishnan', "D'Souza", 'Ngozi', 'Li', 'O']
+
+
+def make_names(n, seed):
+    # Common first names, which repeat, and made-up ones, which mostly don't
+    random.seed(seed)
+
+    return [random.choice(FIRST_NAMES) if random.random() < 0.7 else
+            ''.join(random.choices(string.ascii_letters, k=random.randint(2, 25))) for i in range(n)]
+
+
+# The row by row encoding, as it was in pages/05_🚻Get Gender.py
+def set_flag(i, len_vocab):
+    aux = np.zeros(len_vocab)
+    aux[i] = 1
+    return list(aux)
+
+
+def prepare_encod_names_legacy(X, char_index):
+    vec_names = []
+    trunc_name = [str(i)[0:MAX_LENGTH] for i in X]
+    for i in trunc_name:
+        tmp = [set_flag(char_index.get(j, char_index[" "]), len(char_index)) for j in str(i)]
+        for k in range(0, MAX_LENGTH - len(str(i))):
+            tmp.append(set_flag(char_index["END"], len(char_index)))
+        vec_names.append(tmp)
+    return vec_names
+
+
+def predict_gender_legacy(model, name, char_index):
+    name = prepare_encod_names_legacy([normalise_name(name)], char_index)
+    resu = (model.predict(name, verbose=0) > 0.5).astype("int32")
+    return 'Male' if int(resu) == 1 else 'Female'
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description='Check the encoding of names for the gender model against the row '
+                                                 'by row implementation, and time both')
+    parser.add_argument('--names', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--model', action='store_true',
+                        help='Also time predictions with Models/model.h5, one name at a time for --sample names')
+    parser.add_argument('--sample', type=int, default=200)
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_arguments()
+
+    with open(os.path.join(ROOT, 'Models', 'char_index.pickle'), 'rb') as file:
+        char_index = pickle.load(file)
+
+    names = [normalise_name(x) for x in make_names(args.names, args.seed)]
+
+    print(f'{len(names)} names')
+
+    start = time.perf_counter()
+    legacy = np.array(prepare_encod_names_legacy(names, char_index))
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encoded = encode_names(names, char_index)
+    encoded_time = time.perf_counter() - start
+
+    print(f'  row by row encoding: {legacy_time:8.3f}s')
+    print(f'  vectorised encoding: {encoded_time:8.3f}s ({legacy_time / encoded_time:.1f}x)')
+
+    same = legacy.shape == encoded.shape and bool((legacy == encoded).all())
+    print(f'  same encoding: {same}')
+
+    if args.model:
+        from tensorflow import keras
+        from sklearn.metrics import f1_score
+
+        model = keras.models.load_model(os.path.join(ROOT, 'Models', 'model.h5'),
+                                        custom_objects={'f1_score': f1_score})
+
+        sample = names[:args.sample]
+
+        start = time.perf_counter()
+        legacy_genders = [predict_gender_legacy(model, x, char_index) for x in sample]
+        legacy_time = (time.perf_counter() - start) / len(sample)
+
+        start = time.perf_counter()
+        genders = predict_genders(model, names, char_index)
+        batched_time = time.perf_counter() - start
+
+        print(f'  one name at a time: {legacy_time * len(names):8.1f}s (estimated from {len(sample)} names)')
+        print(f'  in chunks:          {batched_time:8.1f}s')
+
+        same_genders = legacy_genders == list(genders[:len(sample)])
+        print(f'  same predictions: {same_genders}')
+        same = same and same_genders
+
+    sys.exit(0 if same else 1)
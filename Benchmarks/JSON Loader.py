@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+import random
+import argparse
+import pandas as pd
+
+# Run from anywhere, e.g. python "Benchmarks/JSON Loader.py"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Helpers.sky_pages import pages_to_table
+
+CATEGORIES = ['Verified Email', 'Verified Phone', 'Sync source', 'Verified Location']
+
+
+def make_pages(pages, page_size, seed):
+    # Pages shaped like /constituents/customfields, with nested and missing fields
+    random.seed(seed)
+
+    result = []
+    for i in range(pages):
+        value = []
+        for j in range(page_size):
+            record = {
+                'id': str(i * page_size + j),
+                'parent_id': str(random.randint(1, 100000)),
+                'category': random.choice(CATEGORIES),
+                'value': f'Alumni_Portal - Auto | {random.choice(["Email", "Phone", "Address"])}',
+                'date_added': '2024-01-%02dT10:00:00+05:30' % random.randint(1, 28),
+                'type': 'Text',
+                'date': {'d': random.randint(1, 28), 'm': random.randint(1, 12), 'y': 2024}
+            }
+
+            if random.random() < 0.7:
+                record['comment'] = f'user{j}@gmail.com'
+
+            if random.random() < 0.05:
+                record['tags'] = ['a', 'b']
+
+            value.append(record)
+
+        result.append({'count': pages * page_size, 'value': value})
+
+    return result
+
+
+def convert_to_strings(obj):
+    # As in Get Data for Dashboard.py before the column loader
+    if isinstance(obj, dict):
+        return {k: convert_to_strings(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [convert_to_strings(item) for item in obj]
+    else:
+        return str(obj)
+
+
+def load_legacy(pages):
+    # One DataFrame per page, concatenated onto the result each time
+    df = pd.DataFrame()
+
+    for page in pages:
+        df_ = pd.DataFrame(data=pd.json_normalize(convert_to_strings(page)['value']))
+        df = pd.concat([df, df_])
+
+    return df
+
+
+def load_columns(pages):
+    return pages_to_table(pages, stringify=True).to_pandas()
+
+
+def normalise(df):
+    # Same column order and null values, to compare the results
+    df = df.reset_index(drop=True)
+    df = df[sorted(df.columns)].astype(object)
+    df = df.map(lambda x: list(x) if hasattr(x, '__len__') and not isinstance(x, str) else x)
+
+    return df.where(df.notna(), None)
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description='Compare the column loader with pd.concat per page')
+    parser.add_argument('--pages', type=int, default=150)
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=42)
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_arguments()
+    pages = make_pages(args.pages, args.page_size, args.seed)
+
+    print(f'{args.pages} pages of {args.page_size} records')
+
+    start = time.perf_counter()
+    legacy = load_legacy(pages)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = load_columns(pages)
+    columns_time = time.perf_counter() - start
+
+    print(f'  pd.concat per page: {legacy_time:8.3f}s')
+    print(f'  column loader:      {columns_time:8.3f}s ({legacy_time / columns_time:.1f}x)')
+    print(f'  same result: {normalise(legacy).equals(normalise(columns))}')
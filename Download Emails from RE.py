@@ -4,15 +4,23 @@ import json
 import glob
 import datetime
 import logging
+import argparse
 import msal
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 import base64
 
 from datetime import datetime
-from requests.adapters import HTTPAdapter
-from urllib3 import Retry
 from dotenv import load_dotenv
+from Helpers.sky_api import SkyApiClient, log_request_counts
+from Helpers.delta_sync import SyncState, merge_changes
+from Helpers.sky_pages import get_pages_parallel, pages_to_table, ParquetPageWriter
+from Helpers.email_domains import classify_emails
+
+# Columns of the emails in RE which are kept
+EMAIL_SCHEMA = pa.schema([('address', pa.string()), ('constituent_id', pa.string()), ('id', pa.string()),
+                          ('primary', pa.bool_()), ('type', pa.string()), ('inactive', pa.bool_())])
 
 def set_current_directory():
 
@@ -55,28 +63,16 @@ def set_api_request_strategy():
     
     logging.info('Setting API Request strategy')
     
-    global http
-    
-    # API Request strategy
-    logging.info('Setting API Request Strategy')
-    
-    retry_strategy = Retry(
-        total=3,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=['HEAD', 'GET', 'OPTIONS'],
-        backoff_factor=10
-    )
+    global sky_api
     
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    http = requests.Session()
-    http.mount('https://', adapter)
-    http.mount('http://', adapter)
+    # Shared SKY API client
+    sky_api = SkyApiClient(RE_API_KEY, pool_size=PAGE_WORKERS)
 
 def get_env_variables():
     
     logging.info('Setting Environment variables')
     
-    global RE_API_KEY, O_CLIENT_ID, CLIENT_SECRET, TENANT_ID, FROM, CC_TO, ERROR_EMAILS_TO, SEND_TO
+    global RE_API_KEY, O_CLIENT_ID, CLIENT_SECRET, TENANT_ID, FROM, CC_TO, ERROR_EMAILS_TO, SEND_TO, PAGE_WORKERS
 
     load_dotenv()
 
@@ -88,6 +84,7 @@ def get_env_variables():
     SEND_TO = eval(os.getenv('SEND_TO'))
     CC_TO = eval(os.getenv('CC_TO'))
     ERROR_EMAILS_TO = eval(os.getenv('ERROR_EMAILS_TO'))
+    PAGE_WORKERS = int(os.getenv('PAGE_WORKERS', 4)) # Pages downloaded at once
 
 def send_error_emails(subject):
     logging.info('Sending email for an error')
@@ -221,77 +218,72 @@ def get_recipients(email_list):
 
     return value
 
-def retrieve_token():
+def pages_to_df(pages):
     
-    global access_token
+    # Load the columns that are kept to pandas
+    df = pages_to_table(pages, schema=EMAIL_SCHEMA).to_pandas()
     
-    logging.info('Retrieve token for API connections')
-    
-    with open('access_token_output.json') as access_token_output:
-        data = json.load(access_token_output)
-        access_token = data['access_token']
+    # e.g. no emails changed since the last run
+    if df.empty:
+        return df
 
-def pagination_api_request(url, params):
+    # Domain of each email and its category
+    df[['domain', 'domain_category']] = classify_emails(df['address'])
     
-    # Pagination request to retreive list
-    while url:
-        # Blackbaud API GET request
-        get_request_re(url, params)
+    return df
 
-        # Incremental File name
-        i = 1
-        while os.path.exists(f'API_Response_RE_{process_name}_{i}.json'):
-            i += 1
-            
-        with open(f'API_Response_RE_{process_name}_{i}.json', 'w') as list_output:
-            json.dump(re_api_response, list_output,ensure_ascii=False, sort_keys=True, indent=4)
+def load_to_parquet(url, params):
+    
+    logging.info('Loading to Parquet file')
+    
+    pages = get_pages_parallel(sky_api, url, params, workers=PAGE_WORKERS)
+    
+    if DELTA:
+        # Changes are few, so they're collected in memory and merged into the earlier download
+        df = merge_changes('Databases/System Record IDs', pages_to_df(pages))
+        df.to_parquet('Databases/System Record IDs', index=False)
         
-        # Check if a variable is present in file
-        with open(f'API_Response_RE_{process_name}_{i}.json') as list_output_last:
-            
-            if 'next_link' in list_output_last.read():
-                url = re_api_response['next_link']
-                
-            else:
-                break
+    else:
+        # Streamed to the file a page at a time
+        with ParquetPageWriter('Databases/System Record IDs') as writer:
+            for page in pages:
+                writer.write(pages_to_df([page]))
 
-def load_from_json_to_parquet():
+def get_arguments():
     
-    logging.info('Loading from JSON to Parquet file')
-
-    global email_providers
+    global DELTA
     
-    # Get a list of all the file paths that ends with wildcard from in specified directory
-    fileList = glob.glob('API_Response_RE_*.json')
-
-    df = pd.DataFrame()
+    parser = argparse.ArgumentParser(description='Download the emails of all constituents from Raisers Edge')
+    parser.add_argument('--delta', action='store_true',
+                        help='Only download the emails changed since the last run, and merge them by id')
+    
+    DELTA = parser.parse_args().delta
 
-    for each_file in fileList:
+def get_emails():
+    
+    global DELTA
+    
+    sync_state = SyncState()
+    
+    # Taken before the download, so that changes made while it runs are downloaded by the next one
+    mark = sync_state.new_mark()
+    last_mark = sync_state.get('emailaddresses')
+    
+    url = 'https://api.sky.blackbaud.com/constituent/v1/emailaddresses?limit=5000'
+    params = {}
+    
+    if DELTA and last_mark:
+        logging.info(f'Downloading emails changed since {last_mark}')
+        url = f'{url}&last_modified={last_mark}'
         
-        # Open Each JSON File
-        with open(each_file, 'r') as json_file:
-            
-            # Load JSON File
-            json_content = json.load(json_file)
-            
-            # Load from JSON to pandas
-            reff = pd.json_normalize(json_content['value'])
-            
-            # Load to a dataframe
-            df_ = pd.DataFrame(data=reff)
-
-            # Append/Concat dataframes
-            df = pd.concat([df, df_])
-
-    email_providers = pd.read_csv('Databases/Email Providers.csv')
-    email_providers = email_providers['email_providers'].drop_duplicates().tolist()
-                
-    # export from dataframe to parquet
-    df = df[['address', 'constituent_id', 'id', 'primary', 'type', 'inactive']].copy()
-
-    df[['domain', 'domain_category']] = df[['address', 'address']].apply(lambda x: get_domain(*x), result_type='expand', axis=1)
-
-    df.to_parquet('Databases/System Record IDs', index=False)
+    elif DELTA:
+        logging.info('No earlier download to update or due a full download, downloading all emails')
+        DELTA = False
+    
+    # Download to the parquet file
+    load_to_parquet(url=url, params=params)
+    
+    sync_state.save('emailaddresses', mark, full=not DELTA)
 
 def get_request_re(url, params):
     
@@ -299,26 +291,7 @@ def get_request_re(url, params):
     
     logging.info('Running GET Request from RE function')
     
-    # Request Headers for Blackbaud API request
-    headers = {
-    # Request headers
-    'Bb-Api-Subscription-Key': RE_API_KEY,
-    'Authorization': 'Bearer ' + access_token,
-    }
-    
-    re_api_response = http.get(url, params=params, headers=headers).json()
-
-def get_domain(email, email1):
-
-    if '@' in email:
-        domain = email.split('@')[1].lower()
-
-        if domain == 'gmail.com': return domain, '1 - Gmail'
-        elif domain == 'iitbombay.org': return domain, '4 - IITBOMBAY.ORG'
-        elif domain in email_providers: return domain, '2 - Others'
-        else: return domain, '3 - Business'
-
-    else: return np.NaN, np.NaN
+    re_api_response = sky_api.get(url, params)
 
 try:
     
@@ -331,22 +304,17 @@ try:
     # Retrieve contents from .env file
     get_env_variables()
     
+    # Read command-line arguments
+    get_arguments()
+    
     # Housekeeping
     housekeeping()
     
     # Set API Request strategy
     set_api_request_strategy()
     
-    # Retrieve access_token from file
-    retrieve_token()
-    
     # Get List of Alums with Email
-    url = 'https://api.sky.blackbaud.com/constituent/v1/emailaddresses?limit=5000'
-    params = {}
-    pagination_api_request(url=url, params=params)
-    
-    # Load from JSON
-    load_from_json_to_parquet()
+    get_emails()
     
 except Exception as Argument:
     
@@ -359,6 +327,9 @@ finally:
     # Housekeeping
     housekeeping()
     
+    # Log SKY API usage
+    log_request_counts()
+    
     # Stop Logging
     stop_logging()
         
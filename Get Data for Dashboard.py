@@ -1,18 +1,25 @@
 import requests
 import os
 import json
-import glob
 import datetime
 import logging
+import argparse
 import base64
 import msal
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
 
 from datetime import datetime
-from requests.adapters import HTTPAdapter
-from urllib3 import Retry
 from dotenv import load_dotenv
+from Helpers.sky_api import SkyApiClient, log_request_counts
+from Helpers.delta_sync import SyncState, merge_changes
+from Helpers.sky_pages import get_pages_parallel, pages_to_table, ParquetPageWriter
+from Helpers.custom_fields import pre_process, DERIVED_COLUMNS
+from Helpers.task_graph import TaskGraph
+from Helpers.kpi_cube import build_kpi_cube, DIMENSIONS as KPI_DIMENSIONS
+
+CUSTOM_FIELD_CATEGORIES = ['Verified Email', 'Verified Phone', 'Sync source', 'Verified Location']
 
 def set_current_directory():
     
@@ -34,44 +41,20 @@ def stop_logging():
     
     logging.info('Stopping the Script')
 
-def housekeeping():
-    
-    logging.info('Doing Housekeeping')
-    
-    # Housekeeping
-    multiple_files = glob.glob('*_RE_*.json')
-
-    # Iterate over the list of filepaths & remove each file.
-    logging.info('Removing old JSON files')
-    for each_file in multiple_files:
-        try:
-            os.remove(each_file)
-        except:
-            pass
-
 def set_api_request_strategy():
     
     logging.info('Setting API Request strategy')
     
-    global http
+    global sky_api
 
-    retry_strategy = Retry(
-        total=3,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=['HEAD', 'GET', 'OPTIONS'],
-        backoff_factor=10
-    )
-    
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    http = requests.Session()
-    http.mount('https://', adapter)
-    http.mount('http://', adapter)
+    # Shared SKY API client
+    sky_api = SkyApiClient(RE_API_KEY, pool_size=PAGE_WORKERS * DOWNLOAD_WORKERS)
 
 def get_env_variables():
     
     logging.info('Setting Environment variables')
     
-    global RE_API_KEY, O_CLIENT_ID, CLIENT_SECRET, TENANT_ID, FROM, CC_TO, ERROR_EMAILS_TO, SEND_TO, LIST_1
+    global RE_API_KEY, O_CLIENT_ID, CLIENT_SECRET, TENANT_ID, FROM, CC_TO, ERROR_EMAILS_TO, SEND_TO, LIST_1, PAGE_WORKERS, DOWNLOAD_WORKERS
 
     load_dotenv()
 
@@ -84,6 +67,8 @@ def get_env_variables():
     CC_TO = eval(os.getenv('CC_TO'))
     ERROR_EMAILS_TO = eval(os.getenv('ERROR_EMAILS_TO'))
     LIST_1 = os.getenv('LIST_1') # Opt outs list
+    PAGE_WORKERS = int(os.getenv('PAGE_WORKERS', 4)) # Pages downloaded at once
+    DOWNLOAD_WORKERS = int(os.getenv('DOWNLOAD_WORKERS', 4)) # Downloads run at once
 
 def get_recipients(email_list):
     value = []
@@ -231,32 +216,13 @@ def get_recipients(email_list):
 
     return value
 
-def retrieve_token():
-    
-    global access_token
-    
-    logging.info('Retrieve token for API connections')
-    
-    with open('access_token_output.json') as access_token_output:
-        data = json.load(access_token_output)
-        access_token = data['access_token']
-
 def get_request_re(url, params):
     
     logging.info('Running GET Request from RE function')
     
     global re_api_response
     
-    # Retrieve access_token from file
-    retrieve_token()
-    
-    # Request headers
-    headers = {
-    'Bb-Api-Subscription-Key': RE_API_KEY,
-    'Authorization': 'Bearer ' + access_token,
-    }
-    
-    re_api_response = http.get(url, params=params, headers=headers).json()
+    re_api_response = sky_api.get(url, params)
 
 def post_request_re(url, params):
     
@@ -264,17 +230,7 @@ def post_request_re(url, params):
     
     global re_api_response
     
-    # Retrieve access_token from file
-    retrieve_token()
-    
-    # Request headers
-    headers = {
-    'Bb-Api-Subscription-Key': RE_API_KEY,
-    'Authorization': 'Bearer ' + access_token,
-    'Content-Type': 'application/json',
-    }
-    
-    re_api_response = http.post(url, params=params, headers=headers, json=params).json()
+    re_api_response = sky_api.post(url, params)
 
 def patch_request_re(url, params):
     
@@ -282,17 +238,7 @@ def patch_request_re(url, params):
     
     global re_api_response
     
-    # Retrieve access_token from file
-    retrieve_token()
-    
-    # Request headers
-    headers = {
-    'Bb-Api-Subscription-Key': RE_API_KEY,
-    'Authorization': 'Bearer ' + access_token,
-    'Content-Type': 'application/json'
-    }
-    
-    re_api_response = http.patch(url, headers=headers, data=json.dumps(params))
+    re_api_response = sky_api.patch(url, params)
 
 def api_to_df(response):
     
@@ -312,322 +258,179 @@ def api_to_df(response):
     
     return df
 
-def pagination_api_request(url, params):
+def download_pages(urls, path):
     
-    # Pagination request to retreive list
-    while url:
-        # Blackbaud API GET request
-        get_request_re(url, params)
-        
-        # Incremental File name
-        i = 1
-        while os.path.exists(f'API_Response_RE_{process_name}_{i}.json'):
-            i += 1
-            
-        with open(f'API_Response_RE_{process_name}_{i}.json', 'w', encoding='utf-8') as list_output:
-            json.dump(re_api_response, list_output, ensure_ascii=True, sort_keys=True, indent=4)
-        
-        # Check if a variable is present in file
-        with open(f'API_Response_RE_{process_name}_{i}.json') as list_output_last:
-            
-            if 'next_link' in list_output_last.read():
-                url = re_api_response['next_link']
-                
-            else:
-                break
-
-def load_from_json_to_parquet():
+    logging.info(f'Downloading to {path}')
     
-    logging.info('Loading from JSON to Parquet file')
+    pages = (page for url in urls for page in get_pages_parallel(sky_api, url, {}, workers=PAGE_WORKERS))
     
-    # Get a list of all the file paths that ends with wildcard from in specified directory
-    fileList = glob.glob('API_Response_RE_*.json')
+    # Streamed to the file a page at a time, with every value as a string
+    with ParquetPageWriter(path) as writer:
+        for page in pages:
+            writer.write(pages_to_table([page], stringify=True))
+
+def publish(tmp_dir, downloads, path, delta=False, drop_columns=None):
     
-    df = pd.DataFrame()
+    # Downloads are written in the namespace of their task, and only replace the file in Databases once complete
+    tmp_path = os.path.join(tmp_dir, f'{os.path.basename(path)}.publish')
     
-    for each_file in fileList:
+    if delta:
+        # Changes are merged into the earlier download
+        changes = pd.concat([pd.read_parquet(download) for download in downloads], ignore_index=True)
         
-        # Open Each JSON File
-        with open(each_file, 'r', encoding='utf8') as json_file:
-            
-            # Load JSON File
-            json_content = json.load(json_file)
-            
-            # Convert non-string values to strings
-            json_content = convert_to_strings(json_content)
-            
-            # Load to a dataframe
-            df_ = api_to_df(json_content)
-            
-            df = pd.concat([df, df_])
+        df = merge_changes(path, changes, drop_columns=drop_columns)
+        df.to_parquet(tmp_path, index=False)
+        
+    elif len(downloads) > 1:
+        with ParquetPageWriter(tmp_path) as writer:
+            for download in downloads:
+                parquet = pq.ParquetFile(download)
+                
+                for i in range(parquet.num_row_groups):
+                    writer.write(parquet.read_row_group(i))
     
-    return df
-
-def convert_to_strings(obj):
-    """
-    Recursively convert non-string values to strings in a dictionary
-    """
-    if isinstance(obj, dict):
-        return {k: convert_to_strings(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_to_strings(item) for item in obj]
     else:
-        return str(obj)
-
-def get_custom_fields():
-
-    categories = ['Verified Email', 'Verified Phone', 'Sync source', 'Verified Location']
-
-    df = pd.DataFrame()
-
-    for category in categories:
-        url = f'https://api.sky.blackbaud.com/constituent/v1/constituents/customfields?limit=5000&category={category}'
-        params = {}
-    
-        pagination_api_request(url, params)
+        tmp_path = downloads[0]
     
-        # Load to Dataframe
-        df_1 = load_from_json_to_parquet().copy()
-        df = pd.concat([df, df_1])
+    os.replace(tmp_path, path)
 
-        # Housekeeping
-        housekeeping()
+def download_to_parquet(tmp_dir, urls, path, delta=False, drop_columns=None):
     
-    # export from dataframe to parquet
-    logging.info('Loading DataFrame to file')
-    df.to_parquet('Databases/Custom Fields', index=False)
-
-def data_pre_processing():
-
-    global email_providers
+    download = os.path.join(tmp_dir, os.path.basename(path))
     
-    data = pd.read_parquet('Databases/Custom Fields')
-
-    # Convert to Datetime format
-    data['date'] = data['date_added'].apply(lambda x: str(x).split('-')[2][0:2] + '-' + str(x).split('-')[1] + '-' + str(x).split('-')[0])
-    data['date'] = pd.to_datetime(data['date'], format='%d-%m-%Y', errors='coerce')
+    download_pages(urls, download)
     
-    # Adding verified sources
-    data['verified_source'] = data[['category', 'comment']].apply(lambda x: verified_sources(*x), axis=1)
+    publish(tmp_dir, [download], path, delta, drop_columns)
+
+def get_arguments():
     
-    # Adding sync sources
-    data[['sync_source', 'update_type']] = data[['value']].apply(lambda x: pd.Series(sync_source(x[0])), axis=1)
+    global DELTA
     
-    # Check if the value for Update Type = Email is infact an email
-    data['update_type'] = data[['update_type', 'comment']].apply(lambda x: check_if_email(*x), axis=1)
+    parser = argparse.ArgumentParser(description='Download data from Raisers Edge for the dashboard')
+    parser.add_argument('--delta', action='store_true',
+                        help='Only download the records changed since the last run, and merge them by id')
     
-    # Adding Type of Email
-    data['value'] = data['value'].fillna('')
-    data['email_type'] = data['value'].apply(lambda x: email_type(x))
+    DELTA = parser.parse_args().delta
+
+def get_last_mark(collection):
     
-    # Extracting domain of email address
-    data['email_domain'] = data['value'].apply(lambda x: extract_domain(x))
+    # In delta mode, when the collection was last downloaded, or None when it's due a full download. Checked once per
+    # collection and run, as a full download can fall due while the run goes on.
+    last_mark = sync_state.get(collection) if DELTA else None
     
-    # Checking if new record is an Alum
-    data['update_type'] = data[['update_type', 'comment']].apply(lambda x: identify_new_record(*x), axis=1)
+    if last_mark:
+        logging.info(f'Downloading {collection} changed since {last_mark}')
     
-    # Get city, state and country from the Address List
-    data['parent_id'] = data['parent_id'].astype(int)
+    return last_mark
+
+def get_delta_url(url, last_mark):
     
-    address_data = pd.read_parquet('Databases/Address List')
-    address_data['constituent_id'] = address_data['constituent_id'].astype(int)
+    # Only ask for the records changed since last_mark, if there's one
+    if last_mark:
+        return f'{url}&last_modified={last_mark}', True
     
-    data = pd.merge(left=data, right=address_data[['constituent_id', 'city', 'county', 'country']].drop_duplicates(), left_on='parent_id', right_on='constituent_id', how='left')
-    data = data.drop(columns=['constituent_id']).copy()
+    return url, False
 
-    data['verified_source_category'] = data['verified_source'].apply(lambda x: get_verified_category(x))
-
-    # Source: https://gist.githubusercontent.com/ammarshah/f5c2624d767f91a7cbdc4e54db8dd0bf/raw/660fd949eba09c0b86574d9d3aa0f2137161fc7c/all_email_provider_domains.txt
-    email_providers = pd.read_csv('Databases/Email Providers.csv')
-    email_providers = email_providers['email_providers'].tolist()
-    data['email_domain_category'] = data['email_domain'].apply(lambda x: set_domain_priority(x))
+def get_custom_fields(tmp_dir, category, last_mark):
     
-    # export from dataframe to parquet
-    data.to_parquet('Databases/Custom Fields', index=False)
-
-def set_domain_priority(domain):
-    if domain == 'gmail.com': return '1 - Gmail'
-    if domain == 'iitbombay.org': return '4 - IITBOMBAY.ORG'
-    if domain in email_providers: return '2 - Others'
-    if pd.isnull(domain): return np.NaN
-    else: return '3 - Business'
-
-# Function to get the category of the verified sources
-def get_verified_category(source):
-    if source == 'RE Email Engagement_Appeals' or source == 'RE Email Engagement' or source == 'Netcore Email Engagement': return '2 - Opens'
-    elif source == 'Live Alumni': return '3 - Live Alumni'
-    elif source == 'Alumni Association': return '4 - Alumni Association'
-    elif pd.isnull(source) or source == '': return np.NaN
-    else: return '1 - Alum'
-
-# Function to extract domain from email
-def extract_domain(email):
-
-    if '@' in email: return str(email.split('@')[1]).lower().strip()
-    else: return np.NaN
+    url, _ = get_delta_url(f'https://api.sky.blackbaud.com/constituent/v1/constituents/customfields?limit=5000&category={category}', last_mark)
+    
+    download_pages([url], os.path.join(tmp_dir, 'Custom Fields'))
 
-def email_type(email):
+def merge_custom_fields(tmp_dir, mark, last_mark):
     
-    if '@' in email and not 'https://' in email:
+    downloads = [os.path.join(graph.namespace(f'Custom Fields - {category}'), 'Custom Fields') for category in CUSTOM_FIELD_CATEGORIES]
     
-        iitb_emails = ['iitb.ac.in', 'sjmsom.in', 'iitbombay.org']
-        
-        if any(text in email for text in iitb_emails):
-            type = 'IITB Email'
-        
-        elif '@' in email:
-            type = 'Non-IITB Email'
-        
-        else:
-            type = np.NaN
+    # Changes are merged into the earlier download, leaving out the columns added by data_pre_processing(). Whether
+    # they're changes was decided before the downloads, with the same last_mark.
+    delta = last_mark is not None
     
-    else:
-        type = np.NaN
+    publish(tmp_dir, downloads, 'Databases/Custom Fields', delta, drop_columns=DERIVED_COLUMNS)
     
-    return type
+    sync_state.save('customfields', mark, full=not delta)
 
-def verified_sources(category, comment):
+def data_pre_processing(tmp_dir):
     
-    if 'verified' in str(category).lower():
-        
-        if comment == 'verified using RE appeal data':
-            output = 'RE Email Engagement - Open rate'
-        
-        try:
-            output = str(comment).split('-')[0].strip()
-        except:
-            output = str(comment).strip()
-            
-    else:
-        output = np.NaN
+    data = pd.read_parquet('Databases/Custom Fields')
+    address_data = pd.read_parquet('Databases/Address List', columns=['constituent_id', 'city', 'county', 'country'])
+    
+    data = pre_process(data, address_data)
     
-    return output
+    # export from dataframe to parquet
+    data.to_parquet(os.path.join(tmp_dir, 'Custom Fields'), index=False)
+    os.replace(os.path.join(tmp_dir, 'Custom Fields'), 'Databases/Custom Fields')
 
-def sync_source(source):
+def get_kpi_cube(tmp_dir):
+    logging.info('Building the KPI cube')
     
-    to_check = ['- manually |', '- manual |', '- auto |', '- automatically |']
+    custom_fields = pd.read_parquet('Databases/Custom Fields', columns=KPI_DIMENSIONS + ['parent_id'])
+    alums = pd.read_parquet('Databases/All Alums.parquet')
+    constituents = pd.read_parquet('Databases/All Constituents.parquet')
+    opt_outs = pd.read_parquet('Databases/Opt-outs.parquet')
     
-    if any(string in str(source).lower() for string in to_check):
-        try:
-            sync_source = str(source).split('-')[0].strip()
-        except:
-            sync_source = str(source).strip()
-        
-        try:
-            update_type = str(source).split('|')[1].strip().title() 
-        except:
-            update_type = str(source).strip().title()
+    # Daily counts for the KPI Tracker, so that it doesn't aggregate all of the custom fields on each interaction
+    cube, cube_constituents = build_kpi_cube(custom_fields, alums, constituents, opt_outs)
     
-    else:
-        sync_source = np.NaN
-        update_type = np.NaN
-    
-    if 'email' in str(update_type).lower():
-        update_type = 'Email'
-    elif 'phone' in str(update_type).lower():
-        update_type = 'Phone'
-    elif update_type == 'Linkedin':
-        update_type = 'Online Presence'
-    elif 'employment' in str(update_type).lower() or 'org' in str(update_type).lower():
-        update_type = 'Employment'
-    elif 'address' in str(update_type).lower() or 'location' in str(update_type).lower():
-        update_type = 'Location'
-    elif 'gender' in str(update_type).lower() or 'name' in str(update_type).lower() or 'pan' in str(update_type).lower() or 'bio' in str(update_type).lower():
-        update_type = 'Bio Details'
-    
-    return sync_source, update_type
-
-def check_if_email(type, email):
-
-    if email is None: return np.NaN
-    else:
-        if type == 'Email':
-
-            if 'https://' in email:
-                type = np.NaN
-
-            else:
-                if '@' in email:
-                    type = type
-
-                else:
-                    type = np.NaN
-
-        return type
-
-def identify_new_record(update_type, type):
+    logging.info(f'KPI cube has {len(cube)} rows and {len(cube_constituents)} constituents, from '
+                 f'{len(custom_fields)} custom fields')
     
-    if update_type == 'New Record':
-        
-        if 'alum' in str(type).lower():
-            update_type = 'New Alums'
-        
-        else:
-            update_type = update_type
-        
-    else:
-        update_type = update_type
-        
-    return update_type
+    # The constituents first, as the KPI Tracker reloads both when the cube changes
+    cube_constituents.to_parquet(os.path.join(tmp_dir, 'KPI Cube Constituents.parquet'), index=False)
+    os.replace(os.path.join(tmp_dir, 'KPI Cube Constituents.parquet'), 'Databases/KPI Cube Constituents.parquet')
+    
+    cube.to_parquet(os.path.join(tmp_dir, 'KPI Cube.parquet'), index=False)
+    os.replace(os.path.join(tmp_dir, 'KPI Cube.parquet'), 'Databases/KPI Cube.parquet')
 
-def get_addresses():
+def get_addresses(tmp_dir):
+    
+    mark = sync_state.new_mark()
     
-    url = 'https://api.sky.blackbaud.com/constituent/v1/addresses?limit=5000'
-    params = {}
+    url, delta = get_delta_url('https://api.sky.blackbaud.com/constituent/v1/addresses?limit=5000', get_last_mark('addresses'))
     
-    pagination_api_request(url, params)
+    # Merged before filtering, so that addresses which are no longer preferred are dropped
+    download_to_parquet(tmp_dir, [url], 'Databases/Address List', delta)
     
     # Load to Dataframe
-    df = load_from_json_to_parquet().copy()
+    df = pd.read_parquet('Databases/Address List')
     
     # Sort by preferred address
     df = df[df['preferred'] == True].copy()
     
     # export from dataframe to parquet
     logging.info('Loading Address DataFrame to file')
-    df.to_parquet('Databases/Address List', index=False)
+    df.to_parquet(os.path.join(tmp_dir, 'Preferred Addresses'), index=False)
+    os.replace(os.path.join(tmp_dir, 'Preferred Addresses'), 'Databases/Address List')
+    
+    sync_state.save('addresses', mark, full=not delta)
 
-def get_only_alums():
+def get_only_alums(tmp_dir):
     logging.info('Getting list of only Alums')
 
-    url = 'https://api.sky.blackbaud.com/constituent/v1/constituents?constituent_code=Alumni&include_inactive=true&include_deceased=true&fields=id,deceased,inactive&limit=5000'
-    params = {}
+    mark = sync_state.new_mark()
 
-    pagination_api_request(url, params)
+    url, delta = get_delta_url('https://api.sky.blackbaud.com/constituent/v1/constituents?constituent_code=Alumni&include_inactive=true&include_deceased=true&fields=id,deceased,inactive&limit=5000', get_last_mark('alums'))
 
-    # Load to Dataframe
-    df = load_from_json_to_parquet().copy()
+    download_to_parquet(tmp_dir, [url], 'Databases/All Alums.parquet', delta)
 
-    # export from dataframe to parquet
-    df.to_parquet('Databases/All Alums.parquet', index=False)
+    sync_state.save('alums', mark, full=not delta)
 
-def get_opt_outs():
+def get_opt_outs(tmp_dir):
     logging.info('Getting list of opt-outs')
 
     url = f'https://api.sky.blackbaud.com/constituent/v1/constituents?list_id={LIST_1}&limit=5000'
-    params = {}
-
-    pagination_api_request(url, params)
 
-    # Load to Dataframe
-    df = load_from_json_to_parquet().copy()
-
-    # export from dataframe to parquet
-    df.to_parquet('Databases/Opt-outs.parquet', index=False)
+    download_to_parquet(tmp_dir, [url], 'Databases/Opt-outs.parquet')
 
-def get_constituents():
+def get_constituents(tmp_dir):
     logging.info('Getting list of all constituents')
 
-    url = 'https://api.sky.blackbaud.com/constituent/v1/constituents?include_inactive=true&include_deceased=true&fields=id,deceased,inactive&limit=5000'
-    params = {}
+    mark = sync_state.new_mark()
 
-    pagination_api_request(url, params)
+    url, delta = get_delta_url('https://api.sky.blackbaud.com/constituent/v1/constituents?include_inactive=true&include_deceased=true&fields=id,deceased,inactive&limit=5000', get_last_mark('constituents'))
 
-    # Load to Dataframe
-    df = load_from_json_to_parquet().copy()
+    download_to_parquet(tmp_dir, [url], 'Databases/All Constituents.parquet', delta)
 
-    # export from dataframe to parquet
-    df.to_parquet('Databases/All Constituents.parquet', index=False)
+    sync_state.save('constituents', mark, full=not delta)
 
 try:
     
@@ -640,32 +443,49 @@ try:
     # Retrieve contents from .env file
     get_env_variables()
     
-    # Housekeeping
-    housekeeping()
+    # Read command-line arguments
+    get_arguments()
+    
+    # High-water marks of the downloads
+    sync_state = SyncState()
     
     # Set API Request strategy
     set_api_request_strategy()
     
-    # Get Custom fields data of all constituent
-    get_custom_fields()
-
-    # Housekeeping
-    housekeeping()
-
+    # Downloads which don't depend on each other run at once
+    graph = TaskGraph('Databases/Downloads', workers=DOWNLOAD_WORKERS)
+    
+    # Taken before the downloads, so that changes made while they run are downloaded by the next one
+    custom_fields_mark = sync_state.new_mark()
+    
+    # Whether the custom fields are downloaded as changes, decided once for all of the categories and the merge
+    custom_fields_last_mark = get_last_mark('customfields')
+    
+    # Get Custom fields data of all constituent, a category at a time
+    for category in CUSTOM_FIELD_CATEGORIES:
+        graph.add(f'Custom Fields - {category}', get_custom_fields, category, custom_fields_last_mark)
+    
+    graph.add('Custom Fields', merge_custom_fields, custom_fields_mark, custom_fields_last_mark, depends_on=[f'Custom Fields - {category}' for category in CUSTOM_FIELD_CATEGORIES])
+    
     # Get Address data of all constituent
-    get_addresses()
-
+    graph.add('Address List', get_addresses)
+    
     # Data Pre-processing
-    data_pre_processing()
-
+    graph.add('Data Pre-processing', data_pre_processing, depends_on=['Custom Fields', 'Address List'])
+    
     # Get list of Alum
-    get_only_alums()
-
+    graph.add('All Alums', get_only_alums)
+    
     # Get Opt-outs
-    get_opt_outs()
-
+    graph.add('Opt-outs', get_opt_outs)
+    
     # Get list of all constituents
-    get_constituents()
+    graph.add('All Constituents', get_constituents)
+    
+    # Aggregates for the KPI Tracker
+    graph.add('KPI Cube', get_kpi_cube, depends_on=['Data Pre-processing', 'All Alums', 'Opt-outs', 'All Constituents'])
+    
+    graph.run()
 
 except Exception as Argument:
     
@@ -675,8 +495,8 @@ except Exception as Argument:
 
 finally:
     
-    # Housekeeping
-    housekeeping()
+    # Log SKY API usage
+    log_request_counts()
     
     # Stop Logging
     stop_logging()
@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+
+from Helpers.email_domains import get_domains, classify_domains
+
+# Columns which pre_process() adds to the custom fields
+DERIVED_COLUMNS = ['verified_source', 'sync_source', 'update_type', 'email_type', 'email_domain', 'city', 'county',
+                   'country', 'verified_source_category', 'email_domain_category']
+
+# Values of the sync source custom fields look like 'Alumni_Portal - Auto | Email'
+SYNC_MARKERS = ['- manually |', '- manual |', '- auto |', '- automatically |']
+
+IITB_EMAIL_DOMAINS = ['iitb.ac.in', 'sjmsom.in', 'iitbombay.org']
+
+VERIFIED_CATEGORIES = {
+    'RE Email Engagement_Appeals': '2 - Opens',
+    'RE Email Engagement': '2 - Opens',
+    'Netcore Email Engagement': '2 - Opens',
+    'Live Alumni': '3 - Live Alumni',
+    'Alumni Association': '4 - Alumni Association'
+}
+
+ALUM = '1 - Alum'
+
+
+def to_strings(values):
+    # str() of each value, with nulls as 'None' as they are read from parquet
+    return values.astype(object).where(values.notna(), 'None').astype(str)
+
+
+def contains_any(strings, texts):
+    # Whether each string contains any of the texts, without regular expressions
+    mask = pd.Series(False, index=strings.index)
+
+    for text in texts:
+        mask |= strings.str.contains(text, regex=False)
+
+    return mask
+
+
+def on_unique(strings, func):
+    # func() of a column with few distinct values, e.g. the sync sources, worked out once per distinct value
+    codes, uniques = pd.factorize(strings)
+    result = func(pd.Series(uniques, dtype=object))
+
+    return result.take(codes).set_axis(strings.index)
+
+
+def get_dates(date_added):
+    # e.g. '2024-01-05T10:00:00+05:30' -> 2024-01-05
+    parts = to_strings(date_added).str.split('-', n=3)
+    dates = parts.str[2].str[0:2] + '-' + parts.str[1] + '-' + parts.str[0]
+
+    return pd.to_datetime(dates, format='%d-%m-%Y', errors='coerce')
+
+
+def get_verified_sources(categories, comments):
+    # Comments of the verified categories are like 'Live Alumni - Verified on 01-01-2024'
+    is_verified = to_strings(categories).str.lower().str.contains('verified', regex=False)
+
+    sources = pd.Series(np.nan, index=comments.index, dtype=object)
+    sources[is_verified] = to_strings(comments[is_verified]).str.split('-', n=1).str[0].str.strip()
+
+    return sources
+
+
+def get_update_types(update_types):
+    # Update types grouped by the words in them. Assigned in reverse, so the first rule which matches wins.
+    lowered = update_types.astype(str).str.lower()
+
+    rules = [
+        (contains_any(lowered, ['email']), 'Email'),
+        (contains_any(lowered, ['phone']), 'Phone'),
+        (update_types == 'Linkedin', 'Online Presence'),
+        (contains_any(lowered, ['employment', 'org']), 'Employment'),
+        (contains_any(lowered, ['address', 'location']), 'Location'),
+        (contains_any(lowered, ['gender', 'name', 'pan', 'bio']), 'Bio Details')
+    ]
+
+    update_types = update_types.copy()
+    for mask, update_type in reversed(rules):
+        update_types[mask] = update_type
+
+    return update_types
+
+
+def get_sync_sources(values):
+    """
+    Source and type of update of each sync source custom field, e.g. 'Alumni_Portal - Auto | Email' ->
+    ('Alumni_Portal', 'Email'). NaN for other values.
+    """
+
+    def sync_sources(values):
+        is_sync = contains_any(values.str.lower(), SYNC_MARKERS)
+
+        sources = values.str.split('-', n=1).str[0].str.strip().where(is_sync, np.nan)
+        update_types = values.str.split('|', n=2).str[1].str.strip().str.title().where(is_sync, np.nan)
+
+        return pd.DataFrame({'sync_source': sources, 'update_type': get_update_types(update_types)})
+
+    return on_unique(to_strings(values), sync_sources)
+
+
+def check_emails(update_types, comments):
+    # Email updates whose comment isn't an email are left without an update type, as are rows without a comment
+    is_null = comments.isna()
+    comments = comments.fillna('').astype(str)
+
+    not_email = comments.str.contains('https://', regex=False) | ~comments.str.contains('@', regex=False)
+
+    return update_types.where(~(is_null | ((update_types == 'Email') & not_email)), np.nan)
+
+
+def get_email_types(values):
+    # IITB Email, Non-IITB Email, or NaN for values which aren't emails
+    is_email = values.str.contains('@', regex=False) & ~values.str.contains('https://', regex=False)
+
+    email_types = pd.Series(np.nan, index=values.index, dtype=object)
+    email_types[is_email] = 'Non-IITB Email'
+    email_types[is_email & contains_any(values, IITB_EMAIL_DOMAINS)] = 'IITB Email'
+
+    return email_types
+
+
+def identify_new_records(update_types, comments):
+    # New records which are alums
+    is_alum = to_strings(comments).str.lower().str.contains('alum', regex=False)
+
+    return update_types.mask((update_types == 'New Record') & is_alum, 'New Alums')
+
+
+def get_verified_categories(sources):
+    # Opens, Live Alumni, Alumni Association, or verified by the alum for any other source
+    categories = sources.map(VERIFIED_CATEGORIES).astype(object)
+    categories[categories.isna()] = ALUM
+
+    return categories.where(sources.notna() & (sources != ''), np.nan)
+
+
+def pre_process(data, address_data):
+    """
+    Custom fields with the columns the dashboard needs: the date, verified and sync sources, type of update, type
+    and domain of emails, and the city, county and country from ``address_data``.
+
+    Each column is worked out for the whole frame at once, rather than row by row.
+    """
+
+    data = data.copy()
+
+    # Convert to Datetime format
+    data['date'] = get_dates(data['date_added'])
+
+    # Adding verified sources
+    data['verified_source'] = get_verified_sources(data['category'], data['comment'])
+
+    # Adding sync sources
+    data[['sync_source', 'update_type']] = get_sync_sources(data['value'])
+
+    # Check if the value for Update Type = Email is infact an email
+    data['update_type'] = check_emails(data['update_type'], data['comment'])
+
+    # Adding Type of Email
+    data['value'] = data['value'].fillna('')
+    data['email_type'] = get_email_types(data['value'])
+
+    # Extracting domain of email address
+    data['email_domain'] = get_domains(data['value'])
+
+    # Checking if new record is an Alum
+    data['update_type'] = identify_new_records(data['update_type'], data['comment'])
+
+    # Get city, state and country from the Address List
+    data['parent_id'] = data['parent_id'].astype(int)
+
+    address_data = address_data[['constituent_id', 'city', 'county', 'country']].copy()
+    address_data['constituent_id'] = address_data['constituent_id'].astype(int)
+
+    data = pd.merge(left=data, right=address_data.drop_duplicates(), left_on='parent_id', right_on='constituent_id',
+                    how='left')
+    data = data.drop(columns=['constituent_id']).copy()
+
+    data['verified_source_category'] = get_verified_categories(data['verified_source'])
+
+    # Gmail, other email providers, IITBOMBAY.ORG or Business
+    data['email_domain_category'] = classify_domains(data['email_domain'])
+
+    return data
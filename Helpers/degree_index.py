@@ -0,0 +1,60 @@
+import os
+import re
+import time
+import logging
+import threading
+import pandas as pd
+
+
+def normalise_degree(value):
+    # e.g. ' B.Tech ' and 'b.tech' are the same degree
+    return re.sub(r'\s+', ' ', str(value)).strip().casefold()
+
+
+class DegreeIndex:
+    """
+    In-memory lookup of the RE degree for a degree in the form, from ``Databases/Degrees``.
+
+    The file is read on the first lookup and read again only when its mtime changes, which is checked at most
+    once every ``check_interval`` seconds. Lookups raise ``KeyError`` for degrees which aren't mapped.
+    """
+
+    def __init__(self, path='Databases/Degrees', check_interval=60):
+        self.path = path
+        self.check_interval = check_interval
+        self.degrees = None
+        self.mtime = None
+        self.last_check = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        mtime = os.stat(self.path).st_mtime_ns
+
+        if mtime != self.mtime:
+            logging.info('Loading the mapping of degrees')
+
+            degree_df = pd.read_parquet(self.path)
+
+            # The RE degree is in the column after 'Form Degrees'; the first mapping of a degree wins
+            degrees = {}
+            for form_degree, re_degree in zip(degree_df['Form Degrees'], degree_df.iloc[:, 1]):
+                degrees.setdefault(normalise_degree(form_degree), re_degree)
+
+            self.degrees = degrees
+            self.mtime = mtime
+
+    def get_degrees(self):
+        with self.lock:
+            now = time.monotonic()
+
+            if self.degrees is None or now - self.last_check >= self.check_interval:
+                self.load()
+                self.last_check = now
+
+            return self.degrees
+
+    def __getitem__(self, degree):
+        return self.get_degrees()[normalise_degree(degree)]
+
+    def __contains__(self, degree):
+        return normalise_degree(degree) in self.get_degrees()
@@ -0,0 +1,93 @@
+import os
+import json
+import logging
+import threading
+import pandas as pd
+
+from datetime import datetime, timedelta, timezone
+
+# Records changed while a download runs are downloaded again by the next one
+OVERLAP = timedelta(minutes=15)
+
+# Records deleted in RE aren't in a delta download, so each collection is downloaded in full again after this long
+FULL_DOWNLOAD_INTERVAL = timedelta(days=7)
+
+MARK_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+class SyncState:
+    """
+    High-water marks of the bulk RE downloads, i.e. when each collection was last downloaded, kept in a JSON file.
+
+    A mark is only saved once its download is merged, so a failed run is picked up again by the next one.
+
+    Merging changes by id never removes the records deleted in RE, so a collection whose last full download is older
+    than ``FULL_DOWNLOAD_INTERVAL`` has no mark, and is downloaded in full and replaced instead.
+    """
+
+    def __init__(self, path='Databases/Sync State.json'):
+        self.path = path
+        self.lock = threading.Lock()
+
+        try:
+            with open(path, encoding='utf-8') as state:
+                self.marks = json.load(state)
+        except FileNotFoundError:
+            self.marks = {}
+
+    def get(self, collection):
+        # When the collection was last downloaded, or None when it's due a full download
+        full_mark = self.marks.get(f'{collection} (full)')
+
+        if full_mark is None or datetime.strptime(full_mark, MARK_FORMAT).replace(tzinfo=timezone.utc) < \
+                datetime.now(timezone.utc) - FULL_DOWNLOAD_INTERVAL:
+            return None
+
+        return self.marks.get(collection)
+
+    @staticmethod
+    def new_mark():
+        # Taken before the download starts, in the format the SKY API expects for last_modified
+        return (datetime.now(timezone.utc) - OVERLAP).strftime(MARK_FORMAT)
+
+    def save(self, collection, mark, full=False):
+        # full when the whole collection was downloaded, rather than the changes since the last mark
+        with self.lock:
+            self.marks[collection] = mark
+
+            if full:
+                self.marks[f'{collection} (full)'] = mark
+
+            with open(f'{self.path}.tmp', 'w', encoding='utf-8') as state:
+                json.dump(self.marks, state, indent=4)
+
+            os.replace(f'{self.path}.tmp', self.path)
+
+
+def merge_changes(path, changes, key='id', drop_columns=None):
+    """
+    Existing rows of the parquet file at ``path`` with ``changes`` merged in by ``key``, changed rows replacing the
+    old ones. ``drop_columns`` are left out of the existing rows, e.g. columns which are derived after the merge.
+
+    Rows deleted in RE stay until the next full download, see ``SyncState``.
+    """
+
+    try:
+        existing = pd.read_parquet(path)
+    except FileNotFoundError:
+        existing = pd.DataFrame()
+
+    if drop_columns:
+        existing = existing.drop(columns=drop_columns, errors='ignore')
+
+    logging.info(f'Merging {len(changes)} changed rows into {len(existing)} rows of {path}')
+
+    if changes.empty:
+        return existing
+
+    if existing.empty:
+        return changes.reset_index(drop=True)
+
+    existing = existing[~existing[key].astype(str).isin(changes[key].astype(str))]
+
+    return pd.concat([existing, changes], ignore_index=True)
@@ -0,0 +1,54 @@
+import os
+import functools
+import numpy as np
+import pandas as pd
+
+# Source: https://gist.githubusercontent.com/ammarshah/f5c2624d767f91a7cbdc4e54db8dd0bf/raw/660fd949eba09c0b86574d9d3aa0f2137161fc7c/all_email_provider_domains.txt
+EMAIL_PROVIDERS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Databases',
+                                    'Email Providers.csv')
+
+# Domains with a category of their own
+DOMAIN_CATEGORIES = {
+    'gmail.com': '1 - Gmail',
+    'iitbombay.org': '4 - IITBOMBAY.ORG'
+}
+
+OTHER_PROVIDERS = '2 - Others'
+BUSINESS = '3 - Business'
+
+
+@functools.lru_cache(maxsize=None)
+def load_email_providers(path=EMAIL_PROVIDERS_FILE):
+    # Domains of public email providers, read once per process
+    providers = pd.read_csv(path)['email_providers'].dropna()
+    return frozenset(providers.astype(str).str.strip().str.lower())
+
+
+def get_domains(emails):
+    """
+    Lower-cased domain of each email in a Series, e.g. 'A@Gmail.com ' -> 'gmail.com'. NaN for values which
+    aren't emails.
+    """
+
+    emails = emails.astype(object).where(emails.notna(), '').astype(str)
+    domains = emails.str.split('@', n=2).str[1].str.lower().str.strip()
+
+    return domains.where(emails.str.contains('@', regex=False), np.nan)
+
+
+def classify_domains(domains):
+    # Category of each domain in a Series: Gmail, other email providers, IITBOMBAY.ORG or Business
+    categories = pd.Series(BUSINESS, index=domains.index, dtype=object)
+    categories[domains.isin(load_email_providers())] = OTHER_PROVIDERS
+
+    for domain, category in DOMAIN_CATEGORIES.items():
+        categories[domains == domain] = category
+
+    return categories.where(domains.notna(), np.nan)
+
+
+def classify_emails(emails):
+    # Domain and its category for a whole column of emails at once
+    domains = get_domains(emails)
+
+    return pd.DataFrame({'domain': domains, 'domain_category': classify_domains(domains)}, index=emails.index)
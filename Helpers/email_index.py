@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+# Sorts after any other character, so prefix + PREFIX_END is after every string which starts with prefix
+PREFIX_END = '\U0010ffff'
+
+
+def normalise_emails(emails):
+    # Emails as they're compared, e.g. ' John@Gmail.com' -> 'john@gmail.com'
+    return emails.astype(object).where(emails.notna(), None).str.strip().str.lower()
+
+
+def normalise_email(email):
+    return str(email).strip().lower()
+
+
+class EmailIndex:
+    """
+    Constituent ids by email address, to look up as someone types: a dict of the addresses for exact matches,
+    and the same addresses in a sorted array for prefix matches. Addresses are compared stripped and lower-cased,
+    and never as regular expressions.
+    """
+
+    def __init__(self, addresses, constituent_ids):
+        frame = pd.DataFrame({
+            'address': normalise_emails(pd.Series(addresses)).to_numpy(),
+            'constituent_id': pd.Series(constituent_ids).to_numpy()
+        }).dropna().drop_duplicates().sort_values(['address', 'constituent_id'])
+
+        self.addresses = frame['address'].to_numpy(dtype=object)
+        self.constituent_ids = frame['constituent_id'].to_numpy()
+
+        # Where the rows of each address start and end in the sorted arrays
+        starts = np.flatnonzero(np.r_[True, self.addresses[1:] != self.addresses[:-1]]) if len(frame) else \
+            np.array([], dtype=int)
+        ends = np.r_[starts[1:], len(frame)].astype(int)
+
+        self.exact = dict(zip(self.addresses[starts], zip(starts.tolist(), ends.tolist())))
+
+    def __len__(self):
+        return len(self.exact)
+
+    def get(self, email):
+        # Constituent ids with exactly this email address
+        start, end = self.exact.get(normalise_email(email), (0, 0))
+
+        return self.constituent_ids[start:end].tolist()
+
+    def find_prefix(self, prefix):
+        # Rows of the sorted arrays whose address starts with prefix, by binary search
+        prefix = normalise_email(prefix)
+
+        start = int(self.addresses.searchsorted(prefix, side='left'))
+        end = int(self.addresses.searchsorted(prefix + PREFIX_END, side='left'))
+
+        return start, end
+
+    def search(self, prefix, limit=None):
+        # Addresses which start with prefix, and their constituent ids, in order of the address
+        start, end = self.find_prefix(prefix)
+
+        if limit is not None:
+            end = min(end, start + limit)
+
+        return pd.DataFrame({'address': self.addresses[start:end], 'constituent_id': self.constituent_ids[start:end]})
+
+    def search_ids(self, prefix):
+        # Constituent ids of the addresses which start with prefix
+        start, end = self.find_prefix(prefix)
+
+        return pd.unique(self.constituent_ids[start:end]).tolist()
+
+    def count(self, prefix):
+        # Number of addresses, with their constituent ids, which start with prefix
+        start, end = self.find_prefix(prefix)
+
+        return end - start
+
+
+# Between the constituent ids of an email address which is on more than one record
+IDS_SEPARATOR = '; '
+
+# Columns which resolve_emails() adds to a file of emails
+RESOLVED_COLUMNS = ['constituent_id', 'constituent_ids', 'matches', 'is_ambiguous', 'is_primary', 'is_inactive']
+
+
+def get_email_matches(records):
+    """
+    Constituents of each email address in ``Databases/System Record IDs``, indexed by the address as it's compared:
+    their ids, how many there are, and whether the address is primary on any of them and inactive on all of them.
+
+    ``constituent_id`` is only set when the address is on a single record.
+    """
+
+    data = pd.DataFrame({
+        'address': normalise_emails(records['address']).to_numpy(),
+        'constituent_id': records['constituent_id'].astype(object).to_numpy(),
+        'primary': records['primary'].fillna(False).astype(bool).to_numpy(),
+        'inactive': records['inactive'].fillna(False).astype(bool).to_numpy()
+    }).dropna(subset=['address', 'constituent_id'])
+
+    # The same address can be on a record more than once
+    data = data.groupby(['address', 'constituent_id'], sort=True).agg(primary=('primary', 'any'),
+                                                                      inactive=('inactive', 'all')).reset_index()
+
+    if data.empty:
+        return pd.DataFrame(columns=RESOLVED_COLUMNS, index=pd.Index([], name='address'))
+
+    # Rows are sorted by address, so each address is a run of rows, and its ids are joined by adding up the run
+    addresses = data['address'].to_numpy(dtype=object)
+    starts = np.flatnonzero(np.r_[True, addresses[1:] != addresses[:-1]])
+
+    ids = (IDS_SEPARATOR + data['constituent_id'].astype(str)).to_numpy(dtype=object)
+
+    matches = pd.DataFrame({
+        'constituent_ids': [x[len(IDS_SEPARATOR):] for x in np.add.reduceat(ids, starts)],
+        'matches': np.diff(np.r_[starts, len(data)]),
+        'is_primary': np.logical_or.reduceat(data['primary'].to_numpy(), starts),
+        'is_inactive': np.logical_and.reduceat(data['inactive'].to_numpy(), starts)
+    }, index=pd.Index(addresses[starts], name='address'))
+    matches['is_ambiguous'] = matches['matches'] > 1
+    matches.insert(0, 'constituent_id', matches['constituent_ids'].where(~matches['is_ambiguous'], None))
+
+    return matches[RESOLVED_COLUMNS]
+
+
+def resolve_emails(df, column, matches):
+    """
+    ``df`` with the constituents of the email addresses in ``column``, from ``get_email_matches()``, in one join
+    for the whole frame. ``matches`` is 0 for addresses which aren't in RE.
+    """
+
+    resolved = matches.reindex(normalise_emails(df[column]).to_numpy()).set_axis(df.index)
+
+    resolved['matches'] = resolved['matches'].fillna(0).astype(int)
+
+    for flag in ['is_ambiguous', 'is_primary', 'is_inactive']:
+        resolved[flag] = resolved[flag].fillna(False).astype(bool)
+
+    return pd.concat([df.drop(columns=RESOLVED_COLUMNS, errors='ignore'), resolved], axis=1)
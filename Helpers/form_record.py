@@ -0,0 +1,152 @@
+import re
+import json
+import pandas as pd
+
+# Values which the form uses for "not applicable"
+EMPTY_VALUES = ['NA', 'na', 'Other', 'other', '0', '0.0']
+
+
+def is_missing(value):
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def get_text(value):
+    return '' if is_missing(value) else str(value)
+
+
+def clean_text(value):
+    # Blank out "not applicable" values the same way for every field
+    if is_missing(value) or (isinstance(value, str) and value in EMPTY_VALUES):
+        return ''
+
+    return value
+
+
+def get_digits(value):
+    if is_missing(value):
+        return None
+
+    # Excel stores some phone numbers as floats
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+
+    digits = re.sub('[^0-9]', '', str(value))
+
+    return digits or None
+
+
+class FormRecord:
+    """
+    One row of the Microsoft Forms responses with its fields read and normalised once, for the update functions.
+
+    ``raw`` keeps the row as it was in the form, for the database of uploaded data and for emails. ``rows`` has the
+    rows which were folded into the record, see ``fold()``.
+    """
+
+    __slots__ = (
+        'raw', 'rows', 'id', 'constituent_id', 'source', 'source_title',
+        'emails', 'email_1', 'phones', 'phone_1',
+        'organization', 'position', 'start_date', 'end_date',
+        'address_lines', 'city', 'state', 'country', 'postal_code', 'address',
+        'class_of', 'degree', 'department', 'hostel',
+        'name', 'linkedin', 'is_event', 'event_date'
+    )
+
+    def __init__(self, row):
+        self.raw = row
+        self.rows = [row]
+        self.id = row['ID']
+        self.constituent_id = int(row['System Record ID'])
+
+        # Source of the data
+        self.source = row['Enter the source of your data?']
+        self.source_title = get_text(self.source).title()
+
+        # Lower-cased emails, without blanks and duplicates
+        emails = [row['Email 1'], row['Email 2'], row['Email 3']]
+        self.emails = list(dict.fromkeys(str(x).lower() for x in emails if not is_missing(x)))
+        self.email_1 = None if is_missing(row['Email 1']) else str(row['Email 1']).lower()
+
+        # Phone numbers with only the digits
+        phones = [get_digits(row['Phone number 1']), get_digits(row['Phone number 2']),
+                  get_digits(row['Phone number 3'])]
+        self.phones = [x for x in phones if x is not None]
+        self.phone_1 = phones[0]
+
+        # Employment
+        self.organization = str(clean_text(row['Organization Name']))
+        self.position = str(clean_text(row['Position']))
+        self.start_date = clean_text(row['Start Date']) or None
+        self.end_date = clean_text(row['End Date']) or None
+
+        # Address
+        self.address_lines = get_text(row['Address Lines'])
+        self.city = get_text(row['City'])
+        self.state = get_text(row['State'])
+        self.country = get_text(row['Country'])
+        self.postal_code = get_text(row['Postal Code'])
+
+        address = ' '.join(str(clean_text(row[x])) for x in ['Address Lines', 'City', 'State', 'Country',
+                                                              'Postal Code'])
+        address = re.sub('\r\n|\t|\n', ', ', address)
+        self.address = address.replace('  ', ' ')
+
+        # Education
+        try:
+            self.class_of = int(str(row['Class of']).replace('NA', '0').replace('\xa0', '0'))
+        except ValueError:
+            self.class_of = 0
+
+        self.degree = get_text(row['Degree']).replace('0', '').replace('NA', '').replace('\xa0', '')
+        self.department = get_text(row['Department']).replace('nan', '').replace('NA', '').replace('0', '').replace(
+            '\xa0', '')
+        self.hostel = get_text(row['Hostel']).replace('[', '').replace('"', '').replace(']', '').replace(
+            'NA', '').replace('\xa0', '')
+
+        # Name and Online presence
+        self.name = re.sub(' +', ' ', re.sub('\r\n|\t|\n', ' ', str(row['Name2']))).strip()
+        self.linkedin = row['LinkedIn']
+
+        # Event
+        self.is_event = row['Is an Event?']
+        self.event_date = row['Event Date']
+
+    @classmethod
+    def fold(cls, records):
+        """
+        One record of several rows of the same constituent, in the order of the form: each field from the latest
+        row which has it, with the emails and phone numbers of all of them, the latest first.
+        """
+
+        if len(records) == 1:
+            return records[0]
+
+        row = dict(records[0].raw)
+        for record in records[1:]:
+            row.update({k: v for k, v in record.raw.items() if not is_missing(v)})
+
+        folded = cls(row)
+        folded.rows = [x for record in records for x in record.rows]
+        folded.emails = list(dict.fromkeys(x for record in reversed(records) for x in record.emails))
+        folded.phones = list(dict.fromkeys(x for record in reversed(records) for x in record.phones))
+
+        return folded
+
+    @property
+    def ids(self):
+        return [row['ID'] for row in self.rows]
+
+    def to_frame(self):
+        # Every row of the form in the record
+        return pd.DataFrame(self.rows)
+
+    def to_dict(self):
+        # JSON-friendly copy of the raw row, with dates in ISO format
+        return json.loads(pd.DataFrame([self.raw]).to_json(orient='records', date_format='iso'))[0]
+
+    def to_dicts(self):
+        # Same for each row of the form in the record
+        return json.loads(self.to_frame().to_json(orient='records', date_format='iso'))
@@ -0,0 +1,112 @@
+import numpy as np
+
+from rapidfuzz import fuzz, process, utils
+
+
+def normalise(value):
+    # Same clean-up as fuzzywuzzy's full_process: ASCII only, lower case, no punctuation
+    return utils.default_process(str(value).encode('ascii', 'ignore').decode())
+
+
+def get_scores(new_values, existing_values, scorer=fuzz.WRatio):
+    """
+    Similarity of every new value (rows) with every existing value (columns), from 0 to 100, in one call.
+
+    Scores of blank strings are 0 and scores are rounded to whole numbers, like they are in fuzzywuzzy, so that
+    the thresholds work the same.
+    """
+
+    if len(new_values) == 0 or len(existing_values) == 0:
+        return np.zeros((len(new_values), len(existing_values)), dtype=np.float32)
+
+    scores = process.cdist([normalise(x) for x in new_values], [normalise(x) for x in existing_values],
+                           scorer=scorer, dtype=np.float32, workers=1)
+
+    return np.rint(scores)
+
+
+def get_batch_scores(batch, scorer=fuzz.WRatio):
+    """
+    Scores of many records at once. ``batch`` is a list of ``(new_values, existing_values)`` pairs, and the
+    matrix of each pair is returned in the same order.
+
+    Only the pairs within a record are scored, with one cpdist call over the whole batch.
+    """
+
+    new_values = []
+    existing_values = []
+    for new, existing in batch:
+        for x in new:
+            new_values.extend([x] * len(existing))
+            existing_values.extend(existing)
+
+    if new_values:
+        scores = process.cpdist([normalise(x) for x in new_values], [normalise(x) for x in existing_values],
+                                scorer=scorer, dtype=np.float32, workers=-1)
+        scores = np.rint(scores)
+    else:
+        scores = np.zeros(0, dtype=np.float32)
+
+    matrices = []
+    start = 0
+    for new, existing in batch:
+        size = len(new) * len(existing)
+        matrices.append(scores[start:start + size].reshape(len(new), len(existing)))
+        start += size
+
+    return matrices
+
+
+def find_missing(new_values, existing_values, threshold, scores=None):
+    # New values whose best match in RE scores at most the threshold
+    if scores is None:
+        scores = get_scores(new_values, existing_values)
+
+    if scores.shape[1] == 0:
+        return list(new_values)
+
+    return [x for x, score in zip(new_values, scores.max(axis=1)) if score <= threshold]
+
+
+def find_existing(new_values, existing_values, threshold, scores=None):
+    # First value in RE whose best match in the new data scores at least the threshold
+    if scores is None:
+        scores = get_scores(new_values, existing_values)
+
+    if scores.shape[0] == 0:
+        return None
+
+    for x, score in zip(existing_values, scores.max(axis=0)):
+        if score >= threshold:
+            return x
+
+    return None
+
+
+def dedupe(values, threshold):
+    """
+    Drops fuzzy duplicates from a list, keeping the longest of each group, the same way as fuzzywuzzy's
+    ``process.dedupe``.
+    """
+
+    values = [str(x) for x in values]
+
+    scores = get_scores(values, values, scorer=fuzz.token_set_ratio)
+
+    # fuzzywuzzy's dedupe scores two blank strings as a full match
+    blank = np.array([normalise(x) == '' for x in values], dtype=bool)
+    scores[np.ix_(blank, blank)] = 100
+
+    extractor = []
+    for i in range(len(values)):
+        matches = [values[j] for j in np.flatnonzero(scores[i] > threshold)]
+
+        if len(matches) == 1:
+            extractor.append(matches[0])
+        else:
+            # Longest match, alphabetically first among those of the same length
+            extractor.append(sorted(sorted(matches), key=len, reverse=True)[0])
+
+    extractor = list(dict.fromkeys(extractor))
+
+    return values if len(extractor) == len(values) else extractor
@@ -0,0 +1,171 @@
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+import numpy as np
+import pandas as pd
+
+# Names are cut to this many characters, and shorter ones are padded with END
+MAX_LENGTH = 20
+
+# Names encoded and passed to the model at a time
+CHUNK_SIZE = 4096
+
+# Predictions above this are male
+THRESHOLD = 0.5
+
+# Names looked up in the cache at a time, within SQLite's limit on the number of parameters of a query
+LOOKUP_SIZE = 500
+
+
+def normalise_name(name):
+    # Lower-cased, without diacritic marks and other non-ASCII characters, e.g. 'José' -> 'jose'
+    name = unicodedata.normalize('NFKD', str(name).lower())
+
+    return name.encode('ASCII', 'ignore').decode('utf-8')
+
+
+def normalise_names(names):
+    # normalise_name() of each name, worked out once per distinct name. Missing names stay missing.
+    codes, uniques = pd.factorize(pd.Series(names))
+    normalised = np.array([normalise_name(x) for x in uniques] + [None], dtype=object)
+
+    return normalised[codes]
+
+
+def get_lookup(char_index):
+    # Index in the vocabulary of each ASCII character. Characters which aren't in it are encoded as a space.
+    lookup = np.full(128, char_index[' '], dtype=np.int8)
+
+    for char, i in char_index.items():
+        if len(char) == 1 and ord(char) < 128:
+            lookup[ord(char)] = i
+
+    return lookup
+
+
+def encode_names(names, char_index, max_length=MAX_LENGTH, dtype=np.float32):
+    """
+    One-hot encoding of normalised names for the model, as one array of (names, ``max_length``, vocabulary): the
+    first ``max_length`` characters of each name, followed by END.
+    """
+
+    # Code points of the characters of each name, with 0 after the end of the name
+    codes = np.array(list(names), dtype=f'U{max_length}').view(np.uint32).reshape(-1, max_length)
+
+    lookup = get_lookup(char_index)
+    indices = np.where(codes < len(lookup), lookup[np.minimum(codes, len(lookup) - 1)], char_index[' '])
+    indices[codes == 0] = char_index['END']
+
+    return np.eye(max(char_index.values()) + 1, dtype=dtype)[indices.astype(np.int8)]
+
+
+def predict_probabilities(model, names, char_index, chunk_size=CHUNK_SIZE):
+    # Prediction of the model for each normalised name, with one call to the model per chunk of names
+    probabilities = np.empty(len(names), dtype=np.float32)
+
+    for start in range(0, len(names), chunk_size):
+        encoded = encode_names(names[start:start + chunk_size], char_index)
+        probabilities[start:start + len(encoded)] = model.predict(encoded, batch_size=chunk_size, verbose=0).ravel()
+
+    return probabilities
+
+
+def get_labels(probabilities):
+    return np.where(probabilities > THRESHOLD, 'Male', 'Female').astype(object)
+
+
+def get_model_version(path='Models/model.h5'):
+    # Hash of the model file, which changes whenever the model is retrained
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+class GenderCache:
+    """
+    Predictions of the model by normalised name, in SQLite, so that names which come up again, in a file or on the
+    next visit to the page, aren't predicted again.
+
+    Predictions are kept for one version of the model, a hash of ``model_path``, and those of any other version are
+    dropped when the cache is opened, e.g. after the model is retrained. ``hits`` and ``misses`` count the names
+    looked up since then.
+    """
+
+    def __init__(self, path='Databases/Gender Cache.db', model_path='Models/model.h5'):
+        self.path = path
+        self.model_version = get_model_version(model_path)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        with self.connect() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS predictions (model_version TEXT NOT NULL, '
+                               'name TEXT NOT NULL, label TEXT NOT NULL, probability REAL NOT NULL, '
+                               'PRIMARY KEY (model_version, name))')
+            connection.execute('DELETE FROM predictions WHERE model_version != ?', (self.model_version,))
+
+    def connect(self):
+        # One connection per thread, as each session of the app runs in its own
+        connection = getattr(self.local, 'connection', None)
+
+        if connection is None:
+            connection = sqlite3.connect(self.path)
+            self.local.connection = connection
+
+        return connection
+
+    def get(self, names):
+        # Probabilities of the names which have been predicted before, by name
+        connection = self.connect()
+        found = {}
+
+        for start in range(0, len(names), LOOKUP_SIZE):
+            batch = list(names[start:start + LOOKUP_SIZE])
+            rows = connection.execute(f'SELECT name, probability FROM predictions WHERE model_version = ? AND name IN '
+                                      f'({", ".join("?" * len(batch))})', [self.model_version] + batch).fetchall()
+            found.update(rows)
+
+        with self.lock:
+            self.hits += len(found)
+            self.misses += len(names) - len(found)
+
+        return found
+
+    def put(self, names, probabilities):
+        rows = [(self.model_version, name, label, float(probability))
+                for name, label, probability in zip(names, get_labels(probabilities), probabilities)]
+
+        with self.connect() as connection:
+            connection.executemany('INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)', rows)
+
+    def get_hit_rate(self):
+        # Share of the names looked up which were already in the cache
+        with self.lock:
+            lookups = self.hits + self.misses
+
+            return self.hits / lookups if lookups else 0.0
+
+
+def predict_genders(model, names, char_index, cache=None, chunk_size=CHUNK_SIZE):
+    """
+    Male or Female for each name, e.g. a column of an uploaded file, or None where the name is missing. Each distinct
+    name is only predicted once, and not at all if it's in ``cache``, a ``GenderCache``.
+    """
+
+    codes, uniques = pd.factorize(normalise_names(names))
+    probabilities = np.empty(len(uniques), dtype=np.float32)
+
+    cached = cache.get(uniques) if cache is not None else {}
+    is_cached = np.array([x in cached for x in uniques], dtype=bool)
+    probabilities[is_cached] = [cached[x] for x in uniques[is_cached]]
+
+    new_names = uniques[~is_cached]
+    probabilities[~is_cached] = predict_probabilities(model, new_names, char_index, chunk_size)
+
+    if cache is not None and len(new_names):
+        cache.put(new_names, probabilities[~is_cached])
+
+    genders = np.append(get_labels(probabilities), None)
+
+    return genders[codes]
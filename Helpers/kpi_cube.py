@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+# Columns of the custom fields which the KPI Tracker slices by
+DIMENSIONS = ['date', 'category', 'verified_source', 'sync_source', 'update_type', 'verified_source_category',
+              'email_domain_category']
+
+# Whether the constituent is an alum, deceased, inactive or has opted out
+FLAGS = ['is_alum', 'is_deceased', 'is_inactive', 'is_opt_out']
+
+
+def get_ids(df, mask=None):
+    # Constituent ids of a download, which may be empty if nothing was downloaded
+    if 'id' not in df:
+        return set()
+
+    ids = df['id'] if mask is None else df.loc[mask, 'id']
+
+    return set(ids.dropna().astype(int))
+
+
+def get_flags(parent_ids, alums, constituents, opt_outs):
+    deceased = constituents.get('deceased')
+    inactive = constituents.get('inactive')
+
+    return pd.DataFrame({
+        'is_alum': parent_ids.isin(get_ids(alums)),
+        'is_deceased': parent_ids.isin(get_ids(constituents, deceased == 'True') if deceased is not None else set()),
+        'is_inactive': parent_ids.isin(get_ids(constituents, inactive == 'True') if inactive is not None else set()),
+        'is_opt_out': parent_ids.isin(get_ids(opt_outs))
+    }, index=parent_ids.index)
+
+
+def build_kpi_cube(custom_fields, alums, constituents, opt_outs):
+    """
+    The custom fields reduced to what the KPI Tracker needs: one row per day, category, source, type of update and
+    flags, with the number of custom fields in ``records``. Sorted by date.
+
+    The number of constituents over a range of dates or sources can't be summed from daily counts, so the distinct
+    constituents of each row are kept apart, as a lookup of ``parent_id`` in which the ``constituents`` of a row start
+    at its ``first_constituent``. Returns the cube and the lookup.
+    """
+
+    data = custom_fields[DIMENSIONS + ['parent_id']].copy()
+    data['date'] = pd.to_datetime(data['date'])
+    data['parent_id'] = data['parent_id'].astype(int)
+
+    data = pd.concat([data, get_flags(data['parent_id'], alums, constituents, opt_outs)], axis=1)
+
+    # Rows of the cube are numbered in the order they're first seen
+    group = data.groupby(DIMENSIONS + FLAGS, dropna=False, sort=False).ngroup().to_numpy()
+
+    cube = data.loc[~pd.Series(group).duplicated().to_numpy(), DIMENSIONS + FLAGS].reset_index(drop=True)
+    cube['records'] = np.bincount(group, minlength=len(cube)).astype('int32')
+
+    lookup = pd.DataFrame({'group': group, 'parent_id': data['parent_id'].to_numpy()}).drop_duplicates()
+    lookup = lookup.sort_values(['group', 'parent_id']).reset_index(drop=True)
+
+    counts = np.bincount(lookup['group'].to_numpy(), minlength=len(cube))
+    cube['constituents'] = counts.astype('int32')
+    cube['first_constituent'] = np.cumsum(counts) - counts
+
+    cube = cube.sort_values('date', kind='stable').reset_index(drop=True)
+
+    return cube, lookup[['parent_id']]
+
+
+def load_kpi_cube(path='Databases/KPI Cube.parquet', constituents_path='Databases/KPI Cube Constituents.parquet'):
+    # Rows without a date are never in a range of dates, and the rest are kept sorted for filter_cube(). The parent_id
+    # of the constituents of each row, for with_constituents().
+    cube = pd.read_parquet(path)
+    cube = cube[cube['date'].notna()]
+
+    if not cube['date'].is_monotonic_increasing:
+        cube = cube.sort_values('date', kind='stable')
+
+    for flag in FLAGS:
+        cube[flag] = cube[flag].astype(bool)
+
+    parent_ids = pd.read_parquet(constituents_path)['parent_id'].to_numpy()
+
+    return cube.reset_index(drop=True), parent_ids
+
+
+def filter_cube(cube, start_date, end_date, only_alums=False, ignore_deceased=False, ignore_inactive=False,
+                ignore_opt_outs=False):
+    """
+    Rows of a cube from ``load_kpi_cube()`` between two dates, both included, for the filters of the KPI Tracker.
+
+    As the cube is sorted by date, the range is found by binary search, and the flags are combined into a single
+    mask over it, so only the rows which are kept are copied.
+    """
+
+    dates = cube['date'].to_numpy()
+    start = dates.searchsorted(pd.Timestamp(start_date).to_datetime64(), side='left')
+    end = max(dates.searchsorted(pd.Timestamp(end_date).to_datetime64(), side='right'), start)
+
+    mask = np.ones(end - start, dtype=bool)
+
+    if only_alums:
+        mask &= cube['is_alum'].to_numpy()[start:end]
+
+    for flag, ignore in [('is_deceased', ignore_deceased), ('is_inactive', ignore_inactive),
+                         ('is_opt_out', ignore_opt_outs)]:
+        if ignore:
+            mask &= ~cube[flag].to_numpy()[start:end]
+
+    return cube.take(np.flatnonzero(mask) + start)
+
+
+def with_constituents(cube, parent_ids):
+    """
+    Rows of a cube, e.g. from ``filter_cube()``, once per constituent, with their ``parent_id`` from the lookup of
+    ``load_kpi_cube()``, to count distinct constituents. Custom fields aren't counted in these rows, only in the cube.
+    """
+
+    counts = cube['constituents'].to_numpy()
+    rows = np.repeat(np.arange(len(cube)), counts)
+
+    # Position in the lookup of each constituent of each row
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    positions = np.repeat(cube['first_constituent'].to_numpy(), counts) + offsets
+
+    expanded = cube[DIMENSIONS + FLAGS].take(rows).reset_index(drop=True)
+    expanded['parent_id'] = parent_ids[positions]
+
+    return expanded
@@ -0,0 +1,163 @@
+import os
+import re
+import functools
+import pandas as pd
+
+COUNTRY_CODES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Databases',
+                                  'Country Codes.csv')
+
+# Most numbers in the form and in RE are Indian
+DEFAULT_COUNTRY_CODE = '91'
+
+# Longest country code, e.g. 1-684 for American Samoa
+MAX_PREFIX_LENGTH = 7
+
+# Longest national number, without the trunk prefix, by country code. Longer numbers are taken to start with their
+# country code, e.g. 919876543210, and shorter ones to be from the default country, e.g. 13812345678 in China.
+NATIONAL_LENGTHS = {'1': 10, '7': 10, '33': 9, '44': 10, '49': 11, '61': 9, '65': 8, '81': 10, '86': 11, '91': 10,
+                    '966': 9, '971': 9, '974': 8}
+
+# For other country codes
+MAX_NATIONAL_LENGTH = 10
+
+# Country codes whose national numbers keep their leading 0, e.g. +39 06 1234 5678 for Rome
+KEEPS_TRUNK_ZERO = {'39', '378', '379'}
+
+
+@functools.lru_cache(maxsize=None)
+def load_country_codes(path=COUNTRY_CODES_FILE):
+    """
+    Dialling prefixes from ``Databases/Country Codes.csv`` as ``{prefix: [countries]}`` and
+    ``{country: country code}``. Area codes are part of the prefix, e.g. 1684 for American Samoa.
+    """
+
+    data = pd.read_csv(path, dtype=str)
+
+    prefixes = {}
+    countries = {}
+    for country, codes in zip(data['COUNTRY'], data['COUNTRY CODE']):
+        for code in str(codes).split(','):
+            prefix = re.sub('[^0-9]', '', code)
+
+            if prefix:
+                prefixes.setdefault(prefix, []).append(country)
+
+                # Numbers within the country are dialled with the area code, so only the part before it is added
+                countries.setdefault(country.lower(), code.strip().split('-')[0])
+
+    return prefixes, countries
+
+
+def get_country_code(country, default=DEFAULT_COUNTRY_CODE):
+    # e.g. India -> 91, Puerto Rico -> 1
+    if not isinstance(country, str) or not country.strip():
+        return default
+
+    return load_country_codes()[1].get(country.strip().lower(), default)
+
+
+def get_prefix(key):
+    # Longest country code that the number starts with, e.g. +16845551234 -> 1684
+    prefixes = load_country_codes()[0]
+    digits = str(key).lstrip('+')
+
+    for length in range(min(MAX_PREFIX_LENGTH, len(digits)), 0, -1):
+        if digits[:length] in prefixes:
+            return digits[:length]
+
+    return None
+
+
+def get_countries(key):
+    prefix = get_prefix(key)
+    return load_country_codes()[0][prefix] if prefix else []
+
+
+def split_country_code(digits):
+    # Country code and national number of digits which start with the country code, e.g. 919876543210
+    prefix = get_prefix(digits)
+
+    if prefix is None:
+        return None, digits
+
+    national = digits[len(prefix):]
+
+    # A trunk prefix written after the country code, e.g. +91 (0)98765 43210, isn't dialled from abroad
+    if prefix not in KEEPS_TRUNK_ZERO:
+        national = national.lstrip('0')
+
+    return prefix, national
+
+
+def get_national_length(code):
+    return NATIONAL_LENGTHS.get(str(code), MAX_NATIONAL_LENGTH)
+
+
+def canonicalise(value, default_code=DEFAULT_COUNTRY_CODE):
+    """
+    E.164-style key of a phone number, e.g. '098765 43210', '+91 (0)98765 43210', '919876543210' and 9876543210.0
+    are all '+919876543210'.
+
+    Numbers written with a + or 00, or too long for a national number of ``default_code``, start with their country
+    code, the longest prefix in ``Databases/Country Codes.csv`` which they start with. Other numbers are from
+    ``default_code``, e.g. '13812345678' is '+8613812345678' for 86, but '+13812345678' for 91.
+
+    Returns None when there's no national number, e.g. '', '0' or '+91'.
+    """
+
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+
+    # Excel stores some phone numbers as floats
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+
+    value = str(value).strip()
+    digits = re.sub('[^0-9]', '', value)
+
+    if value.startswith('+'):
+        # Already has the country code
+        international = digits
+
+    elif digits.startswith('00'):
+        # International dialling prefix
+        international = digits[2:]
+
+    elif len(digits.lstrip('0')) > get_national_length(default_code):
+        # Dialled with the country code, but without the +
+        international = digits
+
+    else:
+        # A national number, maybe with its trunk prefix
+        international = None
+
+    if international is None:
+        prefix = str(default_code)
+        national = digits if prefix in KEEPS_TRUNK_ZERO else digits.lstrip('0')
+
+    else:
+        prefix, national = split_country_code(international.lstrip('0'))
+
+        # Without a known country code, the number is kept as it is
+        prefix = prefix or ''
+
+    if not national.strip('0'):
+        return None
+
+    return f'+{prefix}{national}'
+
+
+def canonicalise_series(series, default_code=DEFAULT_COUNTRY_CODE):
+    """
+    ``canonicalise()`` of each number of a bulk download, e.g. the phones of every constituent, where the same numbers
+    repeat across rows. ``default_code`` is a country code, or one per row. Each distinct number and country code is
+    only worked out once.
+    """
+
+    default_codes = default_code if isinstance(default_code, pd.Series) else pd.Series(default_code, index=series.index)
+    pairs = pd.DataFrame({'number': series.astype(object), 'code': default_codes.astype(str)})
+
+    codes, uniques = pd.factorize(pd.MultiIndex.from_frame(pairs.fillna({'number': ''})))
+    keys = pd.array([canonicalise(number, code) for number, code in uniques], dtype=object)
+
+    return pd.Series(keys[codes], index=series.index, dtype=object)
@@ -0,0 +1,61 @@
+import asyncio
+import logging
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by every worker in the process.
+
+    ``rate`` tokens are added per second, up to ``capacity`` tokens. Each API request takes one token and
+    blocks until one is available, so the process as a whole never goes above the SKY API quota.
+
+    The bucket holds at least one token, so that a ``rate`` below 1 request per second still lets requests through.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if float(rate) <= 0:
+            raise ValueError(f'Rate limit must be above 0 requests per second, not {rate}')
+
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity or rate))
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def try_acquire(self, tokens=1):
+        # Returns 0 when the tokens were taken, else the time till enough tokens are available
+        with self.lock:
+            self.refill()
+
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0
+
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        while True:
+            wait = self.try_acquire(tokens)
+
+            if wait == 0:
+                return
+
+            logging.debug(f'Rate limit reached, waiting for {wait:.2f} seconds')
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=1):
+        while True:
+            wait = self.try_acquire(tokens)
+
+            if wait == 0:
+                return
+
+            logging.debug(f'Rate limit reached, waiting for {wait:.2f} seconds')
+            await asyncio.sleep(wait)
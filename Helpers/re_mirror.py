@@ -0,0 +1,86 @@
+import json
+import logging
+import sqlite3
+import threading
+
+from datetime import datetime
+
+# Sub-resources of a constituent which are mirrored, by the collection endpoint that lists them for everyone
+MIRRORED_RESOURCES = {
+    'emailaddresses': 'https://api.sky.blackbaud.com/constituent/v1/emailaddresses',
+    'phones': 'https://api.sky.blackbaud.com/constituent/v1/phones',
+    'addresses': 'https://api.sky.blackbaud.com/constituent/v1/addresses',
+    'relationships': 'https://api.sky.blackbaud.com/constituent/v1/relationships',
+    'educations': 'https://api.sky.blackbaud.com/constituent/v1/educations'
+}
+
+
+class ReMirror:
+    """
+    Local SQLite copy of the emails, phones, addresses, relationships and educations of every constituent in RE,
+    indexed by constituent_id.
+
+    Each record is stored as the JSON returned by the SKY API, so ``get()`` returns the same response as
+    ``GET /constituents/{constituent_id}/{resource}``. Refreshed by ``Sync RE Mirror.py``.
+    """
+
+    def __init__(self, path='Databases/RE Mirror.db'):
+        self.path = path
+        self.local = threading.local()
+
+        with self.connect() as connection:
+            for resource in MIRRORED_RESOURCES:
+                connection.execute(f'CREATE TABLE IF NOT EXISTS {resource} '
+                                   f'(id INTEGER PRIMARY KEY, constituent_id INTEGER NOT NULL, data TEXT NOT NULL)')
+                connection.execute(f'CREATE INDEX IF NOT EXISTS {resource}_constituent_id '
+                                   f'ON {resource} (constituent_id)')
+
+            connection.execute('CREATE TABLE IF NOT EXISTS sync_state (resource TEXT PRIMARY KEY, synced_at TEXT)')
+
+    def connect(self):
+        # One connection per thread, as the upload workers read from it at once
+        connection = getattr(self.local, 'connection', None)
+
+        if connection is None:
+            connection = sqlite3.connect(self.path)
+            self.local.connection = connection
+
+        return connection
+
+    def get_synced_at(self, resource):
+        row = self.connect().execute('SELECT synced_at FROM sync_state WHERE resource = ?', (resource,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, constituent_id, resource):
+        rows = self.connect().execute(f'SELECT data FROM {resource} WHERE constituent_id = ? ORDER BY id',
+                                      (int(constituent_id),)).fetchall()
+        value = [json.loads(row[0]) for row in rows]
+
+        return {'count': len(value), 'value': value}
+
+    def sync(self, resource, pages):
+        """
+        Replaces the mirror of a resource with the records in ``pages``, an iterable of API responses. The old
+        copy stays readable until every page is loaded.
+        """
+
+        logging.info(f'Syncing the mirror of {resource}')
+
+        synced_at = datetime.now().isoformat()
+        count = 0
+
+        connection = self.connect()
+
+        with connection:
+            connection.execute(f'DELETE FROM {resource}')
+
+            for page in pages:
+                rows = [(int(x['id']), int(x['constituent_id']), json.dumps(x)) for x in page.get('value', [])]
+                connection.executemany(f'INSERT OR REPLACE INTO {resource} VALUES (?, ?, ?)', rows)
+                count += len(rows)
+
+            connection.execute('INSERT OR REPLACE INTO sync_state VALUES (?, ?)', (resource, synced_at))
+
+        logging.info(f'Mirrored {count} {resource}')
+
+        return count
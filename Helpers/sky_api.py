@@ -0,0 +1,104 @@
+import os
+import json
+import logging
+import threading
+import requests
+
+from collections import Counter
+from requests.adapters import HTTPAdapter
+from urllib3 import Retry
+from Helpers.rate_limiter import TokenBucket
+
+# Requests made by every client in this process, by HTTP method
+request_counts = Counter()
+request_counts_lock = threading.Lock()
+
+
+class TokenProvider:
+    """
+    Keeps the SKY API access token in memory and re-reads the token file only when its mtime changes,
+    i.e. after ``Refresh Access Token.py`` has written a new one.
+    """
+
+    def __init__(self, path='access_token_output.json'):
+        self.path = path
+        self.access_token = None
+        self.mtime = None
+        self.lock = threading.Lock()
+
+    def get_token(self):
+        mtime = os.stat(self.path).st_mtime_ns
+
+        with self.lock:
+            if mtime != self.mtime:
+                logging.info('Retrieve token for API connections')
+
+                with open(self.path) as access_token_output:
+                    data = json.load(access_token_output)
+                    self.access_token = data['access_token']
+
+                self.mtime = mtime
+
+            return self.access_token
+
+
+class SkyApiClient:
+    """
+    Client for the Blackbaud SKY API with a pooled session, an in-memory access token and request accounting.
+    """
+
+    def __init__(self, api_key, rate_limit=None, pool_size=10, token_file='access_token_output.json'):
+        self.api_key = api_key
+        self.token_provider = TokenProvider(token_file)
+
+        # Optional process-wide rate limit (requests per second)
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+
+        # API Request strategy
+        retry_strategy = Retry(
+            total=3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['HEAD', 'GET', 'OPTIONS'],
+            backoff_factor=10
+        )
+
+        adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=pool_size, pool_maxsize=pool_size)
+        self.http = requests.Session()
+        self.http.mount('https://', adapter)
+        self.http.mount('http://', adapter)
+
+    def get_headers(self, content_type=None):
+        headers = {
+            'Bb-Api-Subscription-Key': self.api_key,
+            'Authorization': 'Bearer ' + self.token_provider.get_token(),
+        }
+
+        if content_type:
+            headers['Content-Type'] = content_type
+
+        return headers
+
+    def request(self, method, url, **kwargs):
+        # Wait for the shared rate limiter
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+
+        with request_counts_lock:
+            request_counts[method] += 1
+
+        return self.http.request(method, url, **kwargs)
+
+    def get(self, url, params=None):
+        return self.request('GET', url, params=params, headers=self.get_headers()).json()
+
+    def post(self, url, params):
+        return self.request('POST', url, params=params, headers=self.get_headers('application/json'),
+                            json=params).json()
+
+    def patch(self, url, params):
+        return self.request('PATCH', url, headers=self.get_headers('application/json'), data=json.dumps(params))
+
+
+def log_request_counts():
+    with request_counts_lock:
+        logging.info(f'SKY API requests made: {dict(request_counts)} (total: {sum(request_counts.values())})')
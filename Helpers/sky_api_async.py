@@ -0,0 +1,129 @@
+import json
+import asyncio
+import logging
+import aiohttp
+import requests
+
+from collections import defaultdict
+from Helpers.sky_api import TokenProvider, request_counts, request_counts_lock
+
+# Same strategy as the Retry() used by the synchronous client
+RETRY_TOTAL = 3
+RETRY_STATUS_FORCELIST = [429, 500, 502, 503, 504]
+RETRY_ALLOWED_METHODS = ['HEAD', 'GET', 'OPTIONS']
+RETRY_BACKOFF_FACTOR = 10
+RETRY_BACKOFF_MAX = 120
+RETRY_AFTER_STATUS_CODES = [413, 429, 503]
+
+
+def get_endpoint_family(url):
+    # e.g. https://api.sky.blackbaud.com/constituent/v1/constituents/123/phones -> constituent/phones
+    path = url.split('api.sky.blackbaud.com/', 1)[-1].split('?', 1)[0].strip('/').split('/')
+    segments = [x for x in path[2:] if not x.isdigit()]
+    return f"{path[0]}/{segments[-1] if segments else ''}"
+
+
+def get_backoff_time(consecutive_errors):
+    if consecutive_errors <= 1:
+        return 0
+
+    return min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_FACTOR * (2 ** (consecutive_errors - 1)))
+
+
+class AsyncSkyApiClient:
+    """
+    asyncio counterpart of ``SkyApiClient``. At most ``concurrency`` requests per endpoint family are in flight at
+    once, and requests are retried the same way as the synchronous client.
+
+    Use as ``async with AsyncSkyApiClient(...) as client:``.
+    """
+
+    def __init__(self, api_key, rate_limiter=None, concurrency=10, token_file='access_token_output.json'):
+        self.api_key = api_key
+        self.token_provider = TokenProvider(token_file)
+        self.rate_limiter = rate_limiter
+        self.semaphores = defaultdict(lambda: asyncio.BoundedSemaphore(concurrency))
+        self.session = None
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.session.close()
+
+    def get_headers(self, content_type=None):
+        headers = {
+            'Bb-Api-Subscription-Key': self.api_key,
+            'Authorization': 'Bearer ' + self.token_provider.get_token(),
+        }
+
+        if content_type:
+            headers['Content-Type'] = content_type
+
+        return headers
+
+    async def request(self, method, url, **kwargs):
+        semaphore = self.semaphores[get_endpoint_family(url)]
+        errors = 0
+
+        while True:
+            # Wait for the shared rate limiter
+            if self.rate_limiter:
+                await self.rate_limiter.acquire_async()
+
+            with request_counts_lock:
+                request_counts[method] += 1
+
+            try:
+                async with semaphore:
+                    async with self.session.request(method, url, **kwargs) as response:
+                        body = await response.text()
+
+                        retry = response.status in RETRY_STATUS_FORCELIST and method in RETRY_ALLOWED_METHODS
+
+                        if not retry:
+                            return response.status, body
+
+                        retry_after = response.headers.get('Retry-After')
+
+            except aiohttp.ClientConnectionError as error:
+                # Like urllib3, a request which never connected is retried for every method, but one which failed
+                # after it was sent only for RETRY_ALLOWED_METHODS, as RE may already have made a POST or PATCH
+                retry_after = None
+
+                if errors >= RETRY_TOTAL or (method not in RETRY_ALLOWED_METHODS and
+                                             not isinstance(error, aiohttp.ClientConnectorError)):
+                    raise
+
+                logging.info(f'{method} {url} failed with {error}, retrying')
+
+            else:
+                if errors >= RETRY_TOTAL:
+                    raise Exception(f'Max retries exceeded for {method} {url}: {response.status} {body}')
+
+                logging.info(f'{method} {url} returned {response.status}, retrying')
+
+            errors += 1
+
+            # Honour Retry-After like urllib3 does, else back off exponentially
+            if retry_after and retry_after.isdigit() and response.status in RETRY_AFTER_STATUS_CODES:
+                await asyncio.sleep(int(retry_after))
+            else:
+                await asyncio.sleep(get_backoff_time(errors))
+
+    async def get(self, url, params=None):
+        status, body = await self.request('GET', url, params=params, headers=self.get_headers())
+        return json.loads(body)
+
+    async def post(self, url, params):
+        # The synchronous client also sends the body as query parameters, so encode them the same way requests does
+        url = requests.Request('POST', url, params=params).prepare().url
+
+        status, body = await self.request('POST', url, headers=self.get_headers('application/json'), json=params)
+        return json.loads(body)
+
+    async def patch(self, url, params):
+        status, body = await self.request('PATCH', url, headers=self.get_headers('application/json'),
+                                          data=json.dumps(params))
+        return status
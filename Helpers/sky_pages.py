@@ -0,0 +1,274 @@
+import os
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Page size of the SKY API when no limit is given
+DEFAULT_LIMIT = 500
+
+
+def get_pages(client, url, params=None):
+    # Pages of a SKY API collection, following next_link until the last page
+    while url:
+        re_api_response = client.get(url, params)
+
+        yield re_api_response
+
+        url = re_api_response.get('next_link')
+
+        # The next link already has the parameters
+        params = None
+
+
+def set_query(url, **params):
+    # e.g. set_query('.../addresses?limit=5000', offset=10000) -> '.../addresses?limit=5000&offset=10000'
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    query.update({k: str(v) for k, v in params.items()})
+
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def get_pages_parallel(client, url, params=None, workers=4):
+    """
+    Same pages as ``get_pages()``, in the same order, but after the first page the rest are requested by offset,
+    up to ``workers`` at once. The number of pages comes from the ``count`` of the first page.
+
+    Falls back to following next_link when the first page has no count.
+    """
+
+    first_page = client.get(url, params)
+
+    yield first_page
+
+    count = first_page.get('count')
+    values = first_page.get('value', [])
+
+    if not isinstance(count, int) or not first_page.get('next_link'):
+        # Either the only page, or a collection without a count
+        if first_page.get('next_link'):
+            yield from get_pages(client, first_page['next_link'])
+        return
+
+    limit = int(dict(parse_qsl(urlsplit(url).query)).get('limit', (params or {}).get('limit', DEFAULT_LIMIT)))
+    limit = max(limit, len(values), 1)
+
+    offsets = range(limit, count, limit)
+
+    logging.info(f'Downloading {count} records in {len(offsets) + 1} pages, {workers} at a time')
+
+    def get_page(offset):
+        return client.get(set_query(url, offset=offset), params)
+
+    # Only a few pages ahead are requested, and pages are returned in offset order
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        offsets = iter(offsets)
+        in_flight = deque()
+
+        for offset in offsets:
+            in_flight.append(executor.submit(get_page, offset))
+
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def stringify(value):
+    # Every value as a string, and lists as lists of strings
+    if isinstance(value, list):
+        return [stringify(x) for x in value]
+
+    return str(value)
+
+
+def flatten(record, row, prefix=''):
+    # Nested objects become 'parent.child' columns, like pd.json_normalize
+    for key, value in record.items():
+        if isinstance(value, dict) and value:
+            flatten(value, row, f'{prefix}{key}.')
+        elif not isinstance(value, dict):
+            row[f'{prefix}{key}'] = value
+
+    return row
+
+
+class ColumnBuffer:
+    """
+    Records of one or more pages collected column by column and built into one Arrow table at the end, instead of
+    a DataFrame per page joined with ``pd.concat``.
+
+    With a ``schema``, only its columns are kept and values are converted to its types. With ``stringify``, every
+    value is kept as a string, as the dashboard expects.
+    """
+
+    def __init__(self, schema=None, stringify=False):
+        self.schema = schema
+        self.stringify = stringify
+        self.columns = {name: [] for name in schema.names} if schema is not None else {}
+        self.rows = 0
+
+    def __len__(self):
+        return self.rows
+
+    def add_page(self, page):
+        self.add(page.get('value', []))
+
+    def add(self, records):
+        columns = self.columns
+
+        for record in records:
+            for name, value in flatten(record, {}).items():
+                column = columns.get(name)
+
+                if column is None:
+                    if self.schema is not None:
+                        continue
+
+                    column = columns[name] = []
+
+                # Nulls for the records before this one which didn't have the column
+                if len(column) < self.rows:
+                    column.extend([None] * (self.rows - len(column)))
+
+                column.append(stringify(value) if self.stringify else value)
+
+            self.rows += 1
+
+    def to_table(self):
+        arrays = []
+        fields = []
+
+        for name, column in self.columns.items():
+            column.extend([None] * (self.rows - len(column)))
+
+            if self.schema is not None:
+                field = self.schema.field(name)
+
+                # e.g. ids, which the SKY API sends as strings, but not always
+                if pa.types.is_string(field.type):
+                    column = [x if x is None or isinstance(x, str) else str(x) for x in column]
+            elif self.stringify:
+                is_list = any(isinstance(x, list) for x in column)
+                field = pa.field(name, pa.list_(pa.string()) if is_list else pa.string())
+            else:
+                field = None
+
+            array = pa.array(column, type=field.type if field is not None else None)
+
+            arrays.append(array)
+            fields.append(field if field is not None else pa.field(name, array.type))
+
+        return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+    def to_frame(self):
+        return self.to_table().to_pandas()
+
+
+def pages_to_table(pages, schema=None, stringify=False):
+    buffer = ColumnBuffer(schema, stringify)
+
+    for page in pages:
+        buffer.add_page(page)
+
+    return buffer.to_table()
+
+
+class ParquetPageWriter:
+    """
+    Writes DataFrames or Arrow tables, e.g. one per page of a collection, as the row groups of a single parquet
+    file, so a download never holds more than a page in memory.
+
+    The file is written to ``<path>.tmp`` and moved to ``path`` on ``close()``, so readers never see half a download.
+    Columns which only show up in later pages widen the schema, which rewrites what's written so far.
+
+    Use as ``with ParquetPageWriter(path) as writer:``.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f'{path}.tmp'
+        self.writer = None
+        self.schema = None
+        self.rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def open(self, schema):
+        self.schema = schema
+        self.writer = pq.ParquetWriter(self.tmp_path, schema)
+
+    def widen(self, table):
+        logging.info(f'Widening the schema of {self.path}')
+
+        self.writer.close()
+
+        written = pq.read_table(self.tmp_path)
+        schema = pa.unify_schemas([self.schema, table.schema], promote_options='permissive')
+
+        self.open(schema)
+        self.writer.write_table(self.align(written))
+
+    def align(self, table):
+        # Same columns in the same order, with nulls for the columns missing from this table
+        columns = []
+        for field in self.schema:
+            if field.name in table.column_names:
+                columns.append(table.column(field.name).cast(field.type))
+            else:
+                columns.append(pa.nulls(len(table), field.type))
+
+        return pa.Table.from_arrays(columns, schema=self.schema)
+
+    def write(self, df):
+        if len(df) == 0:
+            return
+
+        table = df if isinstance(df, pa.Table) else pa.Table.from_pandas(df, preserve_index=False)
+
+        if self.writer is None:
+            self.open(table.schema.remove_metadata())
+
+        elif not set(table.column_names) <= set(self.schema.names):
+            self.widen(table)
+
+        try:
+            table = self.align(table)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            # e.g. a column which was all null so far
+            self.widen(table)
+            table = self.align(table)
+
+        self.writer.write_table(table)
+        self.rows += len(table)
+
+    def close(self):
+        if self.writer is None:
+            # Nothing was downloaded
+            pd.DataFrame().to_parquet(self.tmp_path, index=False)
+        else:
+            self.writer.close()
+
+        os.replace(self.tmp_path, self.path)
+
+        logging.info(f'Wrote {self.rows} rows to {self.path}')
+
+    def abort(self):
+        if self.writer is not None:
+            self.writer.close()
+
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
@@ -0,0 +1,107 @@
+import os
+import time
+import shutil
+import logging
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class TaskGraph:
+    """
+    Runs tasks as soon as the tasks they depend on are done, up to ``workers`` at once, e.g. downloads which don't
+    depend on each other.
+
+    Each task is called as ``func(tmp_dir, *args)``, with an empty directory of its own under ``tmp_dir`` for the
+    files it writes before moving them into place. ``tmp_dir`` is removed once the graph has run, whether or not it
+    failed. The wall time of each task is logged.
+    """
+
+    def __init__(self, tmp_dir, workers=4):
+        self.tmp_dir = tmp_dir
+        self.workers = workers
+        self.tasks = {}
+        self.timings = {}
+
+    def add(self, name, func, *args, depends_on=()):
+        # Dependencies have to be added first, so there can't be a cycle
+        for dependency in depends_on:
+            if dependency not in self.tasks:
+                raise ValueError(f'{name} depends on {dependency}, which has not been added')
+
+        self.tasks[name] = (func, args, tuple(depends_on))
+
+    def namespace(self, name):
+        # Directory of a task's files, e.g. for a task to read what the tasks it depends on wrote
+        return os.path.join(self.tmp_dir, name)
+
+    def run_task(self, name, func, args):
+        tmp_dir = self.namespace(name)
+        os.makedirs(tmp_dir)
+
+        logging.info(f'Starting {name}')
+        start = time.perf_counter()
+
+        try:
+            return func(tmp_dir, *args)
+        finally:
+            self.timings[name] = time.perf_counter() - start
+            logging.info(f'Finished {name} in {self.timings[name]:.1f}s')
+
+    def run(self):
+        """
+        Runs every task, and returns the wall time of each. After a task fails, no more tasks are started, and the
+        error is raised once the running ones have finished.
+        """
+
+        # Left over from a run which was killed
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+        pending = dict(self.tasks)
+        running = {}
+        done = set()
+        error = None
+
+        start = time.perf_counter()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                while pending or running:
+                    if error is None:
+                        for name, (func, args, depends_on) in list(pending.items()):
+                            if done.issuperset(depends_on):
+                                del pending[name]
+                                running[executor.submit(self.run_task, name, func, args)] = name
+
+                    if not running:
+                        break
+
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                    for future in finished:
+                        name = running.pop(future)
+
+                        try:
+                            future.result()
+                            done.add(name)
+                        except Exception as task_error:
+                            logging.error(f'{name} failed: {task_error}')
+                            error = error or task_error
+
+        finally:
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+        self.log_timings(time.perf_counter() - start)
+
+        if error is not None:
+            logging.info(f'Not started: {", ".join(pending) or "none"}')
+            raise error
+
+        return self.timings
+
+    def log_timings(self, total):
+        logging.info('Wall time of each task:')
+
+        for name, seconds in sorted(self.timings.items(), key=lambda x: -x[1]):
+            logging.info(f'  {name}: {seconds:.1f}s')
+
+        logging.info(f'  Total: {total:.1f}s')
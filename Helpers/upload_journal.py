@@ -0,0 +1,121 @@
+import os
+import io
+import logging
+import threading
+import pandas as pd
+
+
+class UploadJournal:
+    """
+    Append-only record of the form rows uploaded to RE.
+
+    Each uploaded row is appended as one JSON line to ``<path>.journal``. Every ``compact_every`` rows, the journal
+    is rotated and merged into the ``<path>`` parquet file in a background thread, so a row costs one small write
+    instead of a rewrite of the whole parquet file.
+    """
+
+    def __init__(self, path, compact_every=500):
+        self.path = path
+        self.journal_path = f'{path}.journal'
+        self.compacting_path = f'{path}.journal.compacting'
+        self.compact_every = compact_every
+        self.appended = 0
+        self.lock = threading.Lock()
+        self.compaction = None
+
+        # Finish a compaction which was interrupted in an earlier run
+        if os.path.exists(self.compacting_path):
+            self.compact()
+
+        # IDs uploaded so far, including those of an earlier run
+        self.ids = self.load_ids()
+
+    def load_ids(self):
+        logging.info('Loading IDs of the data uploaded')
+
+        ids = set()
+
+        try:
+            ids.update(pd.read_parquet(self.path, columns=['ID'])['ID'].to_list())
+        except Exception:
+            pass
+
+        # Rows which weren't compacted yet
+        df = self.read_journal(self.journal_path)
+
+        if not df.empty:
+            ids.update(df['ID'].to_list())
+
+        return ids
+
+    @staticmethod
+    def read_journal(path):
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return pd.DataFrame()
+
+        with open(path, encoding='utf-8') as journal:
+            return pd.read_json(io.StringIO(journal.read()), lines=True, dtype=False, convert_dates=False)
+
+    def append(self, df):
+        lines = df.to_json(orient='records', lines=True, date_format='iso')
+
+        with self.lock:
+            with open(self.journal_path, 'a', encoding='utf-8') as journal:
+                journal.write(lines if lines.endswith('\n') else lines + '\n')
+
+            self.ids.update(df['ID'].to_list())
+            self.appended += len(df)
+
+            # Compact in the background once enough rows are appended
+            if self.appended >= self.compact_every and not self.is_compacting():
+                self.appended = 0
+                self.compaction = threading.Thread(target=self.compact, daemon=True)
+                self.compaction.start()
+
+    def is_compacting(self):
+        return self.compaction is not None and self.compaction.is_alive()
+
+    def compact(self):
+        logging.info('Compacting the journal of data uploaded')
+
+        # New rows go to a fresh journal while the rotated one is merged
+        with self.lock:
+            if os.path.exists(self.journal_path) and not os.path.exists(self.compacting_path):
+                os.replace(self.journal_path, self.compacting_path)
+
+        journal = self.read_journal(self.compacting_path)
+
+        if not journal.empty:
+            try:
+                data_uploaded = pd.read_parquet(self.path)
+            except Exception:
+                data_uploaded = pd.DataFrame()
+
+            journal['Class of'] = pd.to_numeric(journal['Class of'], errors='coerce')
+
+            # Dates are stored as ISO strings in the journal
+            for column in data_uploaded.select_dtypes(include=['datetime', 'datetimetz']).columns:
+                if column in journal.columns:
+                    journal[column] = pd.to_datetime(journal[column], errors='coerce', utc=True)
+
+                    if data_uploaded[column].dt.tz:
+                        journal[column] = journal[column].dt.tz_convert(data_uploaded[column].dt.tz)
+                    else:
+                        journal[column] = journal[column].dt.tz_localize(None)
+
+            data_uploaded = pd.concat([data_uploaded, journal], axis=0, ignore_index=True)
+            data_uploaded = data_uploaded.drop_duplicates('ID').copy()
+
+            # Write to a temporary file first, so that a crash never leaves a half-written parquet file
+            data_uploaded.to_parquet(f'{self.path}.tmp', index=False)
+            os.replace(f'{self.path}.tmp', self.path)
+
+        if os.path.exists(self.compacting_path):
+            os.remove(self.compacting_path)
+
+    def close(self):
+        # Wait for any background compaction, then merge what's left
+        if self.compaction is not None:
+            self.compaction.join()
+
+        self.compact()
@@ -0,0 +1,72 @@
+import sys
+import threading
+import pandas as pd
+
+from collections import OrderedDict
+
+
+def get_size(value):
+    # Rough memory used by a result: DataFrames and Series in full, and containers of them
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum()) if isinstance(value, pd.DataFrame) else \
+            int(value.memory_usage(deep=True))
+
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(get_size(k) + get_size(v) for k, v in value.items())
+
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(get_size(x) for x in value)
+
+    return sys.getsizeof(value)
+
+
+class ViewCache:
+    """
+    Results memoised by a key, e.g. the filters of a dashboard page, for every session of the app to share. The
+    least recently used results are dropped once all of them take more than ``max_bytes``.
+
+    Results are shared, so they shouldn't be changed once they're returned.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, compute):
+        # The result for key, from the cache or else from compute()
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+
+            self.misses += 1
+
+        # Computed outside the lock, so that other sessions aren't held up meanwhile
+        value = compute()
+        size = get_size(value)
+
+        with self.lock:
+            if key in self.entries or size > self.max_bytes:
+                return value
+
+            self.entries[key] = (value, size)
+            self.bytes += size
+
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.bytes -= evicted_size
+
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
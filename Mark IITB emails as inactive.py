@@ -15,9 +15,8 @@ from email.mime.application import MIMEApplication
 from jinja2 import Environment
 from datetime import datetime
 from datetime import time
-from requests.adapters import HTTPAdapter
-from urllib3 import Retry
 from dotenv import load_dotenv
+from Helpers.sky_api import SkyApiClient, log_request_counts
 
 # Set current directory
 def set_current_directory():
@@ -43,22 +42,10 @@ def stop_logging():
 def set_api_request_strategy():
     logging.info('Setting API Request strategy')
 
-    global http
+    global sky_api
 
-    # API Request strategy
-    logging.info('Setting API Request Strategy')
-
-    retry_strategy = Retry(
-        total=3,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=['HEAD', 'GET', 'OPTIONS'],
-        backoff_factor=10
-    )
-
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    http = requests.Session()
-    http.mount('https://', adapter)
-    http.mount('http://', adapter)
+    # Shared SKY API client
+    sky_api = SkyApiClient(RE_API_KEY)
 
 
 def get_env_variables():
@@ -190,34 +177,13 @@ def attach_file_to_email(message, filename):
     message.attach(file_attachment)
 
 
-def retrieve_token():
-    global access_token
-
-    logging.info('Retrieve token for API connections')
-
-    with open('access_token_output.json') as access_token_output:
-        data = json.load(access_token_output)
-        access_token = data['access_token']
-
-
 def patch_request_re(url, params):
 
     global re_api_response
 
     logging.info('Running Patch Request from RE function')
 
-    # Retrieve access_token from file
-    retrieve_token()
-
-    # Request Headers for Blackbaud API request
-    headers = {
-        # Request headers
-        'Bb-Api-Subscription-Key': RE_API_KEY,
-        'Authorization': 'Bearer ' + access_token,
-        'Content-Type': 'application/json'
-    }
-
-    re_api_response = http.patch(url, headers=headers, data=json.dumps(params))
+    re_api_response = sky_api.patch(url, params)
 
 def get_iitb_emails():
 
@@ -271,6 +237,9 @@ except Exception as Argument:
 
 finally:
 
+    # Log SKY API usage
+    log_request_counts()
+
     # Stop Logging
     stop_logging()
 
@@ -0,0 +1,42 @@
+import argparse
+import pandas as pd
+
+from Helpers.email_index import get_email_matches, resolve_emails
+
+def get_arguments():
+    
+    parser = argparse.ArgumentParser(description='Look up the Raisers Edge IDs of a CSV file of email addresses')
+    parser.add_argument('input', help='CSV file with the email addresses')
+    parser.add_argument('output', help='CSV file to write, with the IDs added to each row')
+    parser.add_argument('--column', default='email', help='Column with the email addresses (default: %(default)s)')
+    parser.add_argument('--emails', default='Databases/System Record IDs',
+                        help='Emails downloaded from RE (default: %(default)s)')
+    parser.add_argument('--chunk-size', type=int, default=100000,
+                        help='Rows read and written at a time (default: %(default)s)')
+    
+    return parser.parse_args()
+
+def resolve_file(args):
+    
+    matches = get_email_matches(pd.read_parquet(args.emails, columns=['address', 'constituent_id', 'primary', 'inactive']))
+    
+    rows = found = ambiguous = 0
+    
+    # Written a chunk at a time, so large files aren't held in memory
+    for i, chunk in enumerate(pd.read_csv(args.input, dtype=str, chunksize=args.chunk_size)):
+        
+        if args.column not in chunk:
+            raise ValueError(f'{args.input} has no column {args.column}')
+        
+        chunk = resolve_emails(chunk, args.column, matches)
+        chunk.to_csv(args.output, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        
+        rows += len(chunk)
+        found += int((chunk['matches'] > 0).sum())
+        ambiguous += int(chunk['is_ambiguous'].sum())
+        
+        print(f'Resolved {rows:,} emails')
+    
+    print(f'{found:,} of {rows:,} emails found in RE, {ambiguous:,} of them on more than one record')
+
+resolve_file(get_arguments())
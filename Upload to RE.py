@@ -5,7 +5,9 @@ import glob
 import re
 import datetime
 import logging
-import time
+import argparse
+import asyncio
+import contextvars
 import random
 import string
 import msal
@@ -14,13 +16,47 @@ import pandas as pd
 import numpy as np
 
 from datetime import datetime
-from requests.adapters import HTTPAdapter
-from urllib3 import Retry
 from dotenv import load_dotenv
-from fuzzywuzzy import process
 from nameparser import HumanName
 from datetime import date
 from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from Helpers.sky_api import SkyApiClient, log_request_counts
+from Helpers.sky_api_async import AsyncSkyApiClient
+from Helpers.upload_journal import UploadJournal
+from Helpers.form_record import FormRecord
+from Helpers.fuzzy_match import get_scores, find_missing, find_existing, dedupe
+from Helpers.phone_numbers import canonicalise, get_country_code
+from Helpers.degree_index import DegreeIndex
+from Helpers.re_mirror import ReMirror, MIRRORED_RESOURCES
+
+
+# Sub-resources of a constituent that are compared against the form data
+RE_SUB_RESOURCES = {
+    'constituent': '',
+    'emailaddresses': '/emailaddresses',
+    'phones': '/phones',
+    'relationships': '/relationships',
+    'addresses': '/addresses',
+    'educations': '/educations',
+    'constituentcodes': '/constituentcodes'
+}
+
+# Per-run cache of prefetched RE responses, keyed by (constituent_id, resource)
+re_cache = {}
+
+# When set to a list, POST and PATCH requests are collected in it instead of being sent
+pending_writes = contextvars.ContextVar('pending_writes', default=None)
+
+# Same for the emails about differences in RE, while the updates are only being planned
+pending_emails = contextvars.ContextVar('pending_emails', default=None)
+
+# RE degrees of the degrees in the form, loaded once per run
+degree_index = DegreeIndex('Databases/Degrees')
+
+# Local copy of the RE data to compare against (see Sync RE Mirror.py), and the constituents updated since it synced
+re_mirror = None
+mirror_stale = set()
 
 
 def set_current_directory():
@@ -62,28 +98,17 @@ def housekeeping():
 def set_api_request_strategy():
     logging.info('Setting API Request strategy')
 
-    global http
-
-    # API Request strategy
-    logging.info('Setting API Request Strategy')
+    global sky_api
 
-    retry_strategy = Retry(
-        total=3,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=['HEAD', 'GET', 'OPTIONS'],
-        backoff_factor=10
-    )
-
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    http = requests.Session()
-    http.mount('https://', adapter)
-    http.mount('http://', adapter)
+    # Keep enough pooled connections for every worker, with one token bucket sized to the SKY API quota
+    sky_api = SkyApiClient(RE_API_KEY, rate_limit=RE_API_RATE_LIMIT, pool_size=UPLOAD_WORKERS + PREFETCH_WORKERS)
 
 
 def get_env_variables():
     logging.info('Setting Environment variables')
 
-    global RE_API_KEY, O_CLIENT_ID, CLIENT_SECRET, TENANT_ID, FROM, CC_TO, ERROR_EMAILS_TO, SEND_TO, FORM_URL
+    global RE_API_KEY, O_CLIENT_ID, CLIENT_SECRET, TENANT_ID, FROM, CC_TO, ERROR_EMAILS_TO, SEND_TO, FORM_URL, \
+        RE_API_RATE_LIMIT, UPLOAD_WORKERS, PREFETCH_SIZE, PREFETCH_WORKERS, ASYNC_CONCURRENCY, RE_MIRROR_MAX_AGE
 
     load_dotenv()
 
@@ -96,6 +121,12 @@ def get_env_variables():
     CC_TO = eval(os.getenv('CC_TO'))
     ERROR_EMAILS_TO = eval(os.getenv('ERROR_EMAILS_TO'))
     FORM_URL = os.getenv('FORM_URL')
+    RE_API_RATE_LIMIT = float(os.getenv('RE_API_RATE_LIMIT', 5))  # Requests per second
+    UPLOAD_WORKERS = int(os.getenv('UPLOAD_WORKERS', 1))
+    PREFETCH_SIZE = int(os.getenv('PREFETCH_SIZE', 20))  # Form rows to prefetch RE data for at once
+    PREFETCH_WORKERS = int(os.getenv('PREFETCH_WORKERS', 8))
+    ASYNC_CONCURRENCY = int(os.getenv('ASYNC_CONCURRENCY', 10))  # Requests in flight per endpoint family
+    RE_MIRROR_MAX_AGE = float(os.getenv('RE_MIRROR_MAX_AGE', 24))  # Hours since the mirror was synced
 
 
 def send_error_emails(subject):
@@ -235,16 +266,6 @@ def get_recipients(email_list):
     return value
 
 
-def retrieve_token():
-    global access_token
-
-    logging.info('Retrieve token for API connections')
-
-    with open('access_token_output.json') as access_token_output:
-        data = json.load(access_token_output)
-        access_token = data['access_token']
-
-
 def download_excel(url):
     logging.info('Downloading responses from Microsoft Forms')
 
@@ -278,11 +299,11 @@ def load_data(file):
     return data
 
 
-def find_remaining_data(all_df, partial_df):
-    logging.info('Identifying missing data between two Panda Dataframes')
+def find_remaining_data(all_df, uploaded_ids):
+    logging.info('Identifying data which is yet to be uploaded')
 
-    # Identify data present in all_df but missing in partial_df
-    remaining_data = all_df[~all_df['ID'].isin(partial_df['ID'])].copy()
+    # Identify data present in all_df but not uploaded yet
+    remaining_data = all_df[~all_df['ID'].isin(uploaded_ids)].copy()
 
     return remaining_data
 
@@ -300,78 +321,96 @@ def check_errors(re_api_response):
 def get_request_re(url, params):
     logging.info('Running GET Request from RE function')
 
-    global re_api_response
-
-    # Retrieve access_token from file
-    retrieve_token()
-
-    # Request headers
-    headers = {
-        'Bb-Api-Subscription-Key': RE_API_KEY,
-        'Authorization': 'Bearer ' + access_token,
-    }
-
-    re_api_response = http.get(url, params=params, headers=headers).json()
+    re_api_response = sky_api.get(url, params)
 
     logging.info(re_api_response)
 
     # check_errors(re_api_response)
 
-    # Sleep for 5 seconds
-    logging.info('Sleeping for 5 seconds')
-    time.sleep(5)
+    return re_api_response
 
 
 def post_request_re(url, params):
     logging.info('Running POST Request to RE function')
 
-    global re_api_response
-
-    # Retrieve access_token from file
-    retrieve_token()
-
-    # Request headers
-    headers = {
-        'Bb-Api-Subscription-Key': RE_API_KEY,
-        'Authorization': 'Bearer ' + access_token,
-        'Content-Type': 'application/json',
-    }
+    # Collect the request instead of sending it when writes are deferred
+    writes = pending_writes.get()
+    if writes is not None:
+        writes.append(('POST', url, params))
+        return {}
 
-    re_api_response = http.post(url, params=params, headers=headers, json=params).json()
+    re_api_response = sky_api.post(url, params)
 
     logging.info(re_api_response)
 
     # check_errors(re_api_response)
 
-    # Sleep for 5 seconds
-    logging.info('Sleeping for 5 seconds')
-    time.sleep(5)
+    return re_api_response
 
 
 def patch_request_re(url, params):
     logging.info('Running PATCH Request to RE function')
 
-    global re_api_response
-
-    # Retrieve access_token from file
-    retrieve_token()
-
-    # Request headers
-    headers = {
-        'Bb-Api-Subscription-Key': RE_API_KEY,
-        'Authorization': 'Bearer ' + access_token,
-        'Content-Type': 'application/json'
-    }
+    # Collect the request instead of sending it when writes are deferred
+    writes = pending_writes.get()
+    if writes is not None:
+        writes.append(('PATCH', url, params))
+        return {}
 
-    re_api_response = http.patch(url, headers=headers, data=json.dumps(params))
+    re_api_response = sky_api.patch(url, params)
 
     logging.info(re_api_response)
 
     # check_errors(re_api_response)
 
-    # Sleep for 5 seconds
-    logging.info('Sleeping for 5 seconds')
-    time.sleep(5)
+    return re_api_response
+
+
+def get_re_data(constituent_id, resource):
+    logging.info(f'Getting {resource} of {constituent_id} from RE')
+
+    # Use the prefetched response when there's one (each is used only once, so later reads see fresh data)
+    re_api_response = re_cache.pop((constituent_id, resource), None)
+
+    # Else the mirror, unless the constituent was updated in this run
+    if re_api_response is None and is_mirrored(constituent_id, resource):
+        re_api_response = re_mirror.get(constituent_id, resource)
+
+    if re_api_response is None:
+        url = f'https://api.sky.blackbaud.com/constituent/v1/constituents/{constituent_id}{RE_SUB_RESOURCES[resource]}'
+        params = {}
+
+        re_api_response = get_request_re(url, params)
+
+    return re_api_response
+
+
+def is_mirrored(constituent_id, resource):
+    return re_mirror is not None and resource in MIRRORED_RESOURCES and constituent_id not in mirror_stale
+
+
+def get_live_resources():
+    # Resources which have to be requested from RE
+    return [x for x in RE_SUB_RESOURCES if not (re_mirror is not None and x in MIRRORED_RESOURCES)]
+
+
+def prefetch_re_data(constituent_ids):
+    logging.info(f'Prefetching RE data of {len(constituent_ids)} constituents')
+
+    def fetch(constituent_id, resource):
+        url = f'https://api.sky.blackbaud.com/constituent/v1/constituents/{constituent_id}{RE_SUB_RESOURCES[resource]}'
+
+        try:
+            re_cache[(constituent_id, resource)] = get_request_re(url, {})
+        except Exception as error:
+            # The update functions will request it again
+            logging.info(f'Unable to prefetch {resource} of {constituent_id}: {error}')
+
+    with ThreadPoolExecutor(max_workers=PREFETCH_WORKERS) as executor:
+        for constituent_id in set(constituent_ids):
+            for resource in get_live_resources():
+                if not is_mirrored(constituent_id, resource):
+                    executor.submit(fetch, constituent_id, resource)
 
 
 def add_county(county):
@@ -470,25 +509,11 @@ def add_tags(source, tag, update, constituent_id):
     post_request_re(url, params)
 
 
-def update_emails(each_row, constituent_id):
+def update_emails(record, constituent_id):
     logging.info('Proceeding to update Email')
 
-    # Convert all values to lower-case
-    each_row = each_row.map(lambda x: x.lower() if isinstance(x, str) else x)
-
-    # Get email address list
-    email_list = each_row[['Email 1', 'Email 2', 'Email 3']].T
-    email_list.columns = ['Email']
-    email_list = email_list[['Email']].reset_index(drop=True).dropna()
-
-    # Convert all values to lower-case
-    email_list = email_list.map(lambda x: x.lower() if isinstance(x, str) else x)
-
     # Get Email address present in RE
-    url = f'https://api.sky.blackbaud.com/constituent/v1/constituents/{constituent_id}/emailaddresses'
-    params = {}
-
-    get_request_re(url, params)
+    re_api_response = get_re_data(constituent_id, 'emailaddresses')
 
     # Load to Dataframe
     re_data = api_to_df(re_api_response).copy()
@@ -498,30 +523,22 @@ def update_emails(each_row, constituent_id):
         # Convert all values to lower-case
         re_data = re_data.map(lambda x: x.lower() if isinstance(x, str) else x)
 
-        re_email = re_data[['address']]
-        re_email.columns = ['Email']
-
-        # Convert all values to lower-case
-        re_email = re_email.map(lambda x: x.lower() if isinstance(x, str) else x)
+        re_email = set(re_data['address'])
 
         # Find missing Email Addresses
-        merged_df = pd.merge(email_list, re_email, how='outer', indicator=True)
-        missing_values = merged_df.loc[merged_df['_merge'] == 'left_only', email_list.columns]
-
-        missing_values = pd.DataFrame(missing_values).reset_index(drop=True)
+        missing_values = [email for email in record.emails if email not in re_email]
 
     except:
-        missing_values = pd.DataFrame(email_list).reset_index(drop=True)
+        missing_values = list(record.emails)
 
     # Get Data source (Limiting to 50 characters)
-    source = f"{each_row['Enter the source of your data?'][0].title().replace('-', '_')} - Auto | Email"[:50]
+    source = f"{record.source_title.replace('-', '_')} - Auto | Email"[:50]
 
     # Check if there's any new email address to add and that the existing email address (to be updated) is not empty and that the source is not Live Alumni
-    if len(missing_values) == 0 and not pd.isna(each_row.loc[0]['Email 1']) and \
-            each_row['Enter the source of your data?'][0].title() != 'Live Alumni':
+    if len(missing_values) == 0 and record.email_1 is not None and record.source_title != 'Live Alumni':
 
         ## Mark existing email as primary
-        email = each_row['Email 1'][0]
+        email = record.email_1
 
         email_address_id = int(re_data[re_data['address'] == email]['id'].reset_index(drop=True)[0])
 
@@ -539,7 +556,7 @@ def update_emails(each_row, constituent_id):
     else:
 
         if len(missing_values) == 1:
-            email = str(missing_values['Email'][0])
+            email = str(missing_values[0])
 
             # Type of email
             if '@iitb.ac.in' in email or '@iitbombay.org' in email or '@sjmsom.in' in email:
@@ -549,7 +566,7 @@ def update_emails(each_row, constituent_id):
                 email_type = 'Email'
 
             # Check if the source is Live Alumni
-            if each_row['Enter the source of your data?'][0].title() == 'Live Alumni':
+            if record.source_title == 'Live Alumni':
 
                 params = {
                     'address': email,
@@ -576,17 +593,16 @@ def update_emails(each_row, constituent_id):
             add_tags(source, 'Sync source', email, constituent_id)
 
             ## Verified Tags
-            if each_row['Enter the source of your data?'][0].title() != 'Live Alumni':
+            if record.source_title != 'Live Alumni':
                 add_tags(email, 'Verified Email', source, constituent_id)
 
         else:
 
             ## Upload Missing Email Address
             i = 0
-            for index, row in missing_values.iterrows():
-                row = pd.DataFrame(row).T.reset_index(drop=True)
+            for email in missing_values:
 
-                email = str(row['Email'][0])
+                email = str(email)
 
                 # Type of email
                 if '@iitb.ac.in' in email or '@iitbombay.org' in email or '@sjmsom.in' in email:
@@ -627,19 +643,19 @@ def update_emails(each_row, constituent_id):
                     add_tags(email, 'Verified Email', source, constituent_id)
 
 
-def update_event(row, re_id):
+def update_event(record, re_id):
     logging.info('Proceeding to update Phone Numbers')
 
-    if row.loc[0]['Is an Event?'] == 'Yes':
+    if record.is_event == 'Yes':
 
-        event_date = row.loc[0]['Event Date']
+        event_date = record.event_date
         event_date = pd.to_datetime(event_date).isoformat()
 
         params = {
             'category': 'Events Attended',
             'comment': f'Updated on {datetime.now()}'[:50],
             'parent_id': re_id,
-            'value': row.loc[0]['Enter the source of your data?'][:50],
+            'value': record.source[:50],
             'date': event_date
         }
 
@@ -648,72 +664,51 @@ def update_event(row, re_id):
         post_request_re(url, params)
 
 
-def update_phones(each_row, constituent_id):
+def update_phones(record, constituent_id):
     logging.info('Proceeding to update Phone Numbers')
 
     # Get phone number list
-    phone_1 = each_row.loc[0]['Phone number 1']
-    phone_2 = each_row.loc[0]['Phone number 2']
-    phone_3 = each_row.loc[0]['Phone number 3']
-
-    phone_list = [phone_1, phone_2, phone_3]
-    phone_list = [item for item in phone_list if not (pd.isnull(item)) == True]
-    phone_list = [str(x) for x in phone_list]
+    phone_list = record.phones
 
     # Get Phone Numbers present in RE
-    url = f'https://api.sky.blackbaud.com/constituent/v1/constituents/{constituent_id}/phones'
-    params = {}
+    re_api_response = get_re_data(constituent_id, 'phones')
 
-    get_request_re(url, params)
+    # Numbers without a country code are taken to be from the constituent's country
+    default_code = get_country_code(record.country)
 
-    # Load to a list
-    re_data_complete = api_to_df(re_api_response).copy()
-    re_data = []
-    re_data_unformatted = []
-    for each_phone in re_api_response['value']:
-        try:
-            phones = each_phone['number']
-            re_data_unformatted.append(phones)
-            phones = re.sub("[^0-9]", "", (each_phone['number']))
-            re_data.append(phones)
-        except:
-            pass
+    # Index the phone numbers in RE by their E.164 key
+    re_data = {}
+    for each_phone in re_api_response.get('value', []):
+        key = canonicalise(each_phone.get('number'), default_code)
+
+        if key is not None:
+            re_data.setdefault(key, each_phone)
 
-    # Find missing phone numbers
-    missing_values = []
+    # Find missing phone numbers, without duplicates
+    missing = {}
     for each_phone in phone_list:
-        try:
-            likely_phone, score = process.extractOne(each_phone, re_data)
-            if score <= 80:
-                missing_values.append(each_phone)
-        except:
-            missing_values.append(each_phone)
+        key = canonicalise(each_phone, default_code)
 
-    # Making sure that there are no duplicates in the missing list
-    if missing_values != []:
-        missing_values = [str(x) for x in missing_values]
-        missing = list(process.dedupe(missing_values, threshold=80))
-        missing_values = missing
+        if key is not None and key not in re_data:
+            missing.setdefault(key, each_phone)
+
+    missing_values = list(missing.values())
 
     # Get Data source (Limiting to 50 characters)
-    source = f"{each_row.loc[0]['Enter the source of your data?'].title().replace('-', '_')} - Auto | Phone"[:50]
+    source = f"{record.source_title.replace('-', '_')} - Auto | Phone"[:50]
+
+    # RE number of the form's first phone number, if it's in RE
+    re_phone = re_data.get(canonicalise(record.phone_1, default_code)) if record.phone_1 is not None else None
 
     # Check if there's any new phone number to add and that the existing phone number (to be updated) is not empty
-    if missing_values == [] and not pd.isna(each_row.loc[0]['Phone number 1']) and each_row.loc[0][
-        'Enter the source of your data?'].title() != 'Live Alumni':
+    if missing_values == [] and re_phone is not None and record.source_title != 'Live Alumni':
+
+        logging.info([x['number'] for x in re_data.values()])
 
-        logging.info(re_data_unformatted)
         # Mark existing phone number as primary
-        for each_phone in re_data_unformatted:
-            try:
-                likely_phone, score = process.extractOne(each_phone, re_data)
-                if score >= 80:
-                    phone = each_phone
-                    break
-            except:
-                pass
+        phone = re_phone['number']
 
-        phone_id = int(re_data_complete[re_data_complete['number'] == phone]['id'].reset_index(drop=True)[0])
+        phone_id = int(re_phone['id'])
 
         url = f'https://api.sky.blackbaud.com/constituent/v1/phones/{phone_id}'
 
@@ -741,7 +736,7 @@ def update_phones(each_row, constituent_id):
 
             if len(str(phone)) != 0:
 
-                if i == 0 and each_row.loc[0]['Enter the source of your data?'].title() != 'Live Alumni':
+                if i == 0 and record.source_title != 'Live Alumni':
 
                     params = {
                         'number': phone,
@@ -769,21 +764,17 @@ def update_phones(each_row, constituent_id):
                 add_tags(source, 'Sync source', phone, constituent_id)
 
                 ## Verified Tags
-                if each_row.loc[0]['Enter the source of your data?'].title() != 'Live Alumni':
+                if record.source_title != 'Live Alumni':
                     add_tags(phone, 'Verified Phone', source, constituent_id)
 
 
-def update_employment(each_row, constituent_id):
+def update_employment(record, constituent_id):
     logging.info('Proceeding to update Employment')
 
     # Get existing relationships in RE
 
     ## Get relationship from RE
-    url = f'https://api.sky.blackbaud.com/constituent/v1/constituents/{constituent_id}/relationships'
-    params = {}
-
-    ### API request
-    get_request_re(url, params)
+    re_api_response = get_re_data(constituent_id, 'relationships')
 
     ### Load to DataFrame
     re_data = api_to_df(re_api_response).copy()
@@ -809,81 +800,62 @@ def update_employment(each_row, constituent_id):
     re_employer_list = [item for item in re_employer_list if not (pd.isnull(item)) == True]
 
     # Get the new data
-    employee_details = each_row[['Organization Name', 'Position', 'Start Date', 'End Date']].reset_index(
-        drop=True).fillna('').replace('NA', '').replace('na', '').replace('Other', '').replace('other', '').replace(0,
-                                                                                                                    '')
-    employee_list = employee_details['Organization Name'].to_list()
+    employee_list = [record.organization]
 
-    ### Drop NaN values
-    employee_list = [item for item in employee_list if not (pd.isnull(item)) == True]
+    # Score the new org names against those in RE
+    scores = get_scores(employee_list, re_employer_list)
 
     # Find Org names that have to be updated
-    missing_values = []
-    for each_org in employee_list:
-        try:
-            likely_org, score = process.extractOne(each_org, re_employer_list)
-            if score <= 90:
-                missing_values.append(each_org)
-        except:
-            missing_values.append(each_org)
+    missing_values = find_missing(employee_list, re_employer_list, 90, scores)
 
     # Making sure that there are no duplicates in the missing list
     if missing_values != []:
-        missing_values = [str(x) for x in missing_values]
-        missing = list(process.dedupe(missing_values, threshold=90))
-        missing_values = missing
+        missing_values = dedupe(missing_values, threshold=90)
 
     # Get Data source (Limiting to 50 characters)
-    source = f"{each_row.loc[0]['Enter the source of your data?'].title().replace('-', '_')} - Auto | Employment"[:50]
+    source = f"{record.source_title.replace('-', '_')} - Auto | Employment"[:50]
 
     # Get dates
     try:
-        start_day = int(employee_details.loc[0]['Start Date'].day)
+        start_day = int(record.start_date.day)
     except:
         start_day = ''
 
     try:
-        start_month = int(employee_details.loc[0]['Start Date'].month)
+        start_month = int(record.start_date.month)
     except:
         start_month = ''
 
     try:
-        start_year = int(employee_details.loc[0]['Start Date'].year)
+        start_year = int(record.start_date.year)
     except:
         start_year = ''
 
     try:
-        end_day = int(employee_details.loc[0]['End Date'].day)
+        end_day = int(record.end_date.day)
     except:
         end_day = ''
 
     try:
-        end_month = int(employee_details.loc[0]['End Date'].month)
+        end_month = int(record.end_date.month)
     except:
         end_month = ''
 
     try:
-        end_year = int(employee_details.loc[0]['End Date'].year)
+        end_year = int(record.end_date.year)
     except:
         end_year = ''
 
     # Check if there's any new organisations to add and that the existing org name (to be updated) is not empty
-    if missing_values == [] and not pd.isna(each_row.loc[0]['Organization Name']):
+    if missing_values == [] and record.organization != '':
 
         # Mark existing org as primary
-        for each_org in re_employer_list:
-            try:
-                likely_org, score = process.extractOne(each_org, employee_list)
-                if score >= 90:
-                    org = each_org
-                    break
-            except:
-                pass
+        org = find_existing(employee_list, re_employer_list, 90, scores)
 
         relationship_id = re_data[re_data['name'] == org]['id'].reset_index(drop=True)[0]
 
         # Check if designation needs an update
-        designation = str(employee_details.loc[0]['Position'])
+        designation = record.position
 
         re_designation = str(re_data[re_data['id'] == relationship_id].iloc[0]['position'])
 
@@ -921,35 +893,29 @@ def update_employment(each_row, constituent_id):
 
         ## Check if the new org is not NaN
         empty_values = ['na', 'other']
-        if not any(x in str(employee_details.loc[0]['Organization Name']).lower() for x in empty_values) and len(
-                str(employee_details.loc[0]['Organization Name'])) != 0 and str(
-                employee_details.loc[0]['Organization Name']) != 0:
-
-            # if str(employee_details.loc[0]['Organization Name']) != '' or str(employee_details.loc[0]['Organization Name']) != 'NA' or str(employee_details.loc[0]['Organization Name']) != 'na' or str(employee_details.loc[0]['Organization Name']) != 'Other' or str(employee_details.loc[0]['Organization Name']) != 0:
+        if not any(x in record.organization.lower() for x in empty_values) and len(record.organization) != 0:
 
             url = 'https://api.sky.blackbaud.com/constituent/v1/relationships'
 
             ## Check if organisation is a University
             school_matches = ['school', 'college', 'university', 'institute', 'iit', 'iim']
 
-            if any(x in str(employee_details.loc[0]['Organization Name']).lower() for x in school_matches):
+            if any(x in record.organization.lower() for x in school_matches):
                 relationship = 'University'
 
             else:
                 relationship = 'Employer'
 
             # Check if position is NA
-            if any(x in str(employee_details.loc[0]['Position']).lower() for x in empty_values) or str(
-                    employee_details.loc[0]['Position']) == 0 or len(
-                    str(employee_details.loc[0]['Position']).strip()) == 0:
+            if any(x in record.position.lower() for x in empty_values) or len(record.position.strip()) == 0:
                 position = ''
             else:
-                position = str(employee_details.loc[0]['Position'])[:50]
+                position = record.position[:50]
 
             params = {
                 'constituent_id': constituent_id,
                 'relation': {
-                    'name': str(employee_details.loc[0]['Organization Name'])[:60],
+                    'name': record.organization[:60],
                     'type': 'Organization'
                 },
                 'position': position,
@@ -976,18 +942,14 @@ def update_employment(each_row, constituent_id):
             post_request_re(url, params)
 
             ## Update Tags
-            add_tags(source, 'Sync Source', str(employee_details.loc[0]['Organization Name'])[:50], constituent_id)
+            add_tags(source, 'Sync Source', record.organization[:50], constituent_id)
 
 
-def update_address(each_row, constituent_id):
+def update_address(record, constituent_id):
     logging.info('Proceeding to update Address')
 
     # Get addresses present in RE
-    url = f'https://api.sky.blackbaud.com/constituent/v1/constituents/{constituent_id}/addresses'
-    params = {}
-
-    ## API request
-    get_request_re(url, params)
+    re_api_response = get_re_data(constituent_id, 'addresses')
 
     ### Load to DataFrame
     re_data = api_to_df(re_api_response).copy()
@@ -1002,52 +964,26 @@ def update_address(each_row, constituent_id):
     re_address_list = [item for item in re_address_list if not (pd.isnull(item)) == True]
 
     # Get the new data
-    address_data = pd.DataFrame(each_row[['Address Lines', 'City', 'State', 'Country', 'Postal Code']])
-    address_data = address_data.reset_index(drop=True).fillna('').replace('NA', '').replace('Other', '').replace('na',
-                                                                                                                 '').replace(
-        'other', '').replace('0', '').replace('0.0', '')
-    address_data['Address'] = address_data['Address Lines'].astype(str) + ' ' + address_data['City'].astype(str) + ' ' + \
-                              address_data['State'].astype(str) + ' ' + address_data['Country'].astype(str) + ' ' + \
-                              address_data['Postal Code'].astype(str)
-    address_data = address_data.replace(to_replace=['\r\n', '\t', '\n'], value=', ', regex=True)
-    address_data = address_data.replace(to_replace=['  '], value=' ', regex=True)
-    address_list = address_data['Address'].to_list()
+    address_list = [record.address]
 
-    ### Drop NaN values
-    address_list = [item for item in address_list if not (pd.isnull(item)) == True]
+    # Score the new address against those in RE
+    scores = get_scores(address_list, re_address_list)
 
     # Find Address that have to be updated
-    missing_values = []
-    if address_list != []:
-        for each_address in address_list:
-            try:
-                likely_org, score = process.extractOne(each_address, re_address_list)
-                if score <= 90:
-                    missing_values.append(each_address)
-            except:
-                missing_values.append(each_address)
+    missing_values = find_missing(address_list, re_address_list, 90, scores)
 
     # Making sure that there are no duplicates in the missing list
     if missing_values != []:
-        missing_values = [str(x) for x in missing_values]
-        missing = list(process.dedupe(missing_values, threshold=90))
-        missing_values = missing
+        missing_values = dedupe(missing_values, threshold=90)
 
     # Get Data source (Limiting to 50 characters)
-    source = f"{each_row.loc[0]['Enter the source of your data?'].title().replace('-', '_')} - Auto | Address"[:50]
+    source = f"{record.source_title.replace('-', '_')} - Auto | Address"[:50]
 
     # Check if there's any new addresses to add and that the existing address (to be updated) is not empty
-    if missing_values == [] and not pd.isna(each_row.loc[0]['Address Lines']):
+    if missing_values == [] and record.address_lines != '':
 
-        # Mark existing org as primary
-        for each_address in re_address_list:
-            try:
-                likely_org, score = process.extractOne(each_address, address_list)
-                if score >= 90:
-                    address = each_address
-                    break
-            except:
-                pass
+        # Mark existing address as preferred
+        address = find_existing(address_list, re_address_list, 90, scores)
 
         address_id = re_data[re_data['formatted_address'] == address]['id'].reset_index(drop=True)[0]
 
@@ -1065,17 +1001,15 @@ def update_address(each_row, constituent_id):
         # Upload missing address details
         url = 'https://api.sky.blackbaud.com/constituent/v1/addresses'
 
-        each_row.fillna('', inplace=True)
-
         address_lines = str(address_list[0]).replace(', ', ', \r\n').replace('  ', ' ').replace('.0', '').strip()[:150]
-        city = str(each_row['City'][0])
-        state = str(each_row['State'][0])
-        country = str(each_row['Country'][0])
+        city = record.city
+        state = record.state
+        country = record.country
 
         try:
-            postal_code = int(str(each_row['Postal Code'][0]).replace('.0', ''))
+            postal_code = int(record.postal_code.replace('.0', ''))
         except:
-            postal_code = str(each_row['Postal Code'][0]).replace('.0', '')
+            postal_code = record.postal_code.replace('.0', '')
 
         if postal_code == 0:
             postal_code = ''
@@ -1103,43 +1037,40 @@ def update_address(each_row, constituent_id):
             for i in range(10):
                 params = del_blank_values_in_json(params.copy())
 
+            # When writes are deferred, the response is checked for the county once the request is sent, in
+            # send_update()
             try:
-                post_request_re(url, params)
+                re_api_response = post_request_re(url, params)
 
-            except:
+            except Exception as error:
+                re_api_response = error
 
-                if 'county of value' in str(re_api_response).lower():
-                    add_county(state)
-                    post_request_re(url, params)
-                else:
-                    raise Exception(f'API returned an error: {re_api_response}')
+                if 'county of value' not in str(error).lower():
+                    raise Exception(f'API returned an error: {error}')
+
+            if 'county of value' in str(re_api_response).lower():
+                add_county(state)
+                post_request_re(url, params)
 
             ## Update Tags
             add_tags(source, 'Sync source', str(address_list[0]).replace('.0', '').replace(' 0', '')[:50],
                      constituent_id)
 
 
-def update_education(each_row, constituent_id):
+def update_education(record, constituent_id):
     logging.info('Proceeding to update Education')
 
     # Get the new data
-    education_details = each_row[['Class of', 'Degree', 'Department', 'Hostel']].reset_index(drop=True)
-    education_class_of = int(str(education_details['Class of'][0]).replace('NA', '0').replace('\xa0', '0'))
-    education_degree = str(education_details['Degree'][0]).replace('0', '').replace('NA', '').replace('\xa0', '')
-    education_department = str(education_details['Department'][0]).replace('nan', '').replace('NA', '').replace('0',
-                                                                                                                '').replace(
-        '\xa0', '')
-    education_hostel = str(education_details['Hostel'][0]).replace('[', '').replace('"', '').replace(']', '').replace(
-        'NA', '').replace('\xa0', '')
+    education_class_of = record.class_of
+    education_degree = record.degree
+    education_department = record.department
+    education_hostel = record.hostel
 
     # Check if there's any new education Data to update
     if education_class_of != 0 and education_degree != '' and education_department != '' and education_hostel != '':
 
         # Get education present in RE
-        url = f'https://api.sky.blackbaud.com/constituent/v1/constituents/{constituent_id}/educations'
-        params = {}
-
-        get_request_re(url, params)
+        re_api_response = get_re_data(constituent_id, 'educations')
 
         # Load to a dataframe
         re_data = api_to_df(re_api_response).copy()
@@ -1174,7 +1105,7 @@ def update_education(each_row, constituent_id):
                     re_hostel = ''
 
                 # Get Data source (Limiting to 50 characters)
-                source = f"{each_row.loc[0]['Enter the source of your data?'].title().replace('-', '_')} - Auto | Education"[
+                source = f"{record.source_title.replace('-', '_')} - Auto | Education"[
                          :50]
 
                 # Get current year
@@ -1191,11 +1122,8 @@ def update_education(each_row, constituent_id):
                     class_of = education_class_of
 
                     # Degree
-                    degree_df = pd.read_parquet('Databases/Degrees')
-
                     if re_degree == 'Other' or re_degree == '':
-                        degree = degree_df[degree_df['Form Degrees'] == education_degree].reset_index(drop=True).loc[0][
-                            1]
+                        degree = degree_index[education_degree]
 
                     # Department
                     if re_department == '' or re_department == 'Other':
@@ -1237,11 +1165,8 @@ def update_education(each_row, constituent_id):
                     class_of = ''
 
                     # Degree
-                    degree_df = pd.read_parquet('Databases/Degrees')
-
                     if re_degree == 'Other' or re_degree == '':
-                        degree = degree_df[degree_df['Form Degrees'] == education_degree].reset_index(drop=True).loc[0][
-                            1]
+                        degree = degree_index[education_degree]
 
                     # Department
                     if re_department == '' or re_department == 'Other':
@@ -1283,25 +1208,24 @@ def update_education(each_row, constituent_id):
                 else:
                     # Different education exists than what's provided
                     re_data_html = re_data.to_html(index=False, classes='table table-stripped')
-                    each_row_html = each_row.to_html(index=False, classes='table table-stripped')
+                    each_row_html = record.to_frame().to_html(index=False, classes='table table-stripped')
                     send_mail_different_education(re_data_html, each_row_html,
-                                                  'Different education data exists in RE and the one provided by Alum')
+                                                  'Different education data exists in RE and the one provided by Alum',
+                                                  constituent_id)
 
             else:
 
                 # Multiple education exists than what's provided
                 re_data_html = re_data.to_html(index=False, classes='table table-stripped')
-                each_row_html = each_row.to_html(index=False, classes='table table-stripped')
-                send_mail_different_education(re_data_html, each_row_html, 'Multiple education data exists in RE')
+                each_row_html = record.to_frame().to_html(index=False, classes='table table-stripped')
+                send_mail_different_education(re_data_html, each_row_html, 'Multiple education data exists in RE',
+                                              constituent_id)
 
         except:
             # When no education exists in RE
 
-            # Degree
-            degree_df = pd.read_parquet('Databases/Degrees')
-
             # Get Data source (Limiting to 50 characters)
-            source = f"{each_row.loc[0]['Enter the source of your data?'].title().replace('-', '_')} - Auto | Education"[
+            source = f"{record.source_title.replace('-', '_')} - Auto | Education"[
                      :50]
 
             params = {
@@ -1314,7 +1238,7 @@ def update_education(each_row, constituent_id):
                 'date_left': {
                     'y': education_class_of
                 },
-                'degree': degree_df[degree_df['Form Degrees'] == education_degree].reset_index(drop=True).loc[0][1],
+                'degree': degree_index[education_degree],
                 'majors': [
                     education_department
                 ],
@@ -1337,9 +1261,15 @@ def update_education(each_row, constituent_id):
             add_tags(source, 'Sync source', str(params)[:50], constituent_id)
 
 
-def send_mail_different_education(re_data, each_row, subject):
+def send_mail_different_education(re_data, each_row, subject, constituent_id):
     logging.info('Sending email for different education')
 
+    # Collect the email instead of sending it when the updates are only being planned
+    emails = pending_emails.get()
+    if emails is not None:
+        emails.append({'helper': 'send_mail_different_education', 'args': [re_data, each_row, subject, constituent_id]})
+        return
+
     authority = f'https://login.microsoftonline.com/{TENANT_ID}'
 
     app = msal.ConfidentialClientApplication(
@@ -1410,12 +1340,11 @@ def send_mail_different_education(re_data, each_row, subject):
             logging.info(result.get('correlation_id'))
 
 
-def update_name(each_row, constituent_id):
+def update_name(record, constituent_id):
     logging.info('Proceeding to update Names')
 
     # Get the new data
-    name = each_row['Name2'][0]
-    name.replace('\r\n', ' ').replace('\t', ' ').replace('\n', ' ').replace('  ', ' ')
+    name = record.name
 
     # Get First, Middle and Last Name
     name = HumanName(str(name))
@@ -1431,10 +1360,7 @@ def update_name(each_row, constituent_id):
     title = str(name.title).title()
 
     # Get existing name from RE
-    url = f'https://api.sky.blackbaud.com/constituent/v1/constituents/{constituent_id}'
-    params = {}
-
-    get_request_re(url, params)
+    re_api_response = get_re_data(constituent_id, 'constituent')
 
     # Load to a DataFrame
     re_data = api_to_df(re_api_response).copy()
@@ -1482,7 +1408,7 @@ def update_name(each_row, constituent_id):
             patch_request_re(url, params)
 
             ## Update Tags
-            source = f"{each_row.loc[0]['Enter the source of your data?'].title().replace('-', '_')} - Auto | Name"[:50]
+            source = f"{record.source_title.replace('-', '_')} - Auto | Name"[:50]
             add_tags(source, 'Sync Source',
                      str(str(title) + ' ' + str(first_name) + ' ' + str(middle_name) + ' ' + str(last_name))[:50],
                      constituent_id)
@@ -1491,7 +1417,7 @@ def update_name(each_row, constituent_id):
             send_mail_different_name(
                 str(str(re_title) + ' ' + str(re_f_name) + ' ' + str(re_m_name) + ' ' + str(re_l_name)),
                 str(str(title) + ' ' + str(first_name) + ' ' + str(middle_name) + ' ' + str(last_name)),
-                'Different name exists in Raisers Edge and the one shared by Alum')
+                'Different name exists in Raisers Edge and the one shared by Alum', constituent_id)
     else:
 
         if re_f_name != first_name or re_m_name != middle_name or re_l_name != last_name:
@@ -1518,7 +1444,7 @@ def update_name(each_row, constituent_id):
             patch_request_re(url, params)
 
             ## Update Tags
-            source = f"{each_row.loc[0]['Enter the source of your data?'].title().replace('-', '_')} - Auto | Name"[:50]
+            source = f"{record.source_title.replace('-', '_')} - Auto | Name"[:50]
             add_tags(source, 'Sync Source',
                      str(str(title) + ' ' + str(first_name) + ' ' + str(middle_name) + ' ' + str(last_name))[:50],
                      constituent_id)
@@ -1527,7 +1453,7 @@ def update_name(each_row, constituent_id):
             send_mail_different_name(
                 str(str(re_title) + ' ' + str(re_f_name) + ' ' + str(re_m_name) + ' ' + str(re_l_name)),
                 str(str(title) + ' ' + str(first_name) + ' ' + str(middle_name) + ' ' + str(last_name)),
-                'Different name exists in Raisers Edge and the one shared by Alum')
+                'Different name exists in Raisers Edge and the one shared by Alum', constituent_id)
 
 
 def clean_url(url):
@@ -1558,11 +1484,11 @@ def clean_url(url):
     return url
 
 
-def update_linkedin(each_row, constituent_id):
+def update_linkedin(record, constituent_id):
     logging.info('Proceeding to update LinkedIn')
 
     # Get the new data
-    linkedin = each_row['LinkedIn'][0]
+    linkedin = record.linkedin
 
     if 'linkedin' in str(linkedin):
         linkedin = clean_url(linkedin)
@@ -1580,14 +1506,20 @@ def update_linkedin(each_row, constituent_id):
         post_request_re(url, params)
 
         ## Update Tags
-        source = f"{each_row.loc[0]['Enter the source of your data?'].title().replace('-', '_')} - Auto | Online Presence"[
+        source = f"{record.source_title.replace('-', '_')} - Auto | Online Presence"[
                  :50]
         add_tags(source, 'Sync Source', linkedin[:50], constituent_id)
 
 
-def send_mail_different_name(re_name, new_name, subject):
+def send_mail_different_name(re_name, new_name, subject, constituent_id):
     logging.info('Sending email for different names')
 
+    # Collect the email instead of sending it when the updates are only being planned
+    emails = pending_emails.get()
+    if emails is not None:
+        emails.append({'helper': 'send_mail_different_name', 'args': [re_name, new_name, subject, constituent_id]})
+        return
+
     authority = f'https://login.microsoftonline.com/{TENANT_ID}'
 
     app = msal.ConfidentialClientApplication(
@@ -1669,13 +1601,11 @@ def send_mail_different_name(re_name, new_name, subject):
             logging.info(result.get('correlation_id'))
 
 
-def check_if_new(each_row, constituent_id):
+def check_if_new(record, constituent_id):
     logging.info('Checking if the record is a new record')
 
     # Get created data based on constituent code
-    url = f'https://api.sky.blackbaud.com/constituent/v1/constituents/{constituent_id}/constituentcodes'
-    params = {}
-    get_request_re(url, params)
+    re_api_response = get_re_data(constituent_id, 'constituentcodes')
 
     # Load to a DataFrame
     re_data = api_to_df(re_api_response).copy()
@@ -1701,7 +1631,7 @@ def check_if_new(each_row, constituent_id):
         # Constituent was recently created
 
         # Get source
-        source = f"{each_row.loc[0]['Enter the source of your data?'].title().replace('-', '_')} - Auto | New Record"[
+        source = f"{record.source_title.replace('-', '_')} - Auto | New Record"[
                  :50]
 
         comment = re_data.loc[0]['description']
@@ -1710,7 +1640,7 @@ def check_if_new(each_row, constituent_id):
         add_tags(source, 'Sync source', str(comment)[:50], constituent_id)
 
 
-def issue_with_updates(df, error):
+def issue_with_updates(df, error, constituent_id):
     logging.info('Sending email for failure to update record')
 
     authority = f'https://login.microsoftonline.com/{TENANT_ID}'
@@ -1797,24 +1727,8 @@ def issue_with_updates(df, error):
             logging.info(result.get('correlation_id'))
 
 
-try:
-
-    # Set current directory
-    set_current_directory()
-
-    # Start Logging for Debugging
-    start_logging()
-
-    # Retrieve contents from .env file
-    get_env_variables()
-
-    # Housekeeping
-    housekeeping()
-
-    # Set API Request strategy
-    set_api_request_strategy()
-
-    # # Get Excel file from Microsoft Form
+def get_form_data():
+    # Get Excel file from Microsoft Form
     download_excel(FORM_URL)
 
     # Load file to a Dataframe
@@ -1844,75 +1758,433 @@ try:
     # 3. Convert the 'class_of' column to 'float'
     form_data['Postal Code'] = form_data['Postal Code'].astype(float)
 
-    # Remove data that's already uploaded
+    return form_data
+
+
+def get_arguments():
+    logging.info('Reading command-line arguments')
+
+    global UPLOAD_WORKERS, PREFETCH_SIZE, USE_ASYNC, PLAN_FILE, EXECUTE_PLAN, MIRROR_PATH
+
+    parser = argparse.ArgumentParser(description='Upload data from Microsoft Forms to Raisers Edge')
+    parser.add_argument('--workers', type=int, default=UPLOAD_WORKERS,
+                        help='Number of constituents to upload at once (default: %(default)s)')
+    parser.add_argument('--prefetch', type=int, default=PREFETCH_SIZE,
+                        help='Number of form rows to prefetch RE data for, 0 to disable (default: %(default)s)')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Upload with the asyncio request layer instead of worker threads')
+    parser.add_argument('--mirror', nargs='?', const='Databases/RE Mirror.db', metavar='MIRROR_PATH',
+                        help='Compare against the local mirror of RE data synced by Sync RE Mirror.py '
+                             '(default path: %(const)s)')
+
+    # Review large batches before they're uploaded
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--plan', metavar='PLAN_FILE',
+                      help='Only work out the updates for the form data and write them to PLAN_FILE')
+    mode.add_argument('--execute', metavar='PLAN_FILE',
+                      help='Send the updates in PLAN_FILE to RE, instead of working them out from the form data')
+
+    args = parser.parse_args()
+
+    UPLOAD_WORKERS = max(1, args.workers)
+    PREFETCH_SIZE = max(0, args.prefetch)
+    USE_ASYNC = args.use_async
+    PLAN_FILE = args.plan
+    EXECUTE_PLAN = args.execute
+    MIRROR_PATH = args.mirror
+
+
+def open_mirror(path, max_age=None):
+    # The mirror, or None when it's older than max_age hours, as what was added to RE since would be added again
+    logging.info(f'Comparing against the RE mirror at {path}')
+
+    mirror = ReMirror(path)
+
+    for resource in MIRRORED_RESOURCES:
+        synced_at = mirror.get_synced_at(resource)
+
+        if synced_at is None:
+            raise Exception(f'{resource} are not synced to the RE mirror yet, run Sync RE Mirror.py first')
+
+        logging.info(f'{resource} last synced at {synced_at}')
+
+        if max_age is not None and datetime.now() - datetime.fromisoformat(synced_at) > timedelta(hours=max_age):
+            logging.warning(f'{resource} in the RE mirror are older than {max_age} hours, requesting RE data for each '
+                            f'constituent instead. Run Sync RE Mirror.py to use the mirror.')
+            return None
+
+    return mirror
+
+
+def update_data_uploaded(record):
+    logging.info('Updating Database of synced records')
+
+    # Appends to the journal, which is merged into the parquet file in the background
+    upload_journal.append(record.to_frame())
+
+
+def update_record(record, constituent_id):
+    # Update Email Addresses
+    update_emails(record, constituent_id)
+
+    # Update Phone Numbers
+    update_phones(record, constituent_id)
+
+    # Update Employment
+    update_employment(record, constituent_id)
+
+    # Update Address
+    update_address(record, constituent_id)
+
+    # Update Education
+    update_education(record, constituent_id)
+
+    # Update Name
+    update_name(record, constituent_id)
+
+    # Update LinkedIn URL
+    update_linkedin(record, constituent_id)
+
+    # Check if the record is a new record
+    check_if_new(record, constituent_id)
+
+    # Checking if it's an event
+    update_event(record, constituent_id)
+
+
+def upload_record(record):
+    # Get RE ID
+    constituent_id = record.constituent_id
+
+    logging.info(f'Proceeding to update record with System Record ID: {constituent_id}')
 
-    # Load data that's uploaded
     try:
-        data_uploaded = load_data('Data Uploaded').copy()
-    except:
-        data_uploaded = pd.DataFrame(columns=form_data.columns)
 
-    # Identify the new data which is yet to be uploaded
-    new_data = find_remaining_data(form_data, data_uploaded).copy()
+        # Update the record in RE
+        update_record(record, constituent_id)
+
+        # Create database of file that's already uploaded
+        update_data_uploaded(record)
 
-    # Upload data to RE
-    for index, each_row in new_data.iterrows():
+    except Exception as Argument:
+        # Send email
+        issue_with_updates(record.to_frame(), Argument, constituent_id)
 
-        each_row = pd.DataFrame(each_row).T.reset_index(drop=True)
+        # Move on to the next record
+        pass
+
+    finally:
+        # The mirror no longer has the latest data of this constituent
+        mirror_stale.add(constituent_id)
 
-        each_row_bak = each_row.copy()
 
-        # Get RE ID
-        constituent_id = int(each_row['System Record ID'][0])
+async def send_update(client, method, url, params):
+    if method == 'PATCH':
+        re_api_response = await client.patch(url, params)
+
+    else:
+        re_api_response = await client.post(url, params)
 
-        logging.info(f'Proceeding to update record with System Record ID: {constituent_id}')
+        # Addresses whose county isn't in RE yet are added again once it is, as update_address() does when the
+        # request is sent straight away
+        if 'county of value' in str(re_api_response).lower() and params.get('county'):
+            logging.info(f"Adding county {params['county']} to RE before adding the address again")
+            await asyncio.to_thread(add_county, params['county'])
+            re_api_response = await client.post(url, params)
+
+    logging.info(re_api_response)
+
+
+async def upload_record_async(client, record):
+    # Get RE ID
+    constituent_id = record.constituent_id
+
+    logging.info(f'Proceeding to update record with System Record ID: {constituent_id}')
+
+    try:
+
+        # Get everything the update functions compare against at once
+        resources = [x for x in RE_SUB_RESOURCES if not is_mirrored(constituent_id, x)]
+        responses = await asyncio.gather(*[
+            client.get(f'https://api.sky.blackbaud.com/constituent/v1/constituents/{constituent_id}'
+                       f'{RE_SUB_RESOURCES[resource]}') for resource in resources
+        ], return_exceptions=True)
+
+        for resource, re_api_response in zip(resources, responses):
+            if not isinstance(re_api_response, Exception):
+                re_cache[(constituent_id, resource)] = re_api_response
+
+        # Work out the updates without sending them. In a thread, as the update functions still request what
+        # couldn't be fetched above, which would otherwise hold up the other records.
+        writes = []
+        token = pending_writes.set(writes)
 
         try:
+            await asyncio.to_thread(update_record, record, constituent_id)
+        finally:
+            pending_writes.reset(token)
 
-            # Update Email Addresses
-            update_emails(each_row, constituent_id)
+        # Send the updates in the order they were made
+        for method, url, params in writes:
+            await send_update(client, method, url, params)
 
-            # Update Phone Numbers
-            update_phones(each_row, constituent_id)
+        # Create database of file that's already uploaded
+        update_data_uploaded(record)
 
-            # Update Employment
-            update_employment(each_row, constituent_id)
+    except Exception as Argument:
+        # Send email
+        await asyncio.to_thread(issue_with_updates, record.to_frame(), Argument, constituent_id)
 
-            # Update Address
-            update_address(each_row, constituent_id)
+    finally:
+        for resource in RE_SUB_RESOURCES:
+            re_cache.pop((constituent_id, resource), None)
 
-            # Update Education
-            update_education(each_row, constituent_id)
+        # The mirror no longer has the latest data of this constituent
+        mirror_stale.add(constituent_id)
 
-            # Update Name
-            update_name(each_row, constituent_id)
 
-            # Update LinkedIn URL
-            update_linkedin(each_row, constituent_id)
+async def upload_records_async(records):
+    logging.info(f'Uploading {len(records)} records with the asyncio request layer')
 
-            # Check if the record is a new record
-            check_if_new(each_row, constituent_id)
+    async with AsyncSkyApiClient(RE_API_KEY, rate_limiter=sky_api.rate_limiter,
+                                 concurrency=ASYNC_CONCURRENCY) as client:
+        await asyncio.gather(*[upload_records_of_constituent_async(client, group)
+                               for group in group_by_constituent(records)])
 
-            # Checking if it's an event
-            update_event(each_row, constituent_id)
 
-            # Sleep for 5 seconds
-            logging.info('Sleeping for 5 seconds')
-            time.sleep(5)
+async def upload_records_of_constituent_async(client, records):
+    # One after the other, each diffed against RE after the updates of the one before, as in upload_batch()
+    for record in records:
+        await upload_record_async(client, record)
 
-            # Create database of file that's already uploaded
-            logging.info('Updating Database of synced records')
-            each_row_bak['Class of'] = pd.to_numeric(each_row_bak['Class of'], errors='ignore')
-            data_uploaded = pd.concat([data_uploaded, each_row_bak], axis=0, ignore_index=True)
-            data_uploaded = data_uploaded.drop_duplicates('ID').copy()
-            data_uploaded.to_parquet('Databases/Data Uploaded', index=False)
 
-        except Exception as Argument:
-            # Send email
-            issue_with_updates(each_row_bak, Argument)
+def group_by_constituent(records):
+    # Records of each constituent in the order of the form
+    groups = {}
 
-            # Move on to the next record
-            pass
+    for record in records:
+        groups.setdefault(record.constituent_id, []).append(record)
+
+    return list(groups.values())
+
+
+def upload_batch(batch, process_record):
+    if UPLOAD_WORKERS == 1:
+        for record in batch:
+            process_record(record)
+
+    else:
+        # Records of the same constituent are uploaded one after the other, each diffed against RE after the
+        # updates of the one before, so that the same email, phone or address isn't added twice
+        def process_group(group):
+            for record in group:
+                process_record(record)
+
+        with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+            futures = [executor.submit(process_group, group) for group in group_by_constituent(batch)]
+
+            for future in as_completed(futures):
+                future.result()
+
+
+def upload_records(records, process_record=upload_record):
+    logging.info(f'Processing {len(records)} records with {UPLOAD_WORKERS} worker(s)')
+
+    if PREFETCH_SIZE == 0:
+        upload_batch(records, process_record)
+        return
+
+    batches = [records[i:i + PREFETCH_SIZE] for i in range(0, len(records), PREFETCH_SIZE)]
+
+    def get_ids(batch):
+        return [record.constituent_id for record in batch]
+
+    # Prefetch the next batch in the background while the current one is being uploaded
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        next_prefetch = prefetcher.submit(prefetch_re_data, get_ids(batches[0])) if batches else None
+
+        for i, batch in enumerate(batches):
+            next_prefetch.result()
+
+            if i + 1 < len(batches):
+                # Constituents also in the current batch are requested again after its updates, never prefetched
+                next_ids = [x for x in get_ids(batches[i + 1]) if x not in set(get_ids(batch))]
+                next_prefetch = prefetcher.submit(prefetch_re_data, next_ids)
+
+            upload_batch(batch, process_record)
+
+            # Drop anything the update functions didn't use, e.g. educations of incomplete form rows
+            for constituent_id in get_ids(batch):
+                for resource in RE_SUB_RESOURCES:
+                    re_cache.pop((constituent_id, resource), None)
+
+
+def plan_record(record):
+    # Get RE ID
+    constituent_id = record.constituent_id
+
+    logging.info(f'Planning updates of record with System Record ID: {constituent_id}')
+
+    planned = {
+        'ID': record.id,
+        'IDs': record.ids,
+        'constituent_id': constituent_id,
+        'form_data': record.to_dict(),
+        'form_rows': record.to_dicts(),
+        'updates': [],
+        'emails': [],
+        'error': None
+    }
+
+    # Work out the updates and their emails without sending them
+    token = pending_writes.set([])
+    emails_token = pending_emails.set(planned['emails'])
+
+    try:
+        update_record(record, constituent_id)
+
+    except Exception as Argument:
+        planned['error'] = str(Argument)
+
+    finally:
+        planned['updates'] = [
+            {'method': method, 'url': url, 'params': params} for method, url, params in pending_writes.get()
+        ]
+        pending_writes.reset(token)
+        pending_emails.reset(emails_token)
+
+    mutation_plan.append(planned)
+
+
+def plan_records(records, path):
+    logging.info(f'Writing the plan of updates to {path}')
+
+    global mutation_plan
+
+    mutation_plan = []
+
+    # Nothing is sent to RE while planning, so each row would be diffed against the same data in RE. The rows of a
+    # constituent are planned as one record instead, so that their updates aren't planned twice.
+    records = [FormRecord.fold(group) for group in group_by_constituent(records)]
+
+    # Same prefetching and workers as an upload, but nothing is sent to RE
+    upload_records(records, plan_record)
+
+    # Keep the order of the form
+    order = {record.id: i for i, record in enumerate(records)}
+    mutation_plan.sort(key=lambda x: order[x['ID']])
+
+    plan = {
+        'created': datetime.now().replace(microsecond=0).isoformat(),
+        'records': mutation_plan
+    }
+
+    with open(path, 'w', encoding='utf-8') as plan_output:
+        json.dump(plan, plan_output, ensure_ascii=False, indent=4, default=str)
+
+    logging.info(f"Planned {sum(len(x['updates']) for x in mutation_plan)} updates for {len(mutation_plan)} records, "
+                 f"{sum(1 for x in mutation_plan if x['error'])} with errors")
+
+
+# Emails which can be planned, by name
+PLANNED_EMAILS = {
+    'send_mail_different_education': send_mail_different_education,
+    'send_mail_different_name': send_mail_different_name
+}
+
+
+async def execute_planned_record(client, planned):
+    # Every row of the form which was folded into the planned record
+    record_df = pd.DataFrame(planned.get('form_rows') or [planned['form_data']])
+
+    logging.info(f"Proceeding to update record with System Record ID: {planned['constituent_id']}")
+
+    try:
+
+        # Send the updates in the order they were planned
+        for update in planned['updates']:
+            await send_update(client, update['method'], update['url'], update['params'])
+
+        # Send the emails about the differences, now that the updates are made
+        for email in planned.get('emails', []):
+            await asyncio.to_thread(PLANNED_EMAILS[email['helper']], *email['args'])
+
+        # Create database of file that's already uploaded
+        upload_journal.append(record_df)
+
+    except Exception as Argument:
+        # Send email
+        await asyncio.to_thread(issue_with_updates, record_df, Argument, planned['constituent_id'])
+
+
+async def execute_plan(path):
+    logging.info(f'Sending the updates in {path} to RE')
+
+    with open(path, encoding='utf-8') as plan_input:
+        plan = json.load(plan_input)
+
+    # Records which couldn't be planned are planned again in the next run, and those already uploaded are skipped
+    records = [x for x in plan['records']
+               if not x['error'] and not upload_journal.ids.issuperset(x.get('IDs', [x['ID']]))]
+
+    logging.info(f"Executing {len(records)} of {len(plan['records'])} planned records")
+
+    async with AsyncSkyApiClient(RE_API_KEY, rate_limiter=sky_api.rate_limiter,
+                                 concurrency=ASYNC_CONCURRENCY) as client:
+        await asyncio.gather(*[execute_planned_record(client, planned) for planned in records])
+
+
+try:
+
+    # Set current directory
+    set_current_directory()
+
+    # Start Logging for Debugging
+    start_logging()
+
+    # Retrieve contents from .env file
+    get_env_variables()
+
+    # Read command-line arguments
+    get_arguments()
+
+    # Housekeeping
+    housekeeping()
+
+    # Set API Request strategy
+    set_api_request_strategy()
+
+    # Load IDs of data that's uploaded
+    upload_journal = UploadJournal('Databases/Data Uploaded')
+
+    # Open the local mirror of RE data
+    if MIRROR_PATH:
+        re_mirror = open_mirror(MIRROR_PATH, RE_MIRROR_MAX_AGE)
+
+    if EXECUTE_PLAN:
+        # Send the updates of a plan that's been reviewed
+        asyncio.run(execute_plan(EXECUTE_PLAN))
+
+    else:
+        # Get the form data
+        form_data = get_form_data()
+
+        # Remove data that's already uploaded
+        new_data = find_remaining_data(form_data, upload_journal.ids).copy()
+
+        # Read each form row once
+        records = [FormRecord(row) for row in new_data.to_dict('records')]
+
+        # Upload data to RE
+        if PLAN_FILE:
+            plan_records(records, PLAN_FILE)
+        elif USE_ASYNC:
+            asyncio.run(upload_records_async(records))
+        else:
+            upload_records(records)
+
+    # Merge the journal into the database of synced records
+    upload_journal.close()
 
 except Exception as Argument:
 
@@ -1925,6 +2197,9 @@ finally:
     # Housekeeping
     housekeeping()
 
+    # Log SKY API usage
+    log_request_counts()
+
     # Stop Logging
     stop_logging()
 
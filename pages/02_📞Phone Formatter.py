@@ -2,6 +2,8 @@ import streamlit as st
 import re
 import pandas as pd
 
+from Helpers.phone_numbers import canonicalise, get_countries
+
 st.set_page_config(
     page_title='Phone Number Formatter',
     page_icon=':telephone_receiver:',
@@ -19,6 +21,9 @@ st.title("Phone Number Formatter")
 
 phone_number = st.text_input("Enter the phone number")
 
+# Same key as used to match phone numbers while uploading to RE
+phone_key = canonicalise(phone_number)
+
 phone_number = re.sub("[^0-9]", "", phone_number)
 st.write("<br>", unsafe_allow_html=True)
 
@@ -26,6 +31,16 @@ st.write("Formatted phone number:")
 
 st.code(phone_number)
 
+if phone_key:
+    st.write("E.164 format:")
+
+    st.code(phone_key)
+
+    countries = get_countries(phone_key)
+
+    if countries:
+        st.write(f"Country: {', '.join(countries)}")
+
 divider = '''
         <style>
         /* Rounded border */
@@ -1,6 +1,9 @@
+import os
 import pandas as pd
 import streamlit as st
 
+from Helpers.email_index import EmailIndex, get_email_matches, resolve_emails
+
 st.set_page_config(
     page_title='Search Raisers Edge ID against contact information',
     page_icon=':mag:',
@@ -14,13 +17,24 @@ hide_streamlit_style = """
             """            
 st.markdown(hide_streamlit_style, unsafe_allow_html=True)
 
-# Load the Parquet file into a Pandas dataframe
-@st.cache_data(ttl=3600) # Reset cache every 1 Hour
-def get_data():
-    data = pd.read_parquet('Databases/System Record IDs')
-    return data
+# Suggestions shown for a partial email address
+SUGGESTIONS = 10
+
+# Index of the emails, built again whenever Download Emails from RE.py writes a new file
+@st.cache_resource(max_entries=1, show_spinner='Loading the email addresses...')
+def get_index(version):
+    data = pd.read_parquet('Databases/System Record IDs', columns=['address', 'constituent_id'])
+    return EmailIndex(data['address'], data['constituent_id'])
+
+# Constituents of each email, for uploaded files, only loaded once a file is uploaded
+@st.cache_resource(max_entries=1, show_spinner='Loading the email addresses...')
+def get_matches(version):
+    data = pd.read_parquet('Databases/System Record IDs', columns=['address', 'constituent_id', 'primary', 'inactive'])
+    return get_email_matches(data)
 
-data = get_data()
+version = os.path.getmtime('Databases/System Record IDs')
+
+index = get_index(version)
 
 # Define the Streamlit app
 st.title("Search for ID by Email address")
@@ -28,14 +42,71 @@ st.title("Search for ID by Email address")
 # Add a search box for email
 search_box = st.text_input("Enter email address to search:")
 
-# Filter the dataframe by the entered email and show the corresponding ID
+# Look up the entered email, or else the emails which start with it, and show the corresponding ID
 if search_box:
-    result = data.loc[data['address'].str.strip().str.match(search_box.strip(),case=False), 'constituent_id']
+    exact = index.get(search_box)
+    result = exact or index.search_ids(search_box)
 
-    if len(result.unique()) == 1:
+    if len(result) == 1:
         st.write("The ID for the entered email address is:")
 
-        st.code(result.values[0])
-        
+        st.code(result[0])
+
+    elif exact:
+        st.write("The entered email address is on more than one record:")
+
+        st.dataframe(pd.DataFrame({'constituent_id': result}), hide_index=True)
+
+    elif result:
+        st.write(f"{index.count(search_box):,} email addresses start with the entered text, e.g.:")
+
+        st.dataframe(index.search(search_box, limit=SUGGESTIONS), hide_index=True, use_container_width=True)
+
     else:
-        st.write("No ID found for the entered email. Kindly check manually in Raisers Edge.")
\ No newline at end of file
+        st.write("No ID found for the entered email. Kindly check manually in Raisers Edge.")
+
+# Else
+st.markdown("##")
+st.write('##### Else, upload email addresses as per the template to look up their IDs in bulk.')
+# Add file uploader for CSV file
+uploaded_file = st.file_uploader("Upload a CSV file", type="csv")
+
+if uploaded_file:
+    # Load CSV file into a pandas dataframe
+    df = pd.read_csv(uploaded_file, dtype=str)
+
+    column = 'email' if 'email' in df else st.selectbox("Column with the email addresses", df.columns)
+
+    # Look up all the emails at once
+    df = resolve_emails(df, column, get_matches(version))
+
+    found = int((df['matches'] > 0).sum())
+    ambiguous = int(df['is_ambiguous'].sum())
+
+    st.write(f"{found:,} of {len(df):,} email addresses found in Raisers Edge, {ambiguous:,} of them on more than "
+             f"one record.")
+
+    st.dataframe(df.head(SUGGESTIONS), hide_index=True, use_container_width=True)
+
+    # Download the dataframe as a CSV file with the IDs
+    st.download_button(
+        label="Download the processed file",
+        data=df.to_csv(index=False),
+        file_name="re_id_search_results.csv",
+        mime="text/csv"
+    )
+
+st.markdown("""---""")
+st.markdown("##")
+st.markdown('#### Data Upload Format')
+st.markdown("##")
+st.write('##### Download below template to search the IDs of multiple email addresses at once.')
+st.write("Don't forget to upload the CSV file after filling.")
+
+with open('Templates/email_upload_template.csv') as f:
+    st.download_button(
+        label="Download Template",
+        data=f,
+        file_name="email_upload_template.csv",
+        mime="text/csv"
+    )
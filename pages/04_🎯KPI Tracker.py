@@ -1,9 +1,16 @@
+import os
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
+from Helpers.kpi_cube import load_kpi_cube, filter_cube, with_constituents
+from Helpers.view_cache import ViewCache
+
+# Memory for the views of all sessions together
+VIEW_CACHE_MB = 256
+
 st.set_page_config(
     page_title='Database KPI Tracker',
     page_icon=':dart:',
@@ -30,15 +37,12 @@ plotly_config = {
     }
 }
 
-# Load the Parquet file into a Pandas dataframe
-@st.cache_data()
-def get_data():
-    # Attributes List
-    df1 = pd.read_parquet('Databases/Custom Fields')
-    df1['date'] = pd.to_datetime(df1['date'])
-
-    # Reset the index so that the date column becomes a regular column
-    df1 = df1.reset_index(drop=True)
+# Load the Parquet file into a Pandas dataframe, again whenever Get Data for Dashboard.py writes a new one
+@st.cache_data(max_entries=1)
+def get_data(version):
+    # Custom fields counted by day, category, source, type of update and the alum, deceased, inactive and opt-out
+    # flags of the constituent, sorted by date, and the constituents of each row. Built by Get Data for Dashboard.py
+    df1, parent_ids = load_kpi_cube('Databases/KPI Cube.parquet', 'Databases/KPI Cube Constituents.parquet')
 
     # Email List
     df2 = pd.read_parquet('Databases/System Record IDs')
@@ -51,29 +55,182 @@ def get_data():
 
     df2 = df2.dropna().reset_index(drop=True).copy()
 
-    # All Alums
-    df3 = pd.read_parquet('Databases/All Alums.parquet')
+    return df1, parent_ids, df2
+
+def get_sources(shortlisted_data):
+    # Get various sources
+    verified_source = shortlisted_data[
+        (shortlisted_data['category'].str.contains('Verified', case=False)) &
+        (shortlisted_data['verified_source'] != '')
+    ]['verified_source'].dropna().drop_duplicates().sort_values().reset_index(drop=True)
+    sync_source = shortlisted_data['sync_source'].drop_duplicates().dropna().sort_values().reset_index(drop=True)
+
+    # Combine different sources to one
+    return pd.concat([verified_source, sync_source]).drop_duplicates().to_list()
+
+def get_views(shortlisted_data, shortlisted_constituents, sources):
+    # Metrics, tables and chart data for a set of filters, from the rows of the cube and the same rows once per
+    # constituent. They're shared between sessions, so they're not changed after this.
+
+    # Get Verified contact details
+    verified_contacts = shortlisted_constituents[shortlisted_constituents['verified_source'].isin(sources)]
+
+    # Verified Emails
+    # Getting the count for metrics
+    verified_emails = verified_contacts[verified_contacts['category'] == 'Verified Email']['parent_id'].nunique()
+
+    ## Formatting it as proper readable numbers
+    verified_emails = "{:,}".format(verified_emails)
+
+    # Verified Phones
+    # Getting the count for metrics
+    verified_phone = verified_contacts[verified_contacts['category'] == 'Verified Phone']['parent_id'].nunique()
+
+    ## Formatting it as proper readable numbers
+    verified_phone = "{:,}".format(verified_phone)
+
+    # Verified Location
+    # Getting the count for metrics
+    verified_location = verified_contacts[verified_contacts['category'] == 'Verified Location']['parent_id'].nunique()
+
+    ## Formatting it as proper readable numbers
+    verified_location = "{:,}".format(verified_location)
+
+    # Monthly Trend
+    emails_trend = verified_contacts[verified_contacts['category'] == 'Verified Email'].groupby('date').nunique()['parent_id']
+    emails_trend = emails_trend.resample('M').sum().reset_index()
+    emails_trend['date'] = emails_trend['date'].dt.strftime('%b\'%y')
+    emails_trend = emails_trend.rename(columns={'parent_id': 'Emails'}).copy()
+
+    phones_trend = verified_contacts[verified_contacts['category'] == 'Verified Phone'].groupby('date').nunique()['parent_id']
+    phones_trend = phones_trend.resample('M').sum().reset_index()
+    phones_trend['date'] = phones_trend['date'].dt.strftime('%b\'%y')
+    phones_trend = phones_trend.rename(columns={'parent_id': 'Phones'}).copy()
+
+    merged_df = pd.merge(emails_trend, phones_trend, on='date', how='outer')
+
+    # Verified Email Address by Source Table
+    verified_email_address = shortlisted_constituents[
+        (shortlisted_constituents['category'] == 'Verified Email') &
+        (shortlisted_constituents['verified_source'].isin(sources))
+    ].copy()
+    verified_email_address = verified_email_address.sort_values(['parent_id', 'verified_source_category', 'email_domain_category']).reset_index(drop=True).copy()
+    verified_email_address = verified_email_address[['parent_id', 'verified_source_category', 'email_domain_category']].drop_duplicates('parent_id').reset_index(drop=True).copy()
+    verified_by_source = verified_email_address.groupby(['verified_source_category']).agg({'parent_id': 'count'}).reset_index().rename(columns={
+        'verified_source_category': 'Source',
+        'parent_id': 'Alum Count'
+    })
+    verified_by_source['Source'] = verified_by_source['Source'].apply(lambda x: x.split(' - ')[1])
+    verified_by_source['Alum Count'] = verified_by_source['Alum Count'].apply(lambda x: "{:,}".format(x))
 
-    list_1 = df3['id'].astype(int).to_list()
+    # Verified Emails by Domain Table
+    verified_by_domain = verified_email_address.groupby(['email_domain_category']).agg({'parent_id': 'count'}).reset_index().rename(columns={
+        'email_domain_category': 'Domain',
+        'parent_id': 'Alum Count'
+    })
+    verified_by_domain['Domain'] = verified_by_domain['Domain'].apply(lambda x: x.split(' - ')[1])
+    verified_by_domain['Alum Count'] = verified_by_domain['Alum Count'].apply(lambda x: "{:,}".format(x))
+
+    # Figure
+    combined_verified = verified_email_address.groupby(['verified_source_category', 'email_domain_category']).agg({'parent_id': 'count'}).reset_index().rename(columns={
+        'verified_source_category': 'Source',
+        'email_domain_category': 'Domain',
+        'parent_id': 'Alum Count'
+    }).copy()
+    combined_verified['Source'] = combined_verified['Source'].apply(lambda x: x.split(' - ')[1])
+    combined_verified['Domain'] = combined_verified['Domain'].apply(lambda x: x.split(' - ')[1])
+
+    # Updates
+    updates = shortlisted_constituents[shortlisted_constituents['sync_source'].isin(sources)]
+
+    ## Email Updates
+    email_updates = updates[updates['update_type'] == 'Email']['parent_id'].nunique()
+    email_updates = "{:,}".format(email_updates)
+
+    ## Phone Updates
+    phone_updates = updates[updates['update_type'] == 'Phone']['parent_id'].nunique()
+    phone_updates = "{:,}".format(phone_updates)
+
+    ## Location Updates
+    location_updates = updates[updates['update_type'] == 'Location']['parent_id'].nunique()
+    location_updates = "{:,}".format(location_updates)
+
+    ## Employment Updates
+    employment_updates = updates[updates['update_type'] == 'Employment']['parent_id'].nunique()
+    employment_updates = "{:,}".format(employment_updates)
+
+    ## Online Presence Updates
+    online_presence_updates = updates[updates['update_type'] == 'Online Presence']['parent_id'].nunique()
+    online_presence_updates = "{:,}".format(online_presence_updates)
+
+    ## Education Updates
+    education_updates = updates[updates['update_type'] == 'Education']['parent_id'].nunique()
+    education_updates = "{:,}".format(education_updates)
+
+    ## Bio Updates
+    bio_updates = updates[updates['update_type'] == 'Bio Details']['parent_id'].nunique()
+    bio_updates = "{:,}".format(bio_updates)
+
+    ## New Alum Updates
+    new_alums = updates[updates['update_type'] == 'New Alums']['parent_id'].nunique()
+    new_alums = "{:,}".format(new_alums)
+
+    updated_records = shortlisted_data[shortlisted_data['sync_source'].isin(sources)]
+    line_chart_data = updated_records.groupby([pd.Grouper(key='date', freq='M'), 'update_type'])['records'].sum().reset_index(name='count')
+    line_chart_data['date'] = line_chart_data['date'].dt.strftime('%b\'%y')
+
+    data_update_comparison = pd.pivot_table(updates, index=['update_type'], columns=['sync_source'], values='parent_id', aggfunc=pd.Series.nunique)
+
+    # Rename column index
+    data_update_comparison.index.names = ['Updates']
+
+    # Stacked Bar Chart
+    # Convert DataFrame to long format
+    data_update_comparison_long = pd.melt(data_update_comparison.reset_index(), id_vars=['Updates'], var_name='sync_source', value_name='count')
+
+    updates_breakdown = updates.groupby(
+        by=['update_type']).nunique()['parent_id'].reset_index().rename(
+            columns={
+                'update_type': 'Description',
+                'parent_id': 'Updates'
+            }
+        )
+
+    updates_breakdown = updates_breakdown.sort_values(by=['Updates'], ascending=False)
+    updates_breakdown = updates_breakdown.reset_index(drop=True).copy()
 
-    # Deceased list
-    df4 = pd.read_parquet('Databases/All Constituents.parquet')
-    list_2 = df4[
-        df4['deceased'] == 'True'
-    ]['id'].astype(int).to_list()
+    return {
+        'verified_emails': verified_emails,
+        'verified_phone': verified_phone,
+        'verified_location': verified_location,
+        'merged_df': merged_df,
+        'verified_by_source': verified_by_source,
+        'verified_by_domain': verified_by_domain,
+        'combined_verified': combined_verified,
+        'email_updates': email_updates,
+        'phone_updates': phone_updates,
+        'location_updates': location_updates,
+        'employment_updates': employment_updates,
+        'online_presence_updates': online_presence_updates,
+        'education_updates': education_updates,
+        'bio_updates': bio_updates,
+        'new_alums': new_alums,
+        'line_chart_data': line_chart_data,
+        'data_update_comparison': data_update_comparison,
+        'data_update_comparison_long': data_update_comparison_long,
+        'updates_breakdown': updates_breakdown
+    }
 
-    # Inactive list
-    list_3 = df4[
-        df4['inactive'] == 'True'
-    ]['id'].astype(int).to_list()
+# Views already worked out for any session, by filters and version of the data
+@st.cache_resource
+def get_view_cache():
+    return ViewCache(max_bytes=VIEW_CACHE_MB * 1024 ** 2)
 
-    # Getting list of opt-outs
-    df5 = pd.read_parquet('Databases/Opt-outs.parquet')
-    list_4 = df5['id'].dropna().astype(int).to_list()
+view_cache = get_view_cache()
 
-    return df1, df2, list_1, list_2, list_3, list_4
+version = os.path.getmtime('Databases/KPI Cube.parquet')
 
-data, email_list, alum_list, deceased_list, inactive_list, opt_outs = get_data()
+data, parent_ids, email_list = get_data(version)
 
 # ---- SIDEBAR ----
 st.sidebar.header('Filters')
@@ -86,100 +243,36 @@ end_date = pd.Timestamp(end_date)
 
 # Shortlist only Alums in shortlisted data
 only_alums = st.sidebar.checkbox('Only Alums?')
-if only_alums:
-    data = data[data['parent_id'].isin(alum_list)].reset_index(drop=True).copy()
 
 # Shortlist non-deceased (alive) constituents only
 ignore_deceased = st.sidebar.checkbox('Ignore deceased constituents?')
-if ignore_deceased:
-    data = data[~data['parent_id'].isin(deceased_list)].reset_index(drop=True).copy()
 
 # Shortlist active constituents only
 ignore_inactive = st.sidebar.checkbox('Ignore non-active constituents?')
-if ignore_inactive:
-    data = data[~data['parent_id'].isin(inactive_list)].reset_index(drop=True).copy()
 
 # Shortlist non-opted out constituents only
 ignore_opt_outs= st.sidebar.checkbox('Ignore opted-out constituents?')
-if ignore_opt_outs:
-    data = data[~data['parent_id'].isin(opt_outs)].reset_index(drop=True).copy()
 
-# Shortlist data based on Date
-shortlisted_data = data[data['date'].between(start_date, end_date)].reset_index(drop=True).copy()
+filters = (version, start_date, end_date, only_alums, ignore_deceased, ignore_inactive, ignore_opt_outs)
+
+# Shortlist data based on Date and the above filters, in one go
+shortlisted_data = view_cache.get(('shortlisted_data',) + filters, lambda: filter_cube(data, *filters[1:]))
+
+# The same rows once per constituent, to count constituents
+shortlisted_constituents = view_cache.get(('shortlisted_constituents',) + filters,
+                                          lambda: with_constituents(shortlisted_data, parent_ids))
 
 # Get various sources
-verified_source = shortlisted_data[
-    (shortlisted_data['category'].str.contains('Verified', case=False)) &
-    (shortlisted_data['verified_source'] != '')
-]['verified_source'].dropna().drop_duplicates().sort_values().reset_index(drop=True)
-sync_source = shortlisted_data['sync_source'].drop_duplicates().dropna().sort_values().reset_index(drop=True)
+source_options = view_cache.get(('sources',) + filters, lambda: get_sources(shortlisted_data))
 
 # Combine different sources to one
 sources = st.sidebar.multiselect(
     "Select the sources:",
-    options=pd.concat([verified_source, sync_source]).drop_duplicates().reset_index(drop=True),
-    default=pd.concat([verified_source, sync_source]).drop_duplicates().reset_index(drop=True)
+    options=source_options,
+    default=source_options
 )
 
-# Get Verified contact details
-verified_contacts = data[(data['date'].between(start_date, end_date)) & (data['verified_source'].isin(sources))].reset_index(drop=True)
-
-# Verified Emails
-# Getting the count for metrics
-verified_emails = verified_contacts[verified_contacts['category'] == 'Verified Email']['parent_id'].nunique()
-
-## Formatting it as proper readable numbers
-verified_emails = "{:,}".format(verified_emails)
-
-# Verified Phones
-# Getting the count for metrics
-verified_phone = verified_contacts[verified_contacts['category'] == 'Verified Phone']['parent_id'].nunique()
-
-## Formatting it as proper readable numbers
-verified_phone = "{:,}".format(verified_phone)
-
-# Verified Location
-# Getting the count for metrics
-verified_location = verified_contacts[verified_contacts['category'] == 'Verified Location']['parent_id'].nunique()
-
-## Formatting it as proper readable numbers
-verified_location = "{:,}".format(verified_location)
-
-
-# Updates
-updates = data[(data['date'].between(start_date, end_date)) & (data['sync_source'].isin(sources))].reset_index(drop=True)
-
-## Email Updates
-email_updates = updates[updates['update_type'] == 'Email']['parent_id'].nunique()
-email_updates = "{:,}".format(email_updates)
-
-## Phone Updates
-phone_updates = updates[updates['update_type'] == 'Phone']['parent_id'].nunique()
-phone_updates = "{:,}".format(phone_updates)
-
-## Location Updates
-location_updates = updates[updates['update_type'] == 'Location']['parent_id'].nunique()
-location_updates = "{:,}".format(location_updates)
-
-## Employment Updates
-employment_updates = updates[updates['update_type'] == 'Employment']['parent_id'].nunique()
-employment_updates = "{:,}".format(employment_updates)
-
-## Online Presence Updates
-online_presence_updates = updates[updates['update_type'] == 'Online Presence']['parent_id'].nunique()
-online_presence_updates = "{:,}".format(online_presence_updates)
-
-## Education Updates
-education_updates = updates[updates['update_type'] == 'Education']['parent_id'].nunique()
-education_updates = "{:,}".format(education_updates)
-
-## Bio Updates
-bio_updates = updates[updates['update_type'] == 'Bio Details']['parent_id'].nunique()
-bio_updates = "{:,}".format(bio_updates)
-
-## New Alum Updates
-new_alums = updates[updates['update_type'] == 'New Alums']['parent_id'].nunique()
-new_alums = "{:,}".format(new_alums)
+views = view_cache.get(('views',) + filters + (tuple(sources),), lambda: get_views(shortlisted_data, shortlisted_constituents, sources))
 
 # ---- MAINPAGE ----
 st.title(":dart: Database KPI Tracker")
@@ -188,29 +281,16 @@ st.markdown("##")
 # Row A
 st.markdown('## Verified Details')
 col1, col2, col3 = st.columns(3)
-col1.metric("Email", verified_emails)
-col2.metric("Phone", verified_phone)
-col3.metric("Location", verified_location)
+col1.metric("Email", views['verified_emails'])
+col2.metric("Phone", views['verified_phone'])
+col3.metric("Location", views['verified_location'])
 
 # Row B
 # Combine verified_emails and verified_phone into a single dataframe
-# Verified Emails
-# Getting the count for metrics
-verified_emails = verified_contacts[verified_contacts['category'] == 'Verified Email'].groupby('date').nunique()['parent_id']
-verified_emails = verified_emails.resample('M').sum().reset_index()
-verified_emails['date'] = verified_emails['date'].dt.strftime('%b\'%y')
-verified_emails = verified_emails.rename(columns={'parent_id': 'Emails'}).copy()
-
-verified_phone = verified_contacts[verified_contacts['category'] == 'Verified Phone'].groupby('date').nunique()['parent_id']
-verified_phone = verified_phone.resample('M').sum().reset_index()
-verified_phone['date'] = verified_phone['date'].dt.strftime('%b\'%y')
-verified_phone = verified_phone.rename(columns={'parent_id': 'Phones'}).copy()
-
-merged_df = pd.merge(verified_emails, verified_phone, on='date', how='outer')
 
 st.markdown('###')
 st.markdown('##### Monthly Trend')
-fig = px.line(merged_df, x='date', y=['Emails', 'Phones'], width=None, line_shape='spline')
+fig = px.line(views['merged_df'], x='date', y=['Emails', 'Phones'], width=None, line_shape='spline')
 fig.update_traces(mode='lines+markers', line_width=4, marker_size=11)
 fig.update_layout(
     xaxis_tickformat='%b\'%y',
@@ -228,52 +308,21 @@ fig.update_layout(
 )
 st.plotly_chart(fig, use_container_width=True, config=plotly_config)
 
-# Verified Email Address by Source Table
-verified_email_address = shortlisted_data[
-    (shortlisted_data['category'] == 'Verified Email') &
-    (shortlisted_data['verified_source'].isin(sources))
-].copy()
-verified_email_address = verified_email_address.sort_values(['parent_id', 'verified_source_category', 'email_domain_category']).reset_index(drop=True).copy()
-verified_email_address = verified_email_address[['parent_id', 'verified_source_category', 'email_domain_category']].drop_duplicates('parent_id').reset_index(drop=True).copy()
-verified_by_source = verified_email_address.groupby(['verified_source_category']).agg({'parent_id': 'count'}).reset_index().rename(columns={
-    'verified_source_category': 'Source',
-    'parent_id': 'Alum Count'
-})
-verified_by_source['Source'] = verified_by_source['Source'].apply(lambda x: x.split(' - ')[1])
-verified_by_source['Alum Count'] = verified_by_source['Alum Count'].apply(lambda x: "{:,}".format(x))
-
-# Verified Emails by Domain Table
-verified_by_domain = verified_email_address.groupby(['email_domain_category']).agg({'parent_id': 'count'}).reset_index().rename(columns={
-    'email_domain_category': 'Domain',
-    'parent_id': 'Alum Count'
-})
-verified_by_domain['Domain'] = verified_by_domain['Domain'].apply(lambda x: x.split(' - ')[1])
-verified_by_domain['Alum Count'] = verified_by_domain['Alum Count'].apply(lambda x: "{:,}".format(x))
-
-# Figure
-combined_verified = verified_email_address.groupby(['verified_source_category', 'email_domain_category']).agg({'parent_id': 'count'}).reset_index().rename(columns={
-    'verified_source_category': 'Source',
-    'email_domain_category': 'Domain',
-    'parent_id': 'Alum Count'
-}).copy()
-combined_verified['Source'] = combined_verified['Source'].apply(lambda x: x.split(' - ')[1])
-combined_verified['Domain'] = combined_verified['Domain'].apply(lambda x: x.split(' - ')[1])
-
 st.markdown('##')
 st.markdown('##### Verified Email Addresses')
 col9, col10 = st.columns([1, 2])
 
 with col9:
     col9.write('By source')
-    col9.dataframe(verified_by_source, hide_index=True, use_container_width=True)
+    col9.dataframe(views['verified_by_source'], hide_index=True, use_container_width=True)
     # col9.markdown('##')
     col9.write('By Domain')
-    col9.dataframe(verified_by_domain, hide_index=True, use_container_width=True)
+    col9.dataframe(views['verified_by_domain'], hide_index=True, use_container_width=True)
 
 with col10:
     # Create Sunburst chart
     verified_email_updates_breakdown_fig = px.sunburst(
-        combined_verified,
+        views['combined_verified'],
         path=['Source', 'Domain'],
         values='Alum Count',
         hover_data=['Alum Count'],
@@ -300,21 +349,19 @@ st.divider()
 # Row C
 st.markdown('## Database Update Summary')
 col1, col2, col3, col4, col5, col6, col7, col8 = st.columns(8)
-col1.metric("Email", email_updates)
-col2.metric("Phone", phone_updates)
-col3.metric("Location", location_updates)
-col4.metric("Employment", employment_updates)
-col5.metric("Online Presence", online_presence_updates)
-col6.metric("Education", education_updates)
-col7.metric("Bio Details", bio_updates)
-col8.metric("New Alums", new_alums)
+col1.metric("Email", views['email_updates'])
+col2.metric("Phone", views['phone_updates'])
+col3.metric("Location", views['location_updates'])
+col4.metric("Employment", views['employment_updates'])
+col5.metric("Online Presence", views['online_presence_updates'])
+col6.metric("Education", views['education_updates'])
+col7.metric("Bio Details", views['bio_updates'])
+col8.metric("New Alums", views['new_alums'])
 
 st.markdown('###')
 st.markdown('##### Monthly Trend')
-line_chart_data = updates.groupby([pd.Grouper(key='date', freq='M'), 'update_type']).size().reset_index(name='count')
-line_chart_data['date'] = line_chart_data['date'].dt.strftime('%b\'%y')
 
-line_chart = px.line(line_chart_data, x='date', y='count', color='update_type', width=None, line_shape='spline')
+line_chart = px.line(views['line_chart_data'], x='date', y='count', color='update_type', width=None, line_shape='spline')
 line_chart.update_traces(mode='lines+markers', line_width=4, marker_size=11)
 line_chart.update_layout(
     xaxis_tickformat='%b\'%y',
@@ -335,20 +382,12 @@ st.plotly_chart(line_chart, use_container_width=True, config=plotly_config)
 st.markdown("""---""")
 st.markdown('## Data Update Comparison')
 
-data_update_comparison = pd.pivot_table(updates, index=['update_type'], columns=['sync_source'], values='parent_id', aggfunc=pd.Series.nunique)
-
-# Rename column index
-data_update_comparison.index.names = ['Updates']
 
-st.dataframe(data_update_comparison, use_container_width=True)
-
-# Stacked Bar Chart
-# Convert DataFrame to long format
-data_update_comparison_long = pd.melt(data_update_comparison.reset_index(), id_vars=['Updates'], var_name='sync_source', value_name='count')
+st.dataframe(views['data_update_comparison'], use_container_width=True)
 
 # Create stacked bar chart using Plotly Express
 stacked_bar_chart = px.bar(
-    data_update_comparison_long,
+    views['data_update_comparison_long'],
     x='sync_source', y='count', color='Updates', barmode='stack'
 )
 
@@ -377,30 +416,18 @@ st.divider()
 # Row D
 st.markdown('## Data Update Breakdown')
 
-updates_breakdown = updates.groupby(
-    by=['update_type']).nunique()['parent_id'].reset_index().rename(
-        columns={
-            'update_type': 'Description',
-            'parent_id': 'Updates'
-        }
-    )
-
-updates_breakdown = updates_breakdown.sort_values(by=['Updates'], ascending=False)
-
 st.divider()
 
 col1, col2 = st.columns([1, 2])
 
 with col1:
     st.markdown('#### Updates Breakdown')
-    updates_breakdown = updates_breakdown.reset_index(drop=True).copy()
-
-    st.dataframe(updates_breakdown, use_container_width=True, hide_index=True)
+    st.dataframe(views['updates_breakdown'], use_container_width=True, hide_index=True)
     st.write('The reason for the higher number is because for each record there are multiple details (like email or phone number), and each of those data points got updated. So, some records are listed more than once because their information overlaps in multiple rows.')
 
 with col2:
     # Pie Chart
-    pie_chart = px.pie(updates_breakdown, values='Updates', names='Description', hover_data=['Updates'])
+    pie_chart = px.pie(views['updates_breakdown'], values='Updates', names='Description', hover_data=['Updates'])
     pie_chart.update_traces(textposition='auto', textinfo='percent+label')
     pie_chart.update_layout(showlegend=False,
                             autosize=False,
@@ -556,4 +583,5 @@ st.divider()
 if st.sidebar.button('Clear cached data for the dashboard'):
     # Clear values from *all* all in-memory and on-disk data caches:
     # i.e. clear values from both square and cube
-    st.cache_data.clear()
\ No newline at end of file
+    st.cache_data.clear()
+    view_cache.clear()
\ No newline at end of file
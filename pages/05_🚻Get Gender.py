@@ -4,7 +4,10 @@ import numpy as np
 import pickle
 from tensorflow import keras
 from sklearn.metrics import f1_score
-import unicodedata
+import io
+import os
+
+from Helpers.gender import CHUNK_SIZE, GenderCache, predict_genders
 
 st.set_page_config(
     page_title='Gender Identifier',
@@ -24,67 +27,24 @@ st.title(':transgender_symbol: Gender Identifier')
 st.markdown("##")
 st.write('##### Enter First name to predict the gender of the person.')
 
-#word encoding
-maxlen = 20                                               # max length of a name
-# vocab = set(' '.join([str(i) for i in names]))            # creating a vocab
-# vocab.add('END')
-vocab = {' ',
-         'END',
-         'a',
-         'b',
-         'c',
-         'd',
-         'e',
-         'f',
-         'g',
-         'h',
-         'i',
-         'j',
-         'k',
-         'l',
-         'm',
-         'n',
-         'o',
-         'p',
-         'q',
-         'r',
-         's',
-         't',
-         'u',
-         'v',
-         'w',
-         'x',
-         'y',
-         'z'}
-len_vocab = len(vocab)
-char_index = dict((c, i) for i, c in enumerate(vocab))    # creating a dictionary
-
-# Builds an empty line with a 1 at the index of character
-def set_flag(i):
-    aux = np.zeros(len_vocab);
-    aux[i] = 1
-    return list(aux)
-
-# Truncate names and create the matrix
-def prepare_encod_names(X):
-    vec_names = []
-    trunc_name = [str(i)[0:maxlen] for i in X]  # consider only the first 20 characters
-    for i in trunc_name:
-        tmp = [set_flag(char_index.get(j, char_index[" "])) for j in str(i)]
-        for k in range(0, maxlen - len(str(i))):
-            tmp.append(set_flag(char_index["END"]))
-        vec_names.append(tmp)
-    return vec_names
-
-@st.cache_resource(show_spinner='Loading the Machine Learning Model...')
-def load_model():
+# Loaded again, with a new cache of predictions, whenever the model is retrained
+@st.cache_resource(max_entries=1, show_spinner='Loading the Machine Learning Model...')
+def load_model(version):
     # Load the trained model
     model_path = 'Models/model.h5'
     custom_objects = {'f1_score': f1_score}
     loaded_model = keras.models.load_model(model_path, custom_objects=custom_objects)
     return loaded_model
 
-loaded_model = load_model()
+@st.cache_resource(max_entries=1)
+def get_cache(version):
+    # Predictions of names which came up before, by the same model
+    return GenderCache()
+
+model_version = os.path.getmtime('Models/model.h5')
+
+loaded_model = load_model(model_version)
+cache = get_cache(model_version)
 
 @st.cache_data
 # Load the tokenizer
@@ -113,20 +73,7 @@ uploaded_file = st.file_uploader("Upload a CSV file", type="csv")
 st.markdown("##")
 
 def predict_gender(name):
-    try:
-        name = name.lower()
-    except:
-        name = name.casefold()
-
-    # Normalize the name to remove diacritic marks and special characters
-    name = unicodedata.normalize('NFKD', name).encode('ASCII', 'ignore').decode('utf-8')
-
-    name = prepare_encod_names([name])  # Now the names are encod as a vector of numbers with weight
-    resu = (loaded_model.predict(name) > 0.5).astype("int32")
-    if int(resu) == 1:
-        return ('Male')
-    else:
-        return ('Female')
+    return predict_genders(loaded_model, [name], char_index, cache)[0]
 
 if st.button("Predict"):
     if name:
@@ -135,19 +82,33 @@ if st.button("Predict"):
     elif uploaded_file:
         # Load CSV file into a pandas dataframe
         df = pd.read_csv(uploaded_file)
-        # Predict the gender for each name in the dataframe
-        df['gender'] = df['name'].apply(predict_gender)
+        # Predict the gender a chunk of names at a time, writing each chunk to the CSV as it's done
+        csv = io.StringIO()
+        hits, misses = cache.hits, cache.misses
+        progress = st.progress(0.0, text=f"Predicting the gender of {len(df):,} names...")
+        for start in range(0, len(df), CHUNK_SIZE):
+            chunk = df.iloc[start:start + CHUNK_SIZE].copy()
+            chunk['gender'] = predict_genders(loaded_model, chunk['name'], char_index, cache)
+            chunk.to_csv(csv, header=start == 0, index=False)
+            done = start + len(chunk)
+            progress.progress(done / len(df), text=f"Predicted the gender of {done:,} of {len(df):,} names")
+        # Names predicted before needn't be predicted again
+        hits, misses = cache.hits - hits, cache.misses - misses
+        st.write(f"{hits:,} of {hits + misses:,} names looked up ({hits / max(hits + misses, 1):.0%}) were already "
+                 f"in the cache of predictions.")
         # Download the dataframe as a CSV file with predicted gender
-        csv = df.to_csv(index=False)
         st.download_button(
             label="Download the processed file",
-            data=csv,
+            data=csv.getvalue(),
             file_name="gender_predictions.csv",
             mime="text/csv"
         )
     else:
         st.write("Please enter a name or upload a CSV file to predict the gender.")
 
+    st.caption(f"Cache hit rate since the model was loaded: {cache.get_hit_rate():.0%} of "
+               f"{cache.hits + cache.misses:,} names.")
+
 st.markdown("""---""")
 st.markdown("##")
 st.markdown('#### Data Upload Format')
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Run from anywhere, e.g. python -m pytest tests
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
@@ -0,0 +1,21 @@
+import os
+import ast
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_functions(script, names, **namespace):
+    """
+    Functions of one of the scripts, e.g. 'Get Data for Dashboard.py', without running it, as the scripts download
+    and upload as soon as they're imported. The functions see ``namespace`` as their globals, in place of the
+    script's.
+    """
+
+    with open(os.path.join(ROOT, script), encoding='utf-8') as file:
+        tree = ast.parse(file.read())
+
+    functions = [node for node in tree.body
+                 if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name in names]
+    exec(compile(ast.Module(functions, type_ignores=[]), script, 'exec'), namespace)
+
+    return [namespace[name] for name in names]
@@ -0,0 +1,86 @@
+import os
+import logging
+import pandas as pd
+
+from datetime import datetime, timedelta, timezone
+
+from scripts import load_functions
+from Helpers.delta_sync import SyncState, merge_changes, FULL_DOWNLOAD_INTERVAL, MARK_FORMAT
+
+
+def get_mark(age):
+    return (datetime.now(timezone.utc) - age).strftime(MARK_FORMAT)
+
+
+def get_sync_state(tmp_path, full_age):
+    sync_state = SyncState(str(tmp_path / 'Sync State.json'))
+    sync_state.save('customfields', get_mark(timedelta(hours=1)))
+    sync_state.marks['customfields (full)'] = get_mark(full_age)
+
+    return sync_state
+
+
+def test_no_mark_before_a_full_download(tmp_path):
+    sync_state = SyncState(str(tmp_path / 'Sync State.json'))
+    sync_state.save('customfields', get_mark(timedelta(hours=1)))
+
+    assert sync_state.get('customfields') is None
+
+
+def test_mark_until_the_full_download_is_due(tmp_path):
+    assert get_sync_state(tmp_path, timedelta(days=1)).get('customfields') is not None
+    assert get_sync_state(tmp_path, FULL_DOWNLOAD_INTERVAL + timedelta(minutes=1)).get('customfields') is None
+
+
+def test_saved_marks_are_reloaded(tmp_path):
+    sync_state = SyncState(str(tmp_path / 'Sync State.json'))
+    mark = get_mark(timedelta(0))
+    sync_state.save('addresses', mark, full=True)
+
+    assert SyncState(str(tmp_path / 'Sync State.json')).get('addresses') == mark
+
+
+def test_merge_changes_replaces_rows_by_id(tmp_path):
+    path = str(tmp_path / 'Address List')
+    pd.DataFrame({'id': ['1', '2'], 'city': ['Pune', 'Delhi'], 'derived': [1, 2]}).to_parquet(path, index=False)
+
+    merged = merge_changes(path, pd.DataFrame({'id': ['2', '3'], 'city': ['Mumbai', 'Goa']}), drop_columns=['derived'])
+
+    assert merged.sort_values('id').to_dict('records') == [
+        {'id': '1', 'city': 'Pune'}, {'id': '2', 'city': 'Mumbai'}, {'id': '3', 'city': 'Goa'}]
+
+
+def test_full_mark_expiring_during_a_delta_run(tmp_path):
+    # The categories are downloaded as changes, so they're merged as changes, even though a full download falls due
+    # before the merge
+    sync_state = get_sync_state(tmp_path, FULL_DOWNLOAD_INTERVAL - timedelta(seconds=1))
+    urls, published = [], []
+
+    class Graph:
+        @staticmethod
+        def namespace(name):
+            return str(tmp_path / name)
+
+    get_last_mark, get_custom_fields, merge_custom_fields = load_functions(
+        'Get Data for Dashboard.py', ['get_last_mark', 'get_custom_fields', 'merge_custom_fields', 'get_delta_url'],
+        os=os, logging=logging, DELTA=True, sync_state=sync_state, graph=Graph(),
+        CUSTOM_FIELD_CATEGORIES=['Verified Email', 'Sync source'], DERIVED_COLUMNS=[],
+        download_pages=lambda download_urls, path: urls.extend(download_urls),
+        publish=lambda tmp_dir, downloads, path, delta, drop_columns=None: published.append(delta))[:3]
+
+    last_mark = get_last_mark('customfields')
+    assert last_mark is not None
+
+    expired = get_mark(FULL_DOWNLOAD_INTERVAL + timedelta(minutes=1))
+    sync_state.marks['customfields (full)'] = expired
+
+    for category in ['Verified Email', 'Sync source']:
+        get_custom_fields(str(tmp_path), category, last_mark)
+
+    merge_custom_fields(str(tmp_path), get_mark(timedelta(0)), last_mark)
+
+    assert all(f'last_modified={last_mark}' in url for url in urls)
+    assert published == [True]
+
+    # Not recorded as a full download
+    assert SyncState(sync_state.path).marks['customfields (full)'] == expired
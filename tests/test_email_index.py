@@ -0,0 +1,79 @@
+import pandas as pd
+
+from Helpers.email_index import EmailIndex, get_email_matches, resolve_emails
+
+
+def get_index():
+    return EmailIndex([' John@Gmail.com', 'john@gmail.com', 'johnny@yahoo.com', 'jo.hn@gmail.com', 'a+b@x.com', None],
+                      [1, 2, 3, 4, 5, 6])
+
+
+def test_get():
+    index = get_index()
+
+    assert index.get('JOHN@gmail.com ') == [1, 2]
+    assert index.get('jo') == []
+    assert len(index) == 4
+
+
+def test_find_prefix():
+    index = get_index()
+    start, end = index.find_prefix('John')
+
+    assert index.addresses[start:end].tolist() == ['john@gmail.com', 'john@gmail.com', 'johnny@yahoo.com']
+    assert index.count('jo') == 4
+    assert index.count('zz') == 0
+
+
+def test_prefix_isnt_a_regular_expression():
+    index = get_index()
+
+    assert index.search_ids('jo.') == [4]
+    assert index.search_ids('a+') == [5]
+
+
+def test_search_limit():
+    assert get_index().search('john', limit=2).to_dict('records') == [
+        {'address': 'john@gmail.com', 'constituent_id': 1}, {'address': 'john@gmail.com', 'constituent_id': 2}]
+
+
+def test_empty_index():
+    index = EmailIndex(pd.Series([], dtype=object), pd.Series([], dtype=int))
+
+    assert index.search_ids('a') == []
+    assert index.get('a@b.com') == []
+
+
+def get_records():
+    return pd.DataFrame({
+        'address': ['A@x.com', 'a@x.com ', 'b@x.com', 'b@x.com', 'c@x.com', None],
+        'constituent_id': ['1', '2', '3', '3', None, '4'],
+        'primary': [True, False, None, False, True, True],
+        'inactive': [True, False, True, True, False, False]
+    })
+
+
+def test_get_email_matches():
+    matches = get_email_matches(get_records())
+
+    assert matches.index.tolist() == ['a@x.com', 'b@x.com']
+    # Ambiguous addresses have no constituent_id
+    assert pd.isna(matches.loc['a@x.com', 'constituent_id'])
+    assert matches.loc['a@x.com'].drop('constituent_id').to_dict() == {
+        'constituent_ids': '1; 2', 'matches': 2, 'is_ambiguous': True, 'is_primary': True, 'is_inactive': False}
+    assert matches.loc['b@x.com'].to_dict() == {'constituent_id': '3', 'constituent_ids': '3', 'matches': 1,
+                                                'is_ambiguous': False, 'is_primary': False, 'is_inactive': True}
+
+
+def test_resolve_emails():
+    df = pd.DataFrame({'Email': ['B@X.com', 'd@x.com', None]}, index=[10, 11, 12])
+    resolved = resolve_emails(df, 'Email', get_email_matches(get_records()))
+
+    assert resolved.index.tolist() == [10, 11, 12]
+    assert resolved['constituent_id'].tolist()[0] == '3'
+    assert resolved['matches'].tolist() == [1, 0, 0]
+    assert resolved['is_ambiguous'].tolist() == [False, False, False]
+
+
+def test_no_records():
+    assert get_email_matches(get_records().iloc[:0]).empty
@@ -0,0 +1,62 @@
+import pandas as pd
+
+from Helpers.kpi_cube import build_kpi_cube, load_kpi_cube, filter_cube, with_constituents
+
+
+def get_custom_fields():
+    row = {'category': 'Verified Email', 'verified_source': 'Form', 'sync_source': 'Form', 'update_type': 'Email',
+           'verified_source_category': '1 - Form', 'email_domain_category': '1 - Gmail'}
+
+    return pd.DataFrame([
+        dict(row, date='2024-01-02', parent_id='1'),
+        dict(row, date='2024-01-02', parent_id='1'),
+        dict(row, date='2024-01-02', parent_id='2'),
+        dict(row, date='2024-01-01', parent_id='3'),
+        dict(row, date='2024-01-03', parent_id='1', update_type='Phone'),
+    ])
+
+
+def get_cube(tmp_path):
+    alums = pd.DataFrame({'id': ['1', '3']})
+    constituents = pd.DataFrame({'id': ['1', '2', '3'], 'deceased': ['False', 'True', 'False'],
+                                 'inactive': ['False', 'False', 'False']})
+    opt_outs = pd.DataFrame()
+
+    cube, constituents = build_kpi_cube(get_custom_fields(), alums, constituents, opt_outs)
+
+    cube.to_parquet(tmp_path / 'KPI Cube.parquet', index=False)
+    constituents.to_parquet(tmp_path / 'KPI Cube Constituents.parquet', index=False)
+
+    return load_kpi_cube(str(tmp_path / 'KPI Cube.parquet'), str(tmp_path / 'KPI Cube Constituents.parquet'))
+
+
+def test_cube_is_grouped_without_constituents(tmp_path):
+    cube, parent_ids = get_cube(tmp_path)
+
+    # A row per day and update type, and one apart for constituent 2 on 2024-01-02, as it's deceased and not an alum
+    assert cube['date'].is_monotonic_increasing
+    assert len(cube) == 4
+    assert cube['records'].sum() == 5
+    assert cube['constituents'].sum() == len(parent_ids) == 4
+
+
+def test_constituents_of_filtered_rows(tmp_path):
+    cube, parent_ids = get_cube(tmp_path)
+
+    rows = filter_cube(cube, '2024-01-02', '2024-01-03')
+    expanded = with_constituents(rows, parent_ids)
+
+    assert rows['records'].sum() == 4
+    assert sorted(expanded['parent_id'].tolist()) == [1, 1, 2]
+    assert expanded.groupby('update_type')['parent_id'].nunique().to_dict() == {'Email': 2, 'Phone': 1}
+
+
+def test_flags(tmp_path):
+    cube, parent_ids = get_cube(tmp_path)
+
+    alums = with_constituents(filter_cube(cube, '2024-01-01', '2024-01-03', only_alums=True), parent_ids)
+    alive = with_constituents(filter_cube(cube, '2024-01-01', '2024-01-03', ignore_deceased=True), parent_ids)
+
+    assert set(alums['parent_id']) == {1, 3}
+    assert set(alive['parent_id']) == {1, 3}
+    assert filter_cube(cube, '2024-02-01', '2024-01-01').empty
@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+from Helpers.phone_numbers import canonicalise, canonicalise_series
+
+
+@pytest.mark.parametrize('value, default_code, key', [
+    ('098765 43210', '91', '+919876543210'),
+    ('+91 (0)98765 43210', '91', '+919876543210'),
+    ('919876543210', '91', '+919876543210'),
+    ('0091 98765 43210', '91', '+919876543210'),
+    (9876543210.0, '91', '+919876543210'),
+    ('13812345678', '86', '+8613812345678'),
+    ('8613812345678', '86', '+8613812345678'),
+    ('13812345678', '91', '+13812345678'),
+    ('4155552671', '1', '+14155552671'),
+    ('+16845551234', '91', '+16845551234'),
+    ('06 1234 5678', '39', '+390612345678'),
+    ('+999 123', '91', '+999123'),
+])
+def test_canonicalise(value, default_code, key):
+    assert canonicalise(value, default_code) == key
+
+
+@pytest.mark.parametrize('value', [None, float('nan'), '', '0', '000', '+0', '+91', 'n/a'])
+def test_no_national_number(value):
+    assert canonicalise(value, '91') is None
+
+
+def test_canonicalise_series():
+    phones = pd.Series(['13812345678', None, '13812345678', 9876543210.0, '0'])
+
+    assert canonicalise_series(phones).tolist() == ['+13812345678', None, '+13812345678', '+919876543210', None]
+    assert canonicalise_series(phones, pd.Series(['86', '91', '91', '91', '91'])).tolist() == \
+        ['+8613812345678', None, '+13812345678', '+919876543210', None]
@@ -0,0 +1,36 @@
+import time
+import asyncio
+import pytest
+
+from Helpers.rate_limiter import TokenBucket
+
+
+def test_rate_below_one():
+    # Half a request per second still lets the first request through, and the next one after 2 seconds
+    bucket = TokenBucket(0.5)
+
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == pytest.approx(2, abs=0.1)
+
+
+def test_acquire_below_one_doesnt_hang():
+    bucket = TokenBucket(0.5)
+    start = time.monotonic()
+
+    bucket.acquire()
+    asyncio.run(asyncio.wait_for(bucket.acquire_async(), timeout=5))
+
+    assert 1.5 < time.monotonic() - start < 5
+
+
+def test_capacity():
+    bucket = TokenBucket(10, capacity=2)
+
+    assert [bucket.try_acquire() for i in range(2)] == [0, 0]
+    assert bucket.try_acquire() > 0
+
+
+@pytest.mark.parametrize('rate', [0, -1])
+def test_rate_must_be_positive(rate):
+    with pytest.raises(ValueError):
+        TokenBucket(rate)
@@ -0,0 +1,104 @@
+import json
+import asyncio
+import aiohttp
+import pytest
+
+from Helpers import sky_api_async
+from Helpers.sky_api_async import AsyncSkyApiClient, get_endpoint_family
+
+
+class ConnectorError(aiohttp.ClientConnectorError):
+    # The connection was never made
+    def __init__(self):
+        OSError.__init__(self, 'Cannot connect')
+
+    def __str__(self):
+        return 'Cannot connect'
+
+
+class Response:
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+        self.headers = {}
+
+    async def text(self):
+        return self.body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+class Session:
+    # Raises or returns each of ``outcomes`` in turn
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append(method)
+        outcome = self.outcomes.pop(0)
+
+        if isinstance(outcome, Exception):
+            raise outcome
+
+        return outcome
+
+
+def get_client(tmp_path, monkeypatch, outcomes):
+    async def sleep(seconds):
+        pass
+
+    monkeypatch.setattr(sky_api_async.asyncio, 'sleep', sleep)
+
+    token_file = tmp_path / 'access_token_output.json'
+    token_file.write_text(json.dumps({'access_token': 'token'}))
+
+    client = AsyncSkyApiClient('key', token_file=str(token_file))
+    client.session = Session(outcomes)
+
+    return client
+
+
+URL = 'https://api.sky.blackbaud.com/constituent/v1/phones'
+
+
+def test_post_isnt_retried_after_a_server_disconnect(tmp_path, monkeypatch):
+    # RE may have added the phone before the connection dropped, so it isn't posted again
+    client = get_client(tmp_path, monkeypatch, [aiohttp.ServerDisconnectedError(), Response(200, '{"id": "1"}')])
+
+    with pytest.raises(aiohttp.ServerDisconnectedError):
+        asyncio.run(client.post(URL, {'number': '9876543210'}))
+
+    assert client.session.requests == ['POST']
+
+
+def test_post_is_retried_when_it_never_connected(tmp_path, monkeypatch):
+    client = get_client(tmp_path, monkeypatch, [ConnectorError(), Response(200, '{"id": "1"}')])
+
+    assert asyncio.run(client.post(URL, {'number': '9876543210'})) == {'id': '1'}
+    assert client.session.requests == ['POST', 'POST']
+
+
+def test_get_is_retried_after_a_server_disconnect(tmp_path, monkeypatch):
+    client = get_client(tmp_path, monkeypatch, [aiohttp.ServerDisconnectedError(), Response(503, ''),
+                                                Response(200, '{"value": []}')])
+
+    assert asyncio.run(client.get(URL)) == {'value': []}
+    assert client.session.requests == ['GET', 'GET', 'GET']
+
+
+def test_post_isnt_retried_on_server_errors(tmp_path, monkeypatch):
+    client = get_client(tmp_path, monkeypatch, [Response(503, '{}'), Response(200, '{"id": "1"}')])
+
+    assert asyncio.run(client.post(URL, {'number': '9876543210'})) == {}
+    assert client.session.requests == ['POST']
+
+
+def test_endpoint_family():
+    assert get_endpoint_family('https://api.sky.blackbaud.com/constituent/v1/constituents/123/phones') == \
+        'constituent/phones'
+
@@ -0,0 +1,52 @@
+import asyncio
+import logging
+
+from datetime import datetime, timedelta
+
+from scripts import load_functions
+from Helpers.re_mirror import ReMirror, MIRRORED_RESOURCES
+
+
+def test_county_is_added_before_the_address_is_posted_again():
+    counties = []
+
+    class Client:
+        def __init__(self):
+            self.posts = []
+
+        async def post(self, url, params):
+            self.posts.append(params)
+            return [{'message': 'Invalid county of value Goa'}] if len(self.posts) == 1 else {'id': '1'}
+
+    send_update, = load_functions('Upload to RE.py', ['send_update'], asyncio=asyncio, logging=logging,
+                                  add_county=counties.append)
+
+    client = Client()
+    asyncio.run(send_update(client, 'POST', 'https://api.sky.blackbaud.com/constituent/v1/addresses',
+                            {'county': 'Goa', 'city': 'Panaji'}))
+
+    assert counties == ['Goa']
+    assert len(client.posts) == 2
+
+
+def get_mirror(tmp_path, age):
+    mirror = ReMirror(str(tmp_path / 'RE Mirror.db'))
+
+    with mirror.connect() as connection:
+        for resource in MIRRORED_RESOURCES:
+            connection.execute('INSERT OR REPLACE INTO sync_state VALUES (?, ?)',
+                               (resource, (datetime.now() - age).isoformat()))
+
+    open_mirror, = load_functions('Upload to RE.py', ['open_mirror'], logging=logging, ReMirror=ReMirror,
+                                  MIRRORED_RESOURCES=MIRRORED_RESOURCES, datetime=datetime, timedelta=timedelta)
+
+    return open_mirror(mirror.path, 24)
+
+
+def test_recent_mirror_is_used(tmp_path):
+    assert get_mirror(tmp_path, timedelta(hours=1)) is not None
+
+
+def test_old_mirror_isnt_used(tmp_path):
+    # Emails, phones and addresses added to RE since would be added again
+    assert get_mirror(tmp_path, timedelta(days=3)) is None